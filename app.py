@@ -146,18 +146,32 @@
 #         logger.warning("❌ Share link not generated")
 
 
+import asyncio
 import gradio as gr
 import os
-import tempfile
-from src.agenticRAG.gpt import gpt_response
-from src.SpeechToText.sr import transcribe_audio, clear_history
-from src.SpeechToText.hamsa import transcribe_audio_hamsa
-from datetime import datetime
+import threading
+from src.agenticRAG.gpt import gpt_response_async, gpt_response_stream, get_session_manager
+from src.SpeechToText.backends import get_transcriber
+from src.SpeechToText.local_stt import LocalSTTFactory
+from src.SpeechToText.vad import noise_profiles
+from src.SpeechToText.endpointing import endpointers, chunk_to_samples
 from loguru import logger
-from src.TextToSpeech.gtts_tts import text_to_speech_with_gtts
+from src.TextToSpeech.router import get_tts_router
+from src.TextToSpeech.backends import TTSBackendFactory
+from src.TextToSpeech.prefetch import get_phrase_prefetcher
+from src.TextToSpeech.spool import get_audio_spool
+from src.TextToSpeech.streaming import stream_speech
+from src.agenticRAG.main import warmup_in_background
+from src.pipeline.executor import turn_executor, TurnCancelled, StageTimeout
+from src.pipeline.history import TranscriptHistory, new_history
+from src.config.settings import settings
 
 # Create Gradio Interface
-with gr.Blocks(title="Multilingual Speech to Text") as iface:
+# delete_cache bounds Gradio's own copies of served audio: (check every N s, delete older than M s)
+with gr.Blocks(
+    title="Multilingual Speech to Text",
+    delete_cache=(settings.GRADIO_CACHE_CLEAN_SECONDS, settings.GRADIO_CACHE_MAX_AGE_SECONDS)
+) as iface:
     gr.Markdown("# 🎙️ Multilingual Speech to Text (Arabic & English)")
     gr.Markdown("Speak in Arabic or English, or let the system auto-detect the language!")
     
@@ -185,6 +199,15 @@ with gr.Blocks(title="Multilingual Speech to Text") as iface:
                 label="🎤 Speak or Upload Audio"
             )
             
+            if settings.VOICE_LIVE_MIC:
+                # Streams microphone chunks; each utterance is answered as soon as the user stops talking
+                live_input = gr.Audio(
+                    sources=["microphone"],
+                    type="numpy",
+                    streaming=True,
+                    label="🎙️ Hands-free Microphone"
+                )
+            
             with gr.Row():
                 submit_btn = gr.Button("🔄 Transcribe", variant="primary")
                 clear_btn = gr.Button("🗑️ Clear History", variant="secondary")
@@ -210,7 +233,8 @@ with gr.Blocks(title="Multilingual Speech to Text") as iface:
                 label="🔊 AI Response Audio",
                 type="filepath",
                 interactive=False,
-                autoplay=True  # Automatically play the audio when generated
+                autoplay=True,  # Automatically play the audio when generated
+                streaming=settings.VOICE_STREAMING  # Play sentence chunks as they arrive
             )
             
             history_output = gr.Textbox(
@@ -220,84 +244,259 @@ with gr.Blocks(title="Multilingual Speech to Text") as iface:
                 max_lines=20,
                 interactive=False
             )
+            
+            history_page = gr.Number(
+                value=0,
+                minimum=0,
+                precision=0,
+                label="History page (0 = newest)"
+            )
+    
+    # State to maintain history (a TranscriptHistory, created on the first turn)
+    history_state = gr.State(None)
     
-    # State to maintain history
-    history_state = gr.State("")
+    # Only one bounded page of the history is ever sent to the browser
+    def render_history(history, page=0):
+        if not isinstance(history, TranscriptHistory):
+            return ""
+        return history.render(page=int(page or 0))
+    
+    def session_history(history, request: gr.Request):
+        if isinstance(history, TranscriptHistory):
+            return history
+        return new_history(request.session_hash)
     
     # Function to generate TTS audio
     def generate_tts_audio(text):
-        """Generate TTS audio and return the file path"""
+        """Generate TTS audio: encoded bytes (the router's format, MP3 or WAV), or a spool file path when TTS_OUTPUT is "spool" """
         if not text or not text.strip():
             return None
         
         try:
-            # Create a temporary file for the audio
-            temp_audio = tempfile.NamedTemporaryFile(delete=False, suffix=".mp3")
-            temp_audio_path = temp_audio.name
-            temp_audio.close()
-            
-            # Generate TTS audio
-            text_to_speech_with_gtts(text, temp_audio_path)
-            
-            return temp_audio_path
+            # Generate TTS audio: Arabic and English parts go to their own voices
+            audio, audio_format = get_tts_router().synthesize(text)
+            if settings.TTS_OUTPUT == "spool":
+                spool = get_audio_spool()
+                path = spool.write(audio, suffix=f".{audio_format}")
+                logger.debug(f"Audio spool: {spool.stats()}")
+                return path
+            return audio
         except Exception as e:
             logger.error(f"TTS generation failed: {e}")
             return None
     
-    # Function to process transcription and get GPT response
-    def process_audio_and_respond(audio, language, history):
-        # Get transcription
+    # Function to synthesize one streamed sentence (routed by script, cached);
+    # every chunk of a reply comes out in the router's audio_format
+    def synthesize_tts_chunk(text):
+        return get_tts_router().synthesize_unit(text)
+    
+    # Async TTS stage: the blocking gTTS call runs in a worker thread
+    async def generate_tts_audio_async(text):
+        return await asyncio.to_thread(generate_tts_audio, text)
+    
+    # Function to transcribe with the configured backend (hedged race by default)
+    transcribe_audio_async = get_transcriber()
+    
+    async def transcribe_with_fallback(turn, audio, language, history):
         try:
-            updated_history, current_text = transcribe_audio(audio, language, history)
+            updated_history, current_text = await turn.run(
+                "stt", transcribe_audio_async, audio, language, history, session_id=turn.session_id
+            )
             logger.info(f"Transcription successful: {current_text}")
+        except TurnCancelled:
+            raise
         except Exception as e:
-            updated_history, current_text = transcribe_audio_hamsa(audio, language, history)
-            logger.error(f"Transcription failed. Apply Fallback with Hamsa API: {e}")
-            if not current_text:
-                current_text = "Transcription failed. Please try again."
-        
-        # Get GPT response if there's transcribed text
-        gpt_result = ""
-        tts_audio_path = None
-        
-        if current_text and current_text.strip():
-            response = gpt_response(current_text)
-            gpt_result = f"Response: {response['response']} \n\nEmotion: {response['emotional_state']}"
+            # Timeouts and backend errors alike leave the turn with the retry message
+            logger.error(f"Transcription failed: {e}")
+            updated_history, current_text = history, ""
+        if not current_text:
+            current_text = "Transcription failed. Please try again."
+        return updated_history, current_text
+    
+    # Function to add a query/answer pair to the history
+    def add_turn_to_history(history, language, current_text, response):
+        history.add_turn(language, current_text, response)
+        return history
+    
+    # Function to process transcription and get GPT response
+    async def process_audio_and_respond(audio, language, history, request: gr.Request):
+        history = session_history(history, request)
+        turn = turn_executor.begin_turn(request.session_hash)
+        try:
+            # Get transcription
+            updated_history, current_text = await transcribe_with_fallback(turn, audio, language, history)
             
-            # Generate TTS for the AI response
-            ai_response_text = response['response']
-            tts_audio_path = generate_tts_audio(ai_response_text)
+            # Get GPT response if there's transcribed text
+            gpt_result = ""
+            tts_audio_path = None
             
-            # Update history with both query and answer
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            detected_lang = response.get('detected_language', 'Unknown')
+            if current_text and current_text.strip():
+                try:
+                    response = await turn.run("llm", gpt_response_async, current_text, request.session_hash)
+                except StageTimeout as e:
+                    logger.error(f"GPT response failed: {e}")
+                    return updated_history, current_text, "Response timed out. Please try again.", None
+                gpt_result = f"Response: {response['response']} \n\nEmotion: {response['emotional_state']}"
+                
+                # Generate TTS for the AI response
+                ai_response_text = response['response']
+                try:
+                    tts_audio_path = await turn.run("tts", generate_tts_audio_async, ai_response_text)
+                except StageTimeout as e:
+                    logger.error(f"TTS generation failed: {e}")
+                
+                # Update history with both query and answer
+                updated_history = add_turn_to_history(updated_history, language, current_text, response)
+            
+            return updated_history, current_text, gpt_result, tts_audio_path
+        except TurnCancelled:
+            # A newer recording from this session took over; leave the UI to it
+            return gr.update(), gr.update(), gr.update(), gr.update()
+        finally:
+            turn.finish()
+    
+    # Streaming variant: speak each sentence while the LLM is still generating
+    async def process_audio_and_respond_streaming(audio, language, history, request: gr.Request):
+        history = session_history(history, request)
+        turn = turn_executor.begin_turn(request.session_hash)
+        speech = None
+        try:
+            # Get transcription
+            updated_history, current_text = await transcribe_with_fallback(turn, audio, language, history)
+            
+            if not current_text or not current_text.strip():
+                yield updated_history, current_text, "", gr.update()
+                return
+            
+            final = {}
             
-            # Format the history entry
-            history_entry = f"[{timestamp}] [{language}] [{detected_lang}]\n"
-            history_entry += f"Query: {current_text}\n"
-            history_entry += f"Answer: {response['response']}"
-            history_entry += "-----------------------\n\n"
+            def text_deltas():
+                events = gpt_response_stream(current_text, session_id=request.session_hash)
+                try:
+                    for event in events:
+                        if event["type"] == "delta":
+                            yield event["text"]
+                        else:
+                            final.update(event["response"])
+                finally:
+                    # Stops generation when the speech stream is closed early
+                    events.close()
             
-            # Add to history
-            if updated_history:
-                updated_history = history_entry + updated_history
-            else:
-                updated_history = history_entry
+            spoken = []
+            # Known openers ("Hello", the error replies...) are spoken straight from the cache
+            speech = stream_speech(text_deltas(), synthesize_tts_chunk, segmenter=get_phrase_prefetcher().segmenter())
+            # A superseding turn stops this reply's generation and synthesis right away
+            turn.on_cancel(speech.close)
+            try:
+                # The LLM slot is held while the reply generates; each audio chunk
+                # is bounded by the TTS stage's concurrency limit and timeout
+                async with turn_executor.semaphore("llm"):
+                    async for sentence, audio_chunk in turn.iterate("tts", speech):
+                        spoken.append(sentence)
+                        yield updated_history, current_text, f"Response: {' '.join(spoken)}", audio_chunk
+            except StageTimeout as e:
+                logger.error(f"Streaming response stalled: {e}")
+            
+            response = final or {"response": " ".join(spoken), "emotional_state": "unknown"}
+            gpt_result = f"Response: {response['response']} \n\nEmotion: {response['emotional_state']}"
+            
+            # Update history with both query and answer
+            updated_history = add_turn_to_history(updated_history, language, current_text, response)
+            
+            yield updated_history, current_text, gpt_result, gr.update()
+        except TurnCancelled:
+            # A newer recording from this session took over
+            return
+        finally:
+            if speech is not None:
+                speech.close()
+            turn.finish()
+    
+    respond_fn = process_audio_and_respond_streaming if settings.VOICE_STREAMING else process_audio_and_respond
+    
+    # Live captions while the user is still talking
+    partial_transcribe_async = get_transcriber(settings.VAD_PARTIAL_BACKEND)
+    partial_tasks = set()
+    
+    def start_partial_transcription(endpointer, event, language):
+        async def run():
+            # A throwaway history tells results apart from backend error messages
+            partial_history = TranscriptHistory(max_entries=1)
+            try:
+                async with turn_executor.semaphore("stt"):
+                    _, text = await asyncio.wait_for(
+                        partial_transcribe_async(event.to_wav(), language, partial_history),
+                        turn_executor.timeouts["stt"]
+                    )
+            except Exception as e:
+                logger.debug(f"Partial transcription failed: {e}")
+                return
+            entries = partial_history.page(0, 1)
+            if not entries or entries[0].kind == "error":
+                logger.debug(f"Partial transcription failed: {text}")
+                return
+            if endpointer.speaking:
+                endpointer.partial_text = text
+        
+        task = asyncio.ensure_future(run())
+        partial_tasks.add(task)
+        task.add_done_callback(partial_tasks.discard)
+    
+    # Hands-free mode: endpoint the live microphone stream and answer each utterance
+    async def process_live_audio(chunk, language, history, request: gr.Request):
+        if chunk is None:
+            yield gr.update(), gr.update(), gr.update(), gr.update()
+            return
         
-        return updated_history, current_text, gpt_result, tts_audio_path
+        sample_rate, data = chunk
+        endpointer = endpointers.get(request.session_hash)
+        utterance = None
+        for event in endpointer.feed(chunk_to_samples(data), sample_rate):
+            if event.kind == "end":
+                utterance = event
+            elif event.kind == "partial":
+                start_partial_transcription(endpointer, event, language)
+        
+        if utterance is None:
+            caption = endpointer.partial_text if endpointer.speaking and endpointer.partial_text else gr.update()
+            yield gr.update(), caption, gr.update(), gr.update()
+            return
+        
+        # End of utterance: transcribe right away from in-memory WAV bytes
+        endpointer.partial_text = ""
+        wav_bytes = utterance.to_wav()
+        if settings.VOICE_STREAMING:
+            async for outputs in process_audio_and_respond_streaming(wav_bytes, language, history, request):
+                yield outputs
+        else:
+            yield await process_audio_and_respond(wav_bytes, language, history, request)
+    
+    def reset_live_audio(request: gr.Request):
+        endpointers.get(request.session_hash).reset()
     
-    # Function to clear everything including TTS audio
-    def clear_all():
-        return "", "", "", None
+    # Function to clear everything including TTS audio and conversation memory
+    def clear_all(request: gr.Request):
+        turn_executor.cancel_session(request.session_hash)
+        get_session_manager().remove(request.session_hash)
+        noise_profiles.remove(request.session_hash)
+        endpointers.remove(request.session_hash)
+        return None, "", "", "", None
+    
+    # Release the therapist session when the browser disconnects
+    def end_session(request: gr.Request):
+        turn_executor.cancel_session(request.session_hash)
+        get_session_manager().remove(request.session_hash)
+        noise_profiles.remove(request.session_hash)
+        endpointers.remove(request.session_hash)
     
     # Event handlers
     submit_btn.click(
-        fn=process_audio_and_respond,
+        fn=respond_fn,
         inputs=[audio_input, language_selector, history_state],
         outputs=[history_state, current_output, gpt_output, tts_audio]
     ).then(
-        fn=lambda h: h,
-        inputs=[history_state],
+        fn=render_history,
+        inputs=[history_state, history_page],
         outputs=[history_output]
     )
     
@@ -306,18 +505,60 @@ with gr.Blocks(title="Multilingual Speech to Text") as iface:
         outputs=[history_state, history_output, current_output, gpt_output, tts_audio]
     )
     
+    history_page.change(
+        fn=render_history,
+        inputs=[history_state, history_page],
+        outputs=[history_output]
+    )
+    
+    iface.unload(end_session)
+    
     # Auto-submit when audio is uploaded/recorded
     audio_input.change(
-        fn=process_audio_and_respond,
+        fn=respond_fn,
         inputs=[audio_input, language_selector, history_state],
         outputs=[history_state, current_output, gpt_output, tts_audio]
     ).then(
-        fn=lambda h: h,
-        inputs=[history_state],
+        fn=render_history,
+        inputs=[history_state, history_page],
         outputs=[history_output]
     )
+    
+    if settings.VOICE_LIVE_MIC:
+        live_input.stream(
+            fn=process_live_audio,
+            inputs=[live_input, language_selector, history_state],
+            outputs=[history_state, current_output, gpt_output, tts_audio],
+            stream_every=settings.VOICE_LIVE_CHUNK_SECONDS
+        ).then(
+            fn=render_history,
+            inputs=[history_state, history_page],
+            outputs=[history_output]
+        )
+        live_input.stop_recording(fn=reset_live_audio)
 
 if __name__ == "__main__":
+    if settings.RAG_WARMUP_ON_START:
+        warmup_in_background()
+    
+    # Load the in-process speech model up front so the first turn (or live caption) doesn't pay for it
+    live_partials_local = (
+        settings.VOICE_LIVE_MIC and settings.VAD_PARTIAL_INTERVAL_MS > 0 and settings.VAD_PARTIAL_BACKEND == "local"
+    )
+    if settings.STT_BACKEND == "local" or "local" in settings.STT_HEDGE_PROVIDERS or live_partials_local:
+        threading.Thread(target=LocalSTTFactory.get_recognizer().load, daemon=True).start()
+    
+    # Open TTS clients and connection pools before the first reply
+    TTSBackendFactory.warmup(sorted({name for route in get_tts_router().routes.values() for name in route}))
+    
+    # Pre-render greetings and error replies into the TTS cache
+    if settings.TTS_PREFETCH_ON_START and settings.TTS_CACHE_ENABLED:
+        get_phrase_prefetcher().warm_in_background()
+    
+    # Handlers are async with bounded per-stage concurrency, so let the
+    # queue run many turns at once instead of one per event
+    iface.queue(default_concurrency_limit=settings.GRADIO_CONCURRENCY_LIMIT)
+    
     # iface.launch(share=True)
     demo = iface.launch(
         share=True,
@@ -5,7 +5,10 @@ from datetime import datetime
 from werkzeug.utils import secure_filename
 import mimetypes
 from src.agenticRAG.components.document_parsing import DocumentChunker
-from src.agenticRAG.components.vectorstore import VectorStoreManager
+from src.agenticRAG.components.embeddings import EmbeddingFactory
+from src.agenticRAG.components.vectorstore import get_vectorstore_manager, upload_source
+from src.agenticRAG.main import is_ready, warmup_in_background
+from src.config.settings import settings
 
 app = Flask(__name__, template_folder='.')
 
@@ -99,6 +102,11 @@ def get_knowledge_base():
 def index():
     return render_template('knowledgebase_UI.html')
 
+@app.route('/health')
+def health():
+    """Liveness and RAG readiness check"""
+    return jsonify({'status': 'ok', 'rag_ready': is_ready(), 'embedding_cache': EmbeddingFactory.cache_stats()})
+
 @app.route('/api/statistics')
 def get_statistics():
     """API endpoint to get knowledge base statistics"""
@@ -149,9 +157,8 @@ def upload_files():
                 chunks = chunker.process_file(filepath)
                 print(f"Chunks created: {len(chunks)} for {filename}")
 
-                # Add to vector store
-                vector_store_manager = VectorStoreManager()
-                vector_store_manager.load_vectorstore()
+                # Add to the shared vector store (loaded once per process)
+                vector_store_manager = get_vectorstore_manager()
                 
                 # Create metadata for each chunk - THIS IS THE FIX
                 chunk_metadatas = []
@@ -167,7 +174,8 @@ def upload_files():
                 
                 # Now texts and metadatas have the same length
                 vector_store_manager.add_documents(chunks, metadatas=chunk_metadatas)
-                vector_store_manager.save_vectorstore()
+                # Append-only write; compaction into the snapshot runs in the background
+                vector_store_manager.save_incremental()
 
                 # Create metadata entry for the file
                 doc_metadata = {
@@ -214,10 +222,16 @@ def delete_document(doc_id):
         if os.path.exists(filepath):
             os.remove(filepath)
         
+        # Drop its chunks from the vector store (hidden at once, purged on compaction)
+        deleted_chunks = get_vectorstore_manager().delete_by_source(upload_source(doc_to_delete['filename']))
+        
         # Save updated metadata
         save_metadata(metadata)
         
-        return jsonify({'message': f'Successfully deleted {doc_to_delete["filename"]}'})
+        return jsonify({
+            'message': f'Successfully deleted {doc_to_delete["filename"]}',
+            'deleted_chunks': deleted_chunks
+        })
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -234,6 +248,9 @@ def clear_knowledge_base():
             if os.path.exists(filepath):
                 os.remove(filepath)
         
+        # Drop every uploaded chunk; the batch-ingested corpus stays
+        get_vectorstore_manager().delete_uploads()
+        
         # Clear metadata
         save_metadata([])
         
@@ -306,4 +323,6 @@ def search_documents():
 if __name__ == '__main__':
     print(f"Knowledge Base files will be stored in: {os.path.abspath(UPLOAD_FOLDER)}")
     print(f"Metadata will be stored in: {os.path.abspath(METADATA_FILE)}")
+    if settings.RAG_WARMUP_ON_START:
+        warmup_in_background()
     app.run(debug=True, host='0.0.0.0', port=5001)
\ No newline at end of file
@@ -0,0 +1,30 @@
+from typing import Awaitable, Callable, Dict, Tuple
+from src.config.settings import settings
+from src.SpeechToText.sr import transcribe_audio_async
+from src.SpeechToText.hamsa import transcribe_audio_hamsa_async
+from src.SpeechToText.local_stt import transcribe_audio_local_async
+from src.SpeechToText.hedged import transcribe_audio_hedged_async
+
+# Every backend follows the (audio, language, history, session_id=None) -> (history, text) contract
+STT_BACKENDS: Dict[str, Callable[..., Awaitable[Tuple[str, str]]]] = {
+    "google": transcribe_audio_async,
+    "hamsa": transcribe_audio_hamsa_async,
+    "local": transcribe_audio_local_async,
+    "hedged": transcribe_audio_hedged_async,
+}
+
+
+def get_transcriber(backend: str = None) -> Callable[..., Awaitable[Tuple[str, str]]]:
+    """
+    Get the async transcription function for a backend
+
+    Args:
+        backend: Backend name (defaults to settings.STT_BACKEND)
+
+    Returns:
+        Async function taking (audio, language, history, session_id=None)
+    """
+    backend = backend or settings.STT_BACKEND
+    if backend not in STT_BACKENDS:
+        raise ValueError(f"Unsupported STT backend: {backend}")
+    return STT_BACKENDS[backend]
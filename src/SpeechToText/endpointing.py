@@ -0,0 +1,203 @@
+import io
+import threading
+import wave
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import List, Optional
+import numpy as np
+from src.config.settings import settings
+from src.SpeechToText.vad import NoiseProfile, frame_energies, noise_profiles
+
+
+@dataclass
+class EndpointEvent:
+    """Something the endpointer decided about the live stream"""
+    kind: str  # "partial" (utterance so far) or "end" (complete utterance)
+    samples: np.ndarray
+    sample_rate: int
+
+    def to_wav(self) -> bytes:
+        return encode_wav(self.samples, self.sample_rate)
+
+
+class Endpointer:
+    """
+    Frame-level VAD and end-of-utterance detection for one live microphone stream
+
+    Chunks of any size are split into fixed frames and classified against the
+    session's noise profile. An utterance starts on the first speech frame
+    (with a short pre-roll so the onset is not clipped) and ends once
+    hangover_ms of continuous non-speech follows it. Utterances shorter than
+    min_speech_ms of speech are discarded as clicks or breaths.
+    """
+
+    def __init__(self, profile: Optional[NoiseProfile] = None, hangover_ms: float = None,
+                 min_speech_ms: float = None, max_utterance_ms: float = None,
+                 partial_interval_ms: float = None, preroll_ms: float = None):
+        """
+        Initialize the endpointer
+
+        Args:
+            profile: Noise profile to classify against (shared with upload trimming)
+            hangover_ms: Trailing silence that ends an utterance
+            min_speech_ms: Minimum speech for an utterance to count
+            max_utterance_ms: Utterances are force-ended at this length
+            partial_interval_ms: Emit a partial event every this much speech (0 disables)
+            preroll_ms: Audio kept from before the first speech frame
+        """
+        self.profile = profile or NoiseProfile()
+        self.hangover_ms = hangover_ms or settings.VAD_ENDPOINT_HANGOVER_MS
+        self.min_speech_ms = min_speech_ms or settings.VAD_MIN_SPEECH_MS
+        self.max_utterance_ms = max_utterance_ms or settings.VAD_MAX_UTTERANCE_MS
+        self.partial_interval_ms = (
+            settings.VAD_PARTIAL_INTERVAL_MS if partial_interval_ms is None else partial_interval_ms
+        )
+        self.preroll_ms = settings.VAD_PADDING_MS if preroll_ms is None else preroll_ms
+        self.frame_ms = settings.VAD_FRAME_MS
+        self.partial_text = ""
+        self.sample_rate = None
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self.reset()
+
+    @property
+    def speaking(self) -> bool:
+        return self._speaking
+
+    def reset(self):
+        """Drop any utterance in progress"""
+        self._speaking = False
+        self._frames: List[np.ndarray] = []
+        self._preroll = deque(maxlen=max(1, int(self.preroll_ms / self.frame_ms)))
+        self._speech_ms = 0.0
+        self._silence_ms = 0.0
+        self._last_partial_ms = 0.0
+
+    def feed(self, samples: np.ndarray, sample_rate: int) -> List[EndpointEvent]:
+        """
+        Process one chunk of microphone audio
+
+        Args:
+            samples: Mono float32 samples in [-1, 1]
+            sample_rate: Sample rate in Hz
+
+        Returns:
+            List of events triggered by this chunk (usually empty)
+        """
+        if self.sample_rate != sample_rate:
+            # New stream or device change: start over
+            self.sample_rate = sample_rate
+            self._remainder = np.zeros(0, dtype=np.float32)
+            self.reset()
+
+        frame_len = max(1, int(sample_rate * self.frame_ms / 1000))
+        samples = np.concatenate([self._remainder, samples.astype(np.float32, copy=False)])
+        n_frames = len(samples) // frame_len
+        self._remainder = samples[n_frames * frame_len:]
+        if n_frames == 0:
+            return []
+
+        energies = frame_energies(samples[:n_frames * frame_len], sample_rate, self.frame_ms)
+        if not self.profile.calibrated:
+            self.profile.calibrate(energies, int(settings.VAD_CALIBRATION_MS / self.frame_ms))
+        threshold = self.profile.threshold()
+        is_speech = energies > threshold
+
+        # Track the noise floor from frames heard while nobody is talking
+        if not self._speaking:
+            self.profile.update(energies, is_speech)
+
+        events = []
+        for i in range(n_frames):
+            frame = samples[i * frame_len:(i + 1) * frame_len]
+            event = self._step(frame, bool(is_speech[i]))
+            if event is not None:
+                events.append(event)
+        return events
+
+    def _step(self, frame: np.ndarray, is_speech: bool) -> Optional[EndpointEvent]:
+        if not self._speaking:
+            if not is_speech:
+                self._preroll.append(frame)
+                return None
+            self._speaking = True
+            self._frames = list(self._preroll)
+            self._preroll.clear()
+
+        self._frames.append(frame)
+        if is_speech:
+            self._speech_ms += self.frame_ms
+            self._silence_ms = 0.0
+        else:
+            self._silence_ms += self.frame_ms
+
+        if self._silence_ms >= self.hangover_ms:
+            return self._end()
+        if len(self._frames) * self.frame_ms >= self.max_utterance_ms:
+            return self._end()
+        if self.partial_interval_ms and self._speech_ms - self._last_partial_ms >= self.partial_interval_ms:
+            self._last_partial_ms = self._speech_ms
+            return EndpointEvent("partial", np.concatenate(self._frames), self.sample_rate)
+        return None
+
+    def _end(self) -> Optional[EndpointEvent]:
+        frames, speech_ms, silence_ms = self._frames, self._speech_ms, self._silence_ms
+        self.reset()
+        if speech_ms < self.min_speech_ms:
+            return None
+
+        # Keep only preroll_ms of the trailing silence
+        trailing = int(max(0.0, silence_ms - self.preroll_ms) / self.frame_ms)
+        if trailing:
+            frames = frames[:-trailing]
+        return EndpointEvent("end", np.concatenate(frames), self.sample_rate)
+
+
+class EndpointerCache:
+    """Per-session endpointers with LRU eviction"""
+
+    def __init__(self, max_sessions: int = None):
+        self.max_sessions = max_sessions or settings.THERAPIST_MAX_SESSIONS
+        self._endpointers: "OrderedDict[str, Endpointer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Endpointer:
+        """Get or create the session's endpointer"""
+        with self._lock:
+            endpointer = self._endpointers.get(session_id)
+            if endpointer is None:
+                endpointer = Endpointer(profile=noise_profiles.get(session_id))
+                self._endpointers[session_id] = endpointer
+                while len(self._endpointers) > self.max_sessions:
+                    self._endpointers.popitem(last=False)
+            else:
+                self._endpointers.move_to_end(session_id)
+            return endpointer
+
+    def remove(self, session_id: str):
+        with self._lock:
+            self._endpointers.pop(session_id, None)
+
+
+def chunk_to_samples(data: np.ndarray) -> np.ndarray:
+    """Convert a Gradio numpy audio chunk (int16 or float, mono or multi-channel) to mono float32"""
+    if np.issubdtype(data.dtype, np.integer):
+        data = data.astype(np.float32) / float(np.iinfo(data.dtype).max + 1)
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    return data.astype(np.float32, copy=False)
+
+
+def encode_wav(samples: np.ndarray, sample_rate: int) -> bytes:
+    """Encode mono float32 samples as 16-bit PCM WAV bytes"""
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(pcm.tobytes())
+    return buffer.getvalue()
+
+
+# Process-wide per-session endpointers for the live microphone
+endpointers = EndpointerCache()
@@ -1,13 +1,249 @@
+import asyncio
 import requests
 import base64
-from datetime import datetime
+import io
+import threading
+import time
 import json
+from typing import Dict, Iterator, Optional, Tuple
+import numpy as np
 from dotenv import load_dotenv
+from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import os
+from src.config.settings import settings
+from src.SpeechToText.vad import noise_profiles, trim_silence
+from src.pipeline.history import record_transcription
 load_dotenv()
 
 
-def transcribe_audio_hamsa(audio, language, history):
+# Language codes for Hamsa API
+LANGUAGE_CODES = {
+    "English": "en",
+    "Arabic": "ar",
+    "Arabic (Egypt)": "ar",
+    "Arabic (UAE)": "ar",
+    "Arabic (Lebanon)": "ar",
+    "Arabic (Saudi Arabia)": "ar",
+    "Arabic (Kuwait)": "ar",
+    "Arabic (Qatar)": "ar",
+    "Arabic (Jordan)": "ar",
+    "Auto-detect": "auto"  # You may need to check if Hamsa supports auto-detection
+}
+
+HAMSA_STT_URL = "https://api.tryhamsa.com/v1/realtime/stt"
+
+# Speech models work at 16 kHz mono; anything more is wasted upload
+UPLOAD_SAMPLE_RATE = 16000
+
+
+def read_audio_bytes(audio):
+    """Read audio from a file path, or pass raw bytes through"""
+    if isinstance(audio, str):  # If audio is a file path
+        with open(audio, 'rb') as audio_file:
+            return audio_file.read()
+    return audio  # If audio is already bytes
+
+
+def encode_for_upload(audio_bytes, session_id=None, trim=True) -> Tuple[bytes, str]:
+    """
+    Downsample a clip to 16 kHz mono, trim silence and re-encode it compactly
+    
+    Args:
+        audio_bytes: Encoded audio file contents (any format pydub/ffmpeg can read)
+        session_id: Session whose noise profile is used for trimming
+        trim: Whether to cut leading/trailing silence
+    
+    Returns:
+        tuple: (encoded bytes, codec name). Falls back to 16-bit WAV when the
+        configured codec is unavailable, and to the original bytes when the
+        clip cannot be decoded at all.
+    """
+    try:
+        from pydub import AudioSegment
+        segment = AudioSegment.from_file(io.BytesIO(audio_bytes))
+    except Exception as e:
+        logger.warning(f"Could not decode audio for re-encoding, uploading as-is: {e}")
+        return audio_bytes, "original"
+    
+    segment = segment.set_frame_rate(UPLOAD_SAMPLE_RATE).set_channels(1).set_sample_width(2)
+    
+    if trim:
+        samples = np.array(segment.get_array_of_samples(), dtype=np.float32) / 32768.0
+        trimmed, _ = trim_silence(samples, UPLOAD_SAMPLE_RATE, noise_profiles.get(session_id))
+        if len(trimmed) < len(samples):
+            pcm = (np.clip(trimmed, -1.0, 1.0) * 32767).astype(np.int16)
+            segment = segment._spawn(pcm.tobytes())
+    
+    codec = settings.HAMSA_AUDIO_CODEC
+    if codec == "opus":
+        try:
+            buffer = io.BytesIO()
+            segment.export(buffer, format="ogg", codec="libopus", bitrate=settings.HAMSA_AUDIO_BITRATE)
+            return buffer.getvalue(), "opus"
+        except Exception as e:
+            logger.warning(f"Opus encoding unavailable (is ffmpeg installed?), using WAV: {e}")
+    
+    buffer = io.BytesIO()
+    segment.export(buffer, format="wav")
+    return buffer.getvalue(), "wav"
+
+
+class JsonUploadBody:
+    """
+    Request body that streams the Hamsa JSON payload
+    
+    The audio is base64-encoded chunk by chunk while it is sent, so the
+    encoded copy is never built in memory. Iterating again restarts the
+    body, which lets urllib3 retry the request; the exact length is known
+    up front so the request carries a Content-Length.
+    """
+    
+    CHUNK_SIZE = 48 * 1024  # Multiple of 3, so chunks encode without padding
+    
+    def __init__(self, audio_bytes: bytes, fields: Dict):
+        self.audio_bytes = audio_bytes
+        head = json.dumps(fields)[:-1]  # Reopen the object to append the audio field
+        self._head = (head + (', ' if fields else '') + '"audioBase64": "').encode("utf-8")
+        self._tail = b'"}'
+    
+    def __len__(self):
+        encoded = 4 * ((len(self.audio_bytes) + 2) // 3)
+        return len(self._head) + encoded + len(self._tail)
+    
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._head
+        view = memoryview(self.audio_bytes)
+        for start in range(0, len(view), self.CHUNK_SIZE):
+            yield base64.b64encode(view[start:start + self.CHUNK_SIZE])
+        yield self._tail
+
+
+class HamsaTransportStats:
+    """Upload size and time counters for the Hamsa client"""
+    
+    def __init__(self):
+        self.requests = 0
+        self.input_bytes = 0
+        self.upload_bytes = 0
+        self.upload_seconds = 0.0
+        self._lock = threading.Lock()
+    
+    def record(self, input_bytes: int, upload_bytes: int, seconds: float):
+        with self._lock:
+            self.requests += 1
+            self.input_bytes += input_bytes
+            self.upload_bytes += upload_bytes
+            self.upload_seconds += seconds
+    
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "input_bytes": self.input_bytes,
+                "upload_bytes": self.upload_bytes,
+                "compression_ratio": self.input_bytes / self.upload_bytes if self.upload_bytes else None,
+                "avg_request_seconds": self.upload_seconds / self.requests if self.requests else None,
+            }
+
+
+transport_stats = HamsaTransportStats()
+
+# Shared HTTP session, see get_hamsa_session()
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+def get_hamsa_session() -> requests.Session:
+    """
+    Get the process-wide Hamsa HTTP session
+    
+    Keep-alive connections are pooled across requests. Only failures to
+    connect are retried: once the request may have reached Hamsa, a read
+    timeout or 5xx could mean the clip was already transcribed (and billed).
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(
+                    total=settings.HAMSA_RETRIES,
+                    connect=settings.HAMSA_RETRIES,
+                    read=0,
+                    status=0,
+                    other=0,
+                    backoff_factor=0.3,
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=settings.HAMSA_MAX_CONNECTIONS,
+                    max_retries=retry,
+                )
+                session = requests.Session()
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def request_hamsa_transcription(audio_bytes, language_code, session_id=None, trim=True):
+    """
+    Send one clip to the Hamsa STT API
+    
+    Args:
+        audio_bytes: Encoded audio file contents
+        language_code: Hamsa language code ("ar", "en" or "auto")
+        session_id: Session whose noise profile is used for trimming
+        trim: Whether to cut leading/trailing silence before upload
+    
+    Returns:
+        str: Transcribed text
+    
+    Raises:
+        requests.exceptions.RequestException: The API request failed
+        json.JSONDecodeError: The response was not valid JSON
+    """
+    api_key = os.getenv("HAMS_API_KEY")
+    if not api_key:
+        raise ValueError("HAMS_API_KEY not set in environment variables")
+    
+    upload_audio, codec = encode_for_upload(audio_bytes, session_id, trim)
+    
+    # Prepare API request; the audio is base64-encoded while streaming
+    body = JsonUploadBody(upload_audio, {
+        "audioList": [],  # Empty for single audio file
+        "language": language_code,
+        "isEosEnabled": settings.HAMSA_EOS_ENABLED,
+        "eosThreshold": settings.HAMSA_EOS_THRESHOLD
+    })
+    
+    headers = {
+        "Authorization": api_key,
+        "Content-Type": "application/json"
+    }
+    
+    # Make API request
+    start = time.monotonic()
+    response = get_hamsa_session().post(
+        HAMSA_STT_URL,
+        data=body,
+        headers=headers,
+        timeout=(5, settings.STT_TIMEOUT_SECONDS)
+    )
+    elapsed = time.monotonic() - start
+    transport_stats.record(len(audio_bytes), len(body), elapsed)
+    logger.info(
+        f"Hamsa upload: {len(audio_bytes)} -> {len(body)} bytes ({codec}), "
+        f"request took {elapsed:.2f}s"
+    )
+    response.raise_for_status()  # Raise an exception for bad status codes
+    
+    # Parse response
+    result = response.json()
+    return result.get("text", "")
+
+
+def transcribe_audio_hamsa(audio, language, history, session_id=None):
     """
     Transcribe audio using Hamsa API
     
@@ -27,56 +263,13 @@ def transcribe_audio_hamsa(audio, language, history):
     if audio is None:
         return history, ""
     
-    # Language codes for Hamsa API
-    language_codes = {
-        "English": "en",
-        "Arabic": "ar",
-        "Arabic (Egypt)": "ar",
-        "Arabic (UAE)": "ar",
-        "Arabic (Lebanon)": "ar",
-        "Arabic (Saudi Arabia)": "ar",
-        "Arabic (Kuwait)": "ar",
-        "Arabic (Qatar)": "ar",
-        "Arabic (Jordan)": "ar",
-        "Auto-detect": "auto"  # You may need to check if Hamsa supports auto-detection
-    }
-    
     try:
-        # Convert audio file to base64
-        if isinstance(audio, str):  # If audio is a file path
-            with open(audio, 'rb') as audio_file:
-                audio_bytes = audio_file.read()
-        else:  # If audio is already bytes
-            audio_bytes = audio
-        
-        # Encode audio to base64
-        audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+        audio_bytes = read_audio_bytes(audio)
         
         # Get selected language code
-        selected_language = language_codes.get(language, "ar")
+        selected_language = LANGUAGE_CODES.get(language, "ar")
         
-        # Prepare API request
-        url = "https://api.tryhamsa.com/v1/realtime/stt"
-        payload = {
-            "audioList": [],  # Empty for single audio file
-            "audioBase64": audio_base64,
-            "language": selected_language,
-            "isEosEnabled": False,
-            "eosThreshold": 0.3
-        }
-        
-        headers = {
-            "Authorization": api_key,
-            "Content-Type": "application/json"
-        }
-        
-        # Make API request
-        response = requests.post(url, json=payload, headers=headers)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        
-        # Parse response
-        result = response.json()
-        text = result.get("text", "")
+        text = request_hamsa_transcription(audio_bytes, selected_language, session_id)
         
         # Handle auto-detection result formatting
         if language == "Auto-detect" and text:
@@ -84,52 +277,23 @@ def transcribe_audio_hamsa(audio, language, history):
             text = f"[Auto-detected] {text}"
         
         # Add timestamp and transcription to history
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_entry = f"[{timestamp}] [{language}] {text}"
-        
-        # Update history
-        if history:
-            updated_history = history + "\n" + new_entry
-        else:
-            updated_history = new_entry
-            
-        return updated_history, text
+        return record_transcription(history, language, text), text
         
     except requests.exceptions.RequestException as e:
         error_msg = f"API request failed: {e}"
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_entry = f"[{timestamp}] [{language}] ERROR: {error_msg}"
-        
-        if history:
-            updated_history = history + "\n" + new_entry
-        else:
-            updated_history = new_entry
-            
-        return updated_history, error_msg
+        return record_transcription(history, language, error_msg, error=True), error_msg
         
     except json.JSONDecodeError as e:
         error_msg = f"Failed to parse API response: {e}"
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_entry = f"[{timestamp}] [{language}] ERROR: {error_msg}"
-        
-        if history:
-            updated_history = history + "\n" + new_entry
-        else:
-            updated_history = new_entry
-            
-        return updated_history, error_msg
+        return record_transcription(history, language, error_msg, error=True), error_msg
         
     except Exception as e:
         error_msg = f"Unexpected error: {e}"
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_entry = f"[{timestamp}] [{language}] ERROR: {error_msg}"
-        
-        if history:
-            updated_history = history + "\n" + new_entry
-        else:
-            updated_history = new_entry
-            
-        return updated_history, error_msg
+        return record_transcription(history, language, error_msg, error=True), error_msg
+
+async def transcribe_audio_hamsa_async(audio, language, history, session_id=None):
+    """Async variant of transcribe_audio_hamsa; the blocking call runs in a worker thread"""
+    return await asyncio.to_thread(transcribe_audio_hamsa, audio, language, history, session_id)
 
 def clear_history():
     """Clear the transcription history"""
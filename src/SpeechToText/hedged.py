@@ -0,0 +1,223 @@
+import asyncio
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional, Tuple
+from loguru import logger
+from src.config.settings import settings
+from src.SpeechToText import sr as google_stt
+from src.SpeechToText import hamsa as hamsa_stt
+from src.SpeechToText import local_stt
+from src.SpeechToText.language_id import LanguageDecision, choose_recognizer_language, identify_audio_language
+from src.pipeline.history import record_transcription
+
+
+@dataclass
+class TranscriptionCandidate:
+    """One provider's answer for a clip"""
+    provider: str
+    language: str
+    text: str
+    confidence: Optional[float]
+    latency: float
+    language_decision: Optional[LanguageDecision] = None
+
+
+@dataclass
+class SttProvider:
+    """A recognizer hypothesis to race: provider plus the language it assumes"""
+    name: str
+    language: str
+    recognize: Callable[[], Tuple[str, Optional[float]]]
+
+
+class HedgedTranscriber:
+    """
+    Race several STT providers on the same clip
+
+    All providers (and, in auto-detect mode, one Google call per language
+    hypothesis) start at once. The first result at or above
+    accept_confidence wins immediately; otherwise the most confident result
+    available at the deadline wins. Remaining calls are cancelled, which
+    abandons their worker threads rather than interrupting them.
+    """
+
+    def __init__(self, deadline: float = None, accept_confidence: float = None,
+                 default_confidence: float = None, providers: List[str] = None):
+        """
+        Initialize the transcriber
+
+        Args:
+            deadline: Seconds to wait for a confident result before settling
+            accept_confidence: Confidence at which a result is taken immediately
+            default_confidence: Score for providers that report no confidence
+            providers: Provider names to race ("google", "hamsa", "local")
+        """
+        self.provider_names = providers or [name.strip() for name in settings.STT_HEDGE_PROVIDERS.split(",")]
+        self.deadline = deadline or settings.STT_HEDGE_DEADLINE_SECONDS
+        self.accept_confidence = accept_confidence or settings.STT_HEDGE_ACCEPT_CONFIDENCE
+        self.default_confidence = default_confidence or settings.STT_HEDGE_DEFAULT_CONFIDENCE
+
+    def providers_for(self, audio, language: str, audio_data=None,
+                      decision: Optional[LanguageDecision] = None, session_id=None) -> List[SttProvider]:
+        """
+        Build the provider hypotheses for a clip and a dropdown language
+
+        In auto-detect mode a confident language ID decision narrows Google
+        to a single hypothesis; otherwise both languages are raced.
+        """
+        google_language = google_stt.LANGUAGE_CODES.get(language, "en-US")
+        hamsa_language = hamsa_stt.LANGUAGE_CODES.get(language, "ar")
+
+        if not google_language and decision is not None:
+            primary, fallback = choose_recognizer_language(decision)
+            if fallback is None:
+                google_language = primary
+
+        # Decode once, share across the Google hypotheses
+        decode_lock = threading.Lock()
+
+        def google(language_code):
+            def recognize():
+                nonlocal audio_data
+                with decode_lock:
+                    if audio_data is None:
+                        audio_data = google_stt.load_audio_data(audio, session_id=session_id)
+                return google_stt.recognize_google_with_confidence(audio_data, language_code)
+            return recognize
+
+        def hamsa():
+            # Reuse the already-trimmed clip when it has been decoded
+            if audio_data is not None:
+                return hamsa_stt.request_hamsa_transcription(
+                    audio_data.get_wav_data(), hamsa_language, trim=False
+                ), None
+            audio_bytes = hamsa_stt.read_audio_bytes(audio)
+            return hamsa_stt.request_hamsa_transcription(audio_bytes, hamsa_language, session_id), None
+
+        def local():
+            samples, sample_rate = local_stt.load_samples(audio, session_id)
+            recognizer = local_stt.LocalSTTFactory.get_recognizer()
+            return recognizer.transcribe(samples, sample_rate, local_stt.LANGUAGE_CODES.get(language)), None
+
+        providers = []
+        if "google" in self.provider_names:
+            if google_language:
+                providers.append(SttProvider("google", google_language, google(google_language)))
+            else:
+                providers.append(SttProvider("google", "ar-SA", google("ar-SA")))
+                providers.append(SttProvider("google", "en-US", google("en-US")))
+        if "hamsa" in self.provider_names:
+            providers.append(SttProvider("hamsa", hamsa_language, hamsa))
+        if "local" in self.provider_names:
+            providers.append(SttProvider("local", local_stt.LANGUAGE_CODES.get(language) or "auto", local))
+        return providers
+
+    async def transcribe(self, audio, language: str, session_id=None) -> Optional[TranscriptionCandidate]:
+        """
+        Transcribe a clip with whichever provider answers best in time
+
+        Returns:
+            TranscriptionCandidate or None if every provider failed
+        """
+        audio_data = None
+        decision = None
+        if google_stt.LANGUAGE_CODES.get(language, "en-US") is None:
+            try:
+                audio_data = await asyncio.to_thread(google_stt.load_audio_data, audio, None, session_id)
+                decision = await asyncio.to_thread(identify_audio_language, audio_data)
+            except Exception as e:
+                # Formats speech_recognition cannot decode (mp3, ...) still reach
+                # Hamsa; with no decision both Google hypotheses are raced too
+                logger.info(f"Language ID skipped: {e!r}")
+
+        providers = self.providers_for(audio, language, audio_data, decision, session_id)
+        candidate = await self.race(providers)
+        if candidate is not None:
+            candidate.language_decision = decision
+        return candidate
+
+    async def race(self, providers: List[SttProvider]) -> Optional[TranscriptionCandidate]:
+        """Run providers concurrently and pick a winner"""
+        start = time.monotonic()
+        tasks = {
+            asyncio.ensure_future(asyncio.to_thread(provider.recognize)): provider
+            for provider in providers
+        }
+        candidates: List[TranscriptionCandidate] = []
+
+        try:
+            pending = set(tasks)
+            while pending:
+                remaining = self.deadline - (time.monotonic() - start)
+                if remaining <= 0 and candidates:
+                    break
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=remaining if remaining > 0 else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    continue
+
+                for task in done:
+                    provider = tasks[task]
+                    try:
+                        text, confidence = task.result()
+                    except Exception as e:
+                        logger.info(f"STT {provider.name} [{provider.language}] failed: {e!r}")
+                        continue
+                    if not text or not text.strip():
+                        continue
+                    candidate = TranscriptionCandidate(
+                        provider=provider.name,
+                        language=provider.language,
+                        text=text,
+                        confidence=confidence,
+                        latency=time.monotonic() - start,
+                    )
+                    candidates.append(candidate)
+                    if self._score(candidate) >= self.accept_confidence:
+                        return candidate
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if not candidates:
+            return None
+        return max(candidates, key=self._score)
+
+    def _score(self, candidate: TranscriptionCandidate) -> float:
+        if candidate.confidence is None:
+            return self.default_confidence
+        return candidate.confidence
+
+
+def _language_label(language_code: str) -> str:
+    return "English" if language_code.startswith("en") else "Arabic"
+
+
+async def transcribe_audio_hedged_async(audio, language, history, session_id=None,
+                                        transcriber: HedgedTranscriber = None):
+    """
+    Hedged drop-in for transcribe_audio: (audio, language, history) -> (history, text)
+    """
+    if audio is None:
+        return history, ""
+
+    transcriber = transcriber or HedgedTranscriber()
+    candidate = await transcriber.transcribe(audio, language, session_id)
+
+    if candidate is None:
+        text = "Could not understand audio"
+        return record_transcription(history, language, text, error=True), text
+
+    text = candidate.text
+    if language == "Auto-detect":
+        text = f"[{_language_label(candidate.language)}] {text}"
+    logger.info(
+        f"STT winner: {candidate.provider} [{candidate.language}] "
+        f"confidence={candidate.confidence} latency={candidate.latency:.2f}s"
+    )
+    lid_note = f" [{candidate.language_decision.describe()}]" if candidate.language_decision else ""
+    return record_transcription(history, language, text, note=lid_note), text
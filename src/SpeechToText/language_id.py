@@ -0,0 +1,325 @@
+import argparse
+import json
+import os
+import threading
+import wave
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+from src.config.settings import settings
+
+# Recognizer language used for each identified language
+RECOGNIZER_LANGUAGES = {
+    "ar": "ar-SA",
+    "en": "en-US",
+}
+
+
+@dataclass
+class LanguageDecision:
+    """Outcome of spoken language identification for one clip"""
+    language: Optional[str]
+    confidence: float
+    method: str
+    scores: Dict[str, float] = field(default_factory=dict)
+
+    def describe(self) -> str:
+        """Short form for transcription history entries"""
+        return f"LID {self.language or '?'} {self.confidence:.2f} {self.method}"
+
+
+class LanguageIdentifier:
+    """Base class for spoken language identification stages"""
+
+    name = "none"
+
+    def identify(self, samples: np.ndarray, sample_rate: int) -> LanguageDecision:
+        """
+        Identify the spoken language of a clip
+
+        Args:
+            samples: Mono float32 samples in [-1, 1]
+            sample_rate: Sample rate in Hz
+
+        Returns:
+            LanguageDecision: language None means "no opinion"
+        """
+        return LanguageDecision(language=None, confidence=0.0, method=self.name)
+
+
+class SpectralProfileLID(LanguageIdentifier):
+    """
+    NumPy baseline: diagonal-Gaussian classifier over log band energies
+
+    Each clip is summarised by the mean and standard deviation of its
+    log-mel-style band energies and their frame-to-frame deltas, taken over
+    voiced frames only. Per-language profiles are fitted offline with fit()
+    from labelled clips and stored as JSON. Without a profile the stage
+    abstains.
+    """
+
+    name = "spectral"
+
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, List[float]]]] = None,
+                 n_bands: int = 24, frame_ms: float = 25.0, hop_ms: float = 10.0):
+        """
+        Initialize the identifier
+
+        Args:
+            profiles: language -> {"mean": [...], "var": [...]} feature statistics
+            n_bands: Number of log-spaced frequency bands
+            frame_ms: Analysis frame length in milliseconds
+            hop_ms: Hop between frames in milliseconds
+        """
+        self.n_bands = n_bands
+        self.frame_ms = frame_ms
+        self.hop_ms = hop_ms
+        self.profiles = {
+            language: (np.asarray(stats["mean"], dtype=np.float64), np.asarray(stats["var"], dtype=np.float64))
+            for language, stats in (profiles or {}).items()
+        }
+
+    @classmethod
+    def load(cls, path: str) -> "SpectralProfileLID":
+        """Load profiles saved with save()"""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(profiles=data["profiles"], **data.get("config", {}))
+
+    def save(self, path: str):
+        """Save fitted profiles as JSON"""
+        data = {
+            "config": {"n_bands": self.n_bands, "frame_ms": self.frame_ms, "hop_ms": self.hop_ms},
+            "profiles": {
+                language: {"mean": mean.tolist(), "var": var.tolist()}
+                for language, (mean, var) in self.profiles.items()
+            },
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def fit(self, clips: Iterable[Tuple[np.ndarray, int, str]]) -> "SpectralProfileLID":
+        """
+        Fit per-language profiles
+
+        Args:
+            clips: (samples, sample_rate, language) triples, e.g. from load_labelled_clips()
+
+        Returns:
+            self
+        """
+        features: Dict[str, List[np.ndarray]] = {}
+        for samples, sample_rate, language in clips:
+            vector = self.features(samples, sample_rate)
+            if vector is not None:
+                features.setdefault(language, []).append(vector)
+
+        self.profiles = {}
+        for language, vectors in features.items():
+            matrix = np.stack(vectors)
+            # Variance floor keeps rarely-varying dimensions from dominating
+            self.profiles[language] = (matrix.mean(axis=0), matrix.var(axis=0) + 1e-3)
+        return self
+
+    def features(self, samples: np.ndarray, sample_rate: int) -> Optional[np.ndarray]:
+        """Clip-level feature vector, or None if the clip has no voiced frames"""
+        frame_len = int(sample_rate * self.frame_ms / 1000)
+        hop = int(sample_rate * self.hop_ms / 1000)
+        if len(samples) < frame_len:
+            return None
+
+        n_frames = 1 + (len(samples) - frame_len) // hop
+        frames = np.lib.stride_tricks.sliding_window_view(samples, frame_len)[::hop][:n_frames]
+        frames = frames * np.hanning(frame_len)
+        power = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+
+        # Pool FFT bins into log-spaced bands between 100 Hz and 4 kHz
+        freqs = np.fft.rfftfreq(frame_len, 1.0 / sample_rate)
+        edges = np.geomspace(100.0, min(4000.0, sample_rate / 2), self.n_bands + 1)
+        band_index = np.digitize(freqs, edges) - 1
+        valid = (band_index >= 0) & (band_index < self.n_bands)
+        bands = np.zeros((n_frames, self.n_bands))
+        np.add.at(bands.T, band_index[valid], power[:, valid].T)
+        log_bands = np.log(bands + 1e-10)
+
+        # Keep voiced frames: total energy above the clip median
+        energy = log_bands.sum(axis=1)
+        voiced = log_bands[energy > np.median(energy)]
+        if len(voiced) < 3:
+            return None
+
+        # Per-clip mean normalisation removes channel/microphone colouring
+        voiced = voiced - voiced.mean(axis=0)
+        deltas = np.diff(voiced, axis=0)
+        return np.concatenate([voiced.std(axis=0), np.abs(deltas).mean(axis=0), deltas.std(axis=0)])
+
+    def identify(self, samples: np.ndarray, sample_rate: int) -> LanguageDecision:
+        if not self.profiles:
+            return LanguageDecision(language=None, confidence=0.0, method=self.name)
+
+        vector = self.features(samples, sample_rate)
+        if vector is None:
+            return LanguageDecision(language=None, confidence=0.0, method=self.name)
+
+        log_likelihoods = {
+            language: float(-0.5 * np.sum((vector - mean) ** 2 / var + np.log(var)))
+            for language, (mean, var) in self.profiles.items()
+        }
+        values = np.array(list(log_likelihoods.values()))
+        probabilities = np.exp(values - values.max())
+        probabilities /= probabilities.sum()
+        scores = dict(zip(log_likelihoods, probabilities.tolist()))
+
+        language = max(scores, key=scores.get)
+        return LanguageDecision(language=language, confidence=scores[language], method=self.name, scores=scores)
+
+
+class LanguageIdentifierFactory:
+    """Factory for spoken language identification stages"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_identifier(cls) -> LanguageIdentifier:
+        """Get or create the configured identifier (singleton pattern)"""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = cls.create_identifier(settings.STT_LID_BACKEND)
+        return cls._instance
+
+    @classmethod
+    def create_identifier(cls, backend: str) -> LanguageIdentifier:
+        """Create an identifier for a backend name"""
+        if backend == "spectral":
+            path = settings.STT_LID_PROFILE_PATH
+            if os.path.exists(path):
+                return SpectralProfileLID.load(path)
+            logger.warning(
+                f"No language ID profile at {path}; spectral LID will abstain "
+                f"(fit one with: python -m src.SpeechToText.language_id fit <clips dir>)"
+            )
+            return SpectralProfileLID()
+        elif backend == "none":
+            return LanguageIdentifier()
+        else:
+            raise ValueError(f"Unsupported language ID backend: {backend}")
+
+    @classmethod
+    def reset_instances(cls):
+        """Reset singleton instance (useful for testing)"""
+        cls._instance = None
+
+
+def audio_data_to_samples(audio_data) -> Tuple[np.ndarray, int]:
+    """Convert speech_recognition AudioData to mono float32 samples"""
+    raw = audio_data.get_raw_data(convert_width=2)
+    samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    return samples, audio_data.sample_rate
+
+
+def identify_audio_language(audio_data, identifier: Optional[LanguageIdentifier] = None) -> LanguageDecision:
+    """Run the configured language ID stage on speech_recognition AudioData"""
+    identifier = identifier or LanguageIdentifierFactory.get_identifier()
+    samples, sample_rate = audio_data_to_samples(audio_data)
+    return identifier.identify(samples, sample_rate)
+
+
+def choose_recognizer_language(decision: LanguageDecision, threshold: float = None) -> Tuple[str, Optional[str]]:
+    """
+    Pick the recognizer language for a clip
+
+    Returns:
+        tuple: (primary language code, fallback code or None). A fallback is
+        only offered when the decision is below the confidence threshold.
+    """
+    threshold = settings.STT_LID_THRESHOLD if threshold is None else threshold
+    if decision.language in RECOGNIZER_LANGUAGES and decision.confidence >= threshold:
+        return RECOGNIZER_LANGUAGES[decision.language], None
+
+    primary = settings.STT_DEFAULT_LANGUAGE
+    fallback = next(code for code in RECOGNIZER_LANGUAGES.values() if code != primary)
+    return primary, fallback
+
+
+def read_wav_samples(path: str) -> Tuple[np.ndarray, int]:
+    """Read a PCM WAV file as mono float32 samples"""
+    with wave.open(path, "rb") as wav:
+        sample_width = wav.getsampwidth()
+        channels = wav.getnchannels()
+        sample_rate = wav.getframerate()
+        raw = wav.readframes(wav.getnframes())
+    if sample_width == 1:
+        samples = (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    elif sample_width == 2:
+        samples = np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+    elif sample_width == 4:
+        samples = np.frombuffer(raw, dtype=np.int32).astype(np.float32) / 2147483648.0
+    else:
+        raise ValueError(f"Unsupported WAV sample width: {sample_width} bytes")
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, sample_rate
+
+
+def load_labelled_clips(directory: str) -> Iterable[Tuple[np.ndarray, int, str]]:
+    """
+    Labelled clips for SpectralProfileLID.fit from a directory tree
+
+    Expects one sub-directory per language code (RECOGNIZER_LANGUAGES keys),
+    e.g. clips/ar/*.wav and clips/en/*.wav.
+    """
+    for language in sorted(os.listdir(directory)):
+        language_dir = os.path.join(directory, language)
+        if not os.path.isdir(language_dir):
+            continue
+        if language not in RECOGNIZER_LANGUAGES:
+            logger.warning(f"Skipping {language_dir}: not one of {sorted(RECOGNIZER_LANGUAGES)}")
+            continue
+        for name in sorted(os.listdir(language_dir)):
+            if not name.lower().endswith(".wav"):
+                continue
+            try:
+                samples, sample_rate = read_wav_samples(os.path.join(language_dir, name))
+            except (OSError, ValueError, wave.Error) as e:
+                logger.warning(f"Skipping {name}: {e}")
+                continue
+            yield samples, sample_rate, language
+
+
+def main():
+    """CLI: fit the spectral language ID profiles from labelled clips"""
+    parser = argparse.ArgumentParser(description="Spoken language identification profiles for STT auto-detect")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    fit = subparsers.add_parser("fit", help="Fit SpectralProfileLID profiles from <clips>/<language>/*.wav")
+    fit.add_argument("clips", help="Directory with one sub-directory of WAV clips per language (ar, en)")
+    fit.add_argument("--out", default=None, help="Profile path (default STT_LID_PROFILE_PATH)")
+
+    identify = subparsers.add_parser("identify", help="Identify the language of WAV clips with a saved profile")
+    identify.add_argument("files", nargs="+")
+    identify.add_argument("--profile", default=None, help="Profile path (default STT_LID_PROFILE_PATH)")
+    args = parser.parse_args()
+
+    if args.command == "fit":
+        clips = list(load_labelled_clips(args.clips))
+        if len({language for _, _, language in clips}) < 2:
+            parser.error("Need WAV clips for at least two languages")
+        identifier = SpectralProfileLID().fit(clips)
+        decisions = [identifier.identify(samples, sample_rate) for samples, sample_rate, _ in clips]
+        correct = sum(decision.language == language for decision, (_, _, language) in zip(decisions, clips))
+        out = args.out or settings.STT_LID_PROFILE_PATH
+        identifier.save(out)
+        print(f"Fitted {sorted(identifier.profiles)} from {len(clips)} clips "
+              f"(training accuracy {correct / len(clips):.2%}); saved to {out}")
+    else:
+        identifier = SpectralProfileLID.load(args.profile or settings.STT_LID_PROFILE_PATH)
+        for path in args.files:
+            samples, sample_rate = read_wav_samples(path)
+            print(f"{path}: {identifier.identify(samples, sample_rate).describe()}")
+
+
+if __name__ == "__main__":
+    main()
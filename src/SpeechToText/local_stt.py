@@ -0,0 +1,210 @@
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import speech_recognition as sr
+from loguru import logger
+from src.config.settings import settings
+from src.SpeechToText.language_id import audio_data_to_samples
+from src.SpeechToText.sr import as_audio_file
+from src.SpeechToText.vad import noise_profiles, trim_silence
+from src.pipeline.history import record_transcription
+
+# Whisper language names for the dropdown choices (None = let the model detect)
+LANGUAGE_CODES = {
+    "English": "english",
+    "Arabic": "arabic",
+    "Arabic (Egypt)": "arabic",
+    "Arabic (UAE)": "arabic",
+    "Arabic (Lebanon)": "arabic",
+    "Arabic (Saudi Arabia)": "arabic",
+    "Arabic (Kuwait)": "arabic",
+    "Arabic (Qatar)": "arabic",
+    "Arabic (Jordan)": "arabic",
+    "Auto-detect": None
+}
+
+MODEL_SAMPLE_RATE = 16000
+
+
+class _Request:
+    def __init__(self, samples: np.ndarray, language: Optional[str]):
+        self.samples = samples
+        self.language = language
+        self.future: Future = Future()
+
+
+class LocalSpeechRecognizer:
+    """
+    In-process CPU speech recognizer with cross-session micro-batching
+
+    The model is loaded once and stays resident. Requests from concurrent
+    sessions are queued; a worker thread collects up to max_batch_size of
+    them (waiting at most max_wait_ms for stragglers) and runs them through
+    the model in one forward pass per language.
+    """
+
+    def __init__(self, model_name: str = None, max_batch_size: int = None, max_wait_ms: float = None):
+        """
+        Initialize the recognizer
+
+        Args:
+            model_name: Hugging Face ASR model id (Whisper family)
+            max_batch_size: Maximum clips per forward pass
+            max_wait_ms: How long the first queued clip waits for a batch to fill
+        """
+        self.model_name = model_name or settings.LOCAL_STT_MODEL
+        self.max_batch_size = max_batch_size or settings.LOCAL_STT_MAX_BATCH_SIZE
+        self.max_wait = (max_wait_ms or settings.LOCAL_STT_MAX_WAIT_MS) / 1000.0
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._pipeline = None
+        self._load_lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="local-stt-batcher", daemon=True)
+        self._worker.start()
+
+    def load(self):
+        """Load the model (idempotent); called lazily by the worker"""
+        if self._pipeline is None:
+            with self._load_lock:
+                if self._pipeline is None:
+                    from transformers import pipeline
+                    logger.info(f"Loading local STT model: {self.model_name}")
+                    self._pipeline = pipeline(
+                        "automatic-speech-recognition",
+                        model=self.model_name,
+                        device=-1,
+                    )
+        return self._pipeline
+
+    def submit(self, samples: np.ndarray, sample_rate: int, language: Optional[str] = None) -> Future:
+        """
+        Queue a clip for recognition
+
+        Args:
+            samples: Mono float32 samples
+            sample_rate: Sample rate of samples
+            language: Whisper language name, or None to auto-detect
+
+        Returns:
+            Future resolving to the transcribed text
+        """
+        request = _Request(resample(samples, sample_rate, MODEL_SAMPLE_RATE), language)
+        self._queue.put(request)
+        return request.future
+
+    def transcribe(self, samples: np.ndarray, sample_rate: int, language: Optional[str] = None) -> str:
+        """Blocking convenience wrapper around submit()"""
+        return self.submit(samples, sample_rate, language).result()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            by_language: Dict[Optional[str], List[_Request]] = {}
+            for request in batch:
+                by_language.setdefault(request.language, []).append(request)
+            for language, requests in by_language.items():
+                self._process(language, requests)
+
+    def _process(self, language: Optional[str], requests: List[_Request]):
+        try:
+            pipe = self.load()
+            generate_kwargs = {"task": "transcribe"}
+            if language:
+                generate_kwargs["language"] = language
+            inputs = [{"raw": request.samples, "sampling_rate": MODEL_SAMPLE_RATE} for request in requests]
+            outputs = pipe(inputs, batch_size=len(inputs), generate_kwargs=generate_kwargs)
+            for request, output in zip(requests, outputs):
+                request.future.set_result(output["text"].strip())
+        except Exception as e:
+            for request in requests:
+                if not request.future.done():
+                    request.future.set_exception(e)
+
+
+def resample(samples: np.ndarray, sample_rate: int, target_rate: int) -> np.ndarray:
+    """Linear-interpolation resampling (adequate for speech recognition input)"""
+    if sample_rate == target_rate:
+        return samples.astype(np.float32, copy=False)
+    duration = len(samples) / sample_rate
+    target_length = int(round(duration * target_rate))
+    positions = np.linspace(0, len(samples) - 1, target_length)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+class LocalSTTFactory:
+    """Factory for the resident local recognizer"""
+
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_recognizer(cls) -> LocalSpeechRecognizer:
+        """Get or create the recognizer (singleton pattern)"""
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = LocalSpeechRecognizer()
+        return cls._instance
+
+    @classmethod
+    def reset_instances(cls):
+        """Reset singleton instance (useful for testing)"""
+        cls._instance = None
+
+
+def load_samples(audio, session_id=None) -> Tuple[np.ndarray, int]:
+    """Decode an audio file (path, file-like or WAV bytes) to mono float32 samples, trimmed to the speech"""
+    with sr.AudioFile(as_audio_file(audio)) as source:
+        audio_data = sr.Recognizer().record(source)
+    samples, sample_rate = audio_data_to_samples(audio_data)
+    samples, _ = trim_silence(samples, sample_rate, noise_profiles.get(session_id))
+    return samples, sample_rate
+
+
+def transcribe_audio_local(audio, language, history, session_id=None):
+    """
+    Transcribe audio with the in-process model
+
+    Args:
+        audio: Audio file path or file-like object
+        language: Selected language from dropdown
+        history: Previous transcription history
+
+    Returns:
+        tuple: (updated_history, transcribed_text)
+    """
+    if audio is None:
+        return history, ""
+
+    error = False
+    try:
+        samples, sample_rate = load_samples(audio, session_id)
+        text = LocalSTTFactory.get_recognizer().transcribe(samples, sample_rate, LANGUAGE_CODES.get(language))
+        if not text:
+            raise sr.UnknownValueError()
+    except sr.UnknownValueError:
+        text = "Could not understand audio"
+        error = True
+    except Exception as e:
+        text = f"Local recognition failed: {e}"
+        error = True
+
+    return record_transcription(history, language, text, error=error), text
+
+
+async def transcribe_audio_local_async(audio, language, history, session_id=None):
+    """Async variant of transcribe_audio_local; decoding runs in a worker thread"""
+    return await asyncio.to_thread(transcribe_audio_local, audio, language, history, session_id)
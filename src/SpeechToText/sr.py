@@ -1,84 +1,120 @@
+import asyncio
+import io
+import numpy as np
 import speech_recognition as sr
-from datetime import datetime
+from loguru import logger
+from src.SpeechToText.language_id import audio_data_to_samples, identify_audio_language, choose_recognizer_language
+from src.SpeechToText.vad import noise_profiles, trim_silence
+from src.pipeline.history import record_transcription
 
-def transcribe_audio(audio, language, history):
+# Language codes for Google Speech Recognition
+LANGUAGE_CODES = {
+    "English": "en-US",
+    "Arabic": "ar-SA",  # Saudi Arabic
+    "Arabic (Egypt)": "ar-EG",
+    "Arabic (UAE)": "ar-AE",
+    "Arabic (Lebanon)": "ar-LB",
+    "Arabic (Saudi Arabia)": "ar-SA",
+    "Arabic (Kuwait)": "ar-KW",
+    "Arabic (Qatar)": "ar-QA",
+    "Arabic (Jordan)": "ar-JO",
+    "Auto-detect": None  # Let Google auto-detect
+}
+
+def as_audio_file(audio):
+    """Wrap in-memory WAV bytes so speech_recognition can read them like a file"""
+    if isinstance(audio, (bytes, bytearray)):
+        return io.BytesIO(audio)
+    return audio
+
+def load_audio_data(audio, recognizer=None, session_id=None):
+    """
+    Read an audio file (path, file-like or WAV bytes) into speech_recognition AudioData
+    
+    The whole clip is read (no ambient-noise calibration eating the first
+    second of speech) and then trimmed to the detected speech using the
+    session's noise profile.
+    """
+    recognizer = recognizer or sr.Recognizer()
+    with sr.AudioFile(as_audio_file(audio)) as source:
+        audio_data = recognizer.record(source)
+    return trim_audio_data(audio_data, session_id)
+
+def trim_audio_data(audio_data, session_id=None):
+    """Cut leading/trailing silence from AudioData with the session's noise profile"""
+    samples, sample_rate = audio_data_to_samples(audio_data)
+    trimmed, stats = trim_silence(samples, sample_rate, noise_profiles.get(session_id))
+    if len(trimmed) == len(samples):
+        return audio_data
+    logger.debug(f"VAD trimmed clip from {stats['input_seconds']:.2f}s to {stats['output_seconds']:.2f}s")
+    raw = (np.clip(trimmed, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+    return sr.AudioData(raw, sample_rate, 2)
+
+def recognize_google_with_confidence(audio_data, language_code, recognizer=None):
+    """
+    Recognize speech with Google and report the top hypothesis confidence
+    
+    Returns:
+        tuple: (text, confidence); confidence is None when Google omits it
+    
+    Raises:
+        sr.UnknownValueError: No speech recognized
+        sr.RequestError: The API request failed
+    """
+    recognizer = recognizer or sr.Recognizer()
+    result = recognizer.recognize_google(audio_data, language=language_code, show_all=True)
+    if not result or not result.get("alternative"):
+        raise sr.UnknownValueError()
+    best = result["alternative"][0]
+    return best["transcript"], best.get("confidence")
+
+def transcribe_audio(audio, language, history, session_id=None):
     recognizer = sr.Recognizer()
     
     if audio is None:
         return history, ""
     
-    # Language codes for Google Speech Recognition
-    language_codes = {
-        "English": "en-US",
-        "Arabic": "ar-SA",  # Saudi Arabic
-        "Arabic (Egypt)": "ar-EG",
-        "Arabic (UAE)": "ar-AE",
-        "Arabic (Lebanon)": "ar-LB",
-        "Arabic (Saudi Arabia)": "ar-SA",
-        "Arabic (Kuwait)": "ar-KW",
-        "Arabic (Qatar)": "ar-QA",
-        "Arabic (Jordan)": "ar-JO",
-        "Auto-detect": None  # Let Google auto-detect
-    }
-    
     try:
-        with sr.AudioFile(audio) as source:
-            # Adjust for ambient noise
-            recognizer.adjust_for_ambient_noise(source)
-            audio_data = recognizer.record(source)
+        audio_data = load_audio_data(audio, recognizer, session_id)
         
         # Get selected language code
-        selected_language = language_codes.get(language, "en-US")
+        selected_language = LANGUAGE_CODES.get(language, "en-US")
         
         # Transcribe based on language selection
+        lid_note = ""
         if selected_language:
             text = recognizer.recognize_google(audio_data, language=selected_language)
         else:
-            # Auto-detect: try Arabic first, then English
+            # Auto-detect: identify the spoken language locally, then recognize once
+            decision = identify_audio_language(audio_data)
+            lid_note = f" [{decision.describe()}]"
+            recognizer_language, fallback_language = choose_recognizer_language(decision)
             try:
-                text = recognizer.recognize_google(audio_data, language="ar-SA")
-                detected_lang = "Arabic"
-            except:
-                text = recognizer.recognize_google(audio_data, language="en-US")
-                detected_lang = "English"
+                text = recognizer.recognize_google(audio_data, language=recognizer_language)
+            except sr.UnknownValueError:
+                # Low-confidence decision only: retry with the other language
+                if not fallback_language:
+                    raise
+                recognizer_language = fallback_language
+                text = recognizer.recognize_google(audio_data, language=recognizer_language)
             
+            detected_lang = "English" if recognizer_language.startswith("en") else "Arabic"
             text = f"[{detected_lang}] {text}"
         
         # Add timestamp and transcription to history
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_entry = f"[{timestamp}] [{language}] {text}"
-        
-        # Update history
-        if history:
-            updated_history = history + "\n" + new_entry
-        else:
-            updated_history = new_entry
-            
-        return updated_history, text
+        return record_transcription(history, language, text, note=lid_note), text
         
     except sr.UnknownValueError:
         error_msg = "Could not understand audio"
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_entry = f"[{timestamp}] [{language}] ERROR: {error_msg}"
-        
-        if history:
-            updated_history = history + "\n" + new_entry
-        else:
-            updated_history = new_entry
-            
-        return updated_history, error_msg
+        return record_transcription(history, language, error_msg, error=True), error_msg
         
     except sr.RequestError as e:
         error_msg = f"Could not request results; {e}"
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        new_entry = f"[{timestamp}] [{language}] ERROR: {error_msg}"
-        
-        if history:
-            updated_history = history + "\n" + new_entry
-        else:
-            updated_history = new_entry
-            
-        return updated_history, error_msg
+        return record_transcription(history, language, error_msg, error=True), error_msg
+
+async def transcribe_audio_async(audio, language, history, session_id=None):
+    """Async variant of transcribe_audio; the blocking call runs in a worker thread"""
+    return await asyncio.to_thread(transcribe_audio, audio, language, history, session_id)
 
 def clear_history():
     return "", ""
\ No newline at end of file
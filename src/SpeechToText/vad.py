@@ -0,0 +1,178 @@
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
+import numpy as np
+from src.config.settings import settings
+
+
+def frame_energies(samples: np.ndarray, sample_rate: int, frame_ms: float = None) -> np.ndarray:
+    """
+    RMS energy per non-overlapping frame
+
+    Args:
+        samples: Mono float32 samples in [-1, 1]
+        sample_rate: Sample rate in Hz
+        frame_ms: Frame length in milliseconds
+
+    Returns:
+        np.ndarray: One RMS value per complete frame
+    """
+    frame_ms = frame_ms or settings.VAD_FRAME_MS
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    n_frames = len(samples) // frame_len
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:n_frames * frame_len].reshape(n_frames, frame_len)
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1))
+
+
+def speech_mask(energies: np.ndarray, threshold: float, hangover_frames: int = 0) -> np.ndarray:
+    """
+    Mark frames above threshold as speech, extending each speech run by hangover_frames
+
+    Args:
+        energies: Per-frame RMS energies
+        threshold: Speech energy threshold
+        hangover_frames: Frames kept after speech drops below threshold
+
+    Returns:
+        np.ndarray: Boolean mask, one entry per frame
+    """
+    mask = energies > threshold
+    if hangover_frames > 0 and mask.any():
+        # A frame is speech if any of the previous hangover_frames frames was
+        kernel = np.ones(hangover_frames + 1, dtype=np.int32)
+        mask = np.convolve(mask.astype(np.int32), kernel)[:len(mask)] > 0
+    return mask
+
+
+class NoiseProfile:
+    """
+    Background noise floor for one session
+
+    Calibrated once from the leading frames of the first clip, then tracked
+    with an exponential moving average over frames classified as non-speech.
+    """
+
+    def __init__(self, alpha: float = None, ratio: float = None, min_threshold: float = None):
+        """
+        Initialize the profile
+
+        Args:
+            alpha: EMA weight of new noise observations
+            ratio: Speech threshold as a multiple of the noise floor
+            min_threshold: Absolute lower bound on the speech threshold
+        """
+        self.alpha = alpha or settings.VAD_NOISE_EMA_ALPHA
+        self.ratio = ratio or settings.VAD_THRESHOLD_RATIO
+        self.min_threshold = min_threshold or settings.VAD_MIN_THRESHOLD
+        self.noise_floor: Optional[float] = None
+
+    @property
+    def calibrated(self) -> bool:
+        return self.noise_floor is not None
+
+    def calibrate(self, energies: np.ndarray, leading_frames: int):
+        """Initial estimate from leading silence (robust to speech starting early)"""
+        if len(energies) == 0:
+            return
+        leading = np.median(energies[:max(1, leading_frames)])
+        quiet = np.percentile(energies, 10)
+        self.noise_floor = float(min(leading, quiet))
+
+    def update(self, energies: np.ndarray, mask: np.ndarray):
+        """Fold the non-speech frames of a clip into the noise floor"""
+        noise = energies[~mask]
+        if len(noise) == 0:
+            return
+        observed = float(np.median(noise))
+        if self.noise_floor is None:
+            self.noise_floor = observed
+        else:
+            self.noise_floor = (1 - self.alpha) * self.noise_floor + self.alpha * observed
+
+    def threshold(self) -> float:
+        """Current speech energy threshold"""
+        if self.noise_floor is None:
+            return self.min_threshold
+        return max(self.noise_floor * self.ratio, self.min_threshold)
+
+
+class NoiseProfileCache:
+    """Per-session noise profiles with LRU eviction"""
+
+    def __init__(self, max_sessions: int = None):
+        self.max_sessions = max_sessions or settings.THERAPIST_MAX_SESSIONS
+        self._profiles: "OrderedDict[str, NoiseProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: Optional[str]) -> NoiseProfile:
+        """Get the session's profile (a fresh, uncached one if session_id is None)"""
+        if session_id is None:
+            return NoiseProfile()
+        with self._lock:
+            profile = self._profiles.get(session_id)
+            if profile is None:
+                profile = NoiseProfile()
+                self._profiles[session_id] = profile
+                while len(self._profiles) > self.max_sessions:
+                    self._profiles.popitem(last=False)
+            else:
+                self._profiles.move_to_end(session_id)
+            return profile
+
+    def remove(self, session_id: str):
+        with self._lock:
+            self._profiles.pop(session_id, None)
+
+
+def trim_silence(samples: np.ndarray, sample_rate: int, profile: NoiseProfile,
+                 padding_ms: float = None) -> Tuple[np.ndarray, dict]:
+    """
+    Cut leading and trailing silence from a clip
+
+    The profile is calibrated on first use and updated from the clip's
+    non-speech frames. Clips with no detected speech are returned unchanged
+    so the recognizer still gets to decide.
+
+    Args:
+        samples: Mono float32 samples in [-1, 1]
+        sample_rate: Sample rate in Hz
+        profile: Session noise profile
+        padding_ms: Audio kept on either side of the detected speech
+
+    Returns:
+        tuple: (trimmed samples, stats dict)
+    """
+    padding_ms = settings.VAD_PADDING_MS if padding_ms is None else padding_ms
+    frame_ms = settings.VAD_FRAME_MS
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    energies = frame_energies(samples, sample_rate, frame_ms)
+
+    if not profile.calibrated:
+        profile.calibrate(energies, int(settings.VAD_CALIBRATION_MS / frame_ms))
+
+    hangover = int(settings.VAD_HANGOVER_MS / frame_ms)
+    mask = speech_mask(energies, profile.threshold(), hangover)
+    profile.update(energies, mask)
+
+    stats = {
+        "input_seconds": len(samples) / sample_rate,
+        "threshold": profile.threshold(),
+        "speech_frames": int(mask.sum()),
+    }
+    if not mask.any():
+        stats["output_seconds"] = stats["input_seconds"]
+        return samples, stats
+
+    speech_frames = np.flatnonzero(mask)
+    padding = int(sample_rate * padding_ms / 1000)
+    start = max(0, speech_frames[0] * frame_len - padding)
+    end = min(len(samples), (speech_frames[-1] + 1) * frame_len + padding)
+    trimmed = samples[start:end]
+    stats["output_seconds"] = len(trimmed) / sample_rate
+    return trimmed, stats
+
+
+# Process-wide per-session noise profiles
+noise_profiles = NoiseProfileCache()
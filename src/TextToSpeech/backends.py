@@ -0,0 +1,319 @@
+import io
+import os
+import tempfile
+import threading
+import time
+import wave
+from typing import Dict, Iterator, List, Optional
+import httpx
+from gtts import gTTS
+from loguru import logger
+from src.config.settings import settings
+
+
+class TTSBackend:
+    """
+    Base class for text-to-speech engines
+
+    Subclasses implement synthesize() or stream() (each defaults to the
+    other). Instances are long-lived: create them through TTSBackendFactory
+    so clients and connection pools stay warm between replies.
+    """
+
+    name = "base"
+    audio_format = "mp3"
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.latency_ema: Optional[float] = None
+        self._stats_lock = threading.Lock()
+
+    def voice_for(self, language: str) -> str:
+        """Default voice for 'arabic' or 'english'"""
+        raise NotImplementedError
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        """
+        Synthesize text to encoded audio
+
+        Args:
+            text: Text to speak
+            voice: Backend-specific voice (see voice_for)
+
+        Returns:
+            bytes: Audio in self.audio_format
+        """
+        return b"".join(self.stream(text, voice))
+
+    def stream(self, text: str, voice: str) -> Iterator[bytes]:
+        """Synthesize text, yielding encoded audio chunks as they become available"""
+        yield self.synthesize(text, voice)
+
+    def warmup(self):
+        """Create clients and open connections ahead of the first request"""
+
+    def timed_synthesize(self, text: str, voice: str) -> bytes:
+        """synthesize() with latency and failure tracking"""
+        start = time.monotonic()
+        try:
+            audio = self.synthesize(text, voice)
+        except Exception:
+            with self._stats_lock:
+                self.calls += 1
+                self.failures += 1
+            raise
+        self.record_latency(time.monotonic() - start)
+        return audio
+
+    def record_latency(self, seconds: float):
+        with self._stats_lock:
+            self.calls += 1
+            if self.latency_ema is None:
+                self.latency_ema = seconds
+            else:
+                self.latency_ema = 0.8 * self.latency_ema + 0.2 * seconds
+
+    def stats(self) -> Dict:
+        with self._stats_lock:
+            return {
+                "calls": self.calls,
+                "failures": self.failures,
+                "latency_ema": self.latency_ema,
+            }
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS (gTTS); voices are gTTS language codes"""
+
+    name = "gtts"
+    VOICES = {"arabic": "ar", "english": "en"}
+
+    def voice_for(self, language: str) -> str:
+        return self.VOICES.get(language, "en")
+
+    def stream(self, text: str, voice: str) -> Iterator[bytes]:
+        # gTTS requests one chunk per ~100 characters and yields each as it arrives;
+        # without a timeout a stalled request would hold its worker thread forever
+        timeout = (5.0, settings.TTS_BACKEND_TIMEOUT_SECONDS)
+        yield from gTTS(text=text, lang=voice, slow=False, timeout=timeout).stream()
+
+
+class ElevenLabsBackend(TTSBackend):
+    """
+    ElevenLabs streaming TTS
+
+    One client per process with a keep-alive connection pool, so replies
+    skip the TCP/TLS handshake. Voices are ElevenLabs voice IDs.
+    """
+
+    name = "elevenlabs"
+
+    def __init__(self, api_key: str = None):
+        super().__init__()
+        self.api_key = api_key or os.environ.get("ELEVEN_API_KEY")
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    from elevenlabs.client import ElevenLabs
+                    if not self.api_key:
+                        raise ValueError("ELEVEN_API_KEY not set in environment variables")
+                    http_client = httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=settings.TTS_MAX_CONNECTIONS,
+                            max_keepalive_connections=settings.TTS_MAX_CONNECTIONS,
+                        ),
+                        timeout=httpx.Timeout(settings.TTS_BACKEND_TIMEOUT_SECONDS, connect=5.0),
+                    )
+                    self._client = ElevenLabs(api_key=self.api_key, httpx_client=http_client)
+        return self._client
+
+    def voice_for(self, language: str) -> str:
+        if language == "arabic":
+            return settings.ELEVENLABS_VOICE_ID_AR or settings.ELEVENLABS_VOICE_ID
+        return settings.ELEVENLABS_VOICE_ID
+
+    def stream(self, text: str, voice: str) -> Iterator[bytes]:
+        yield from self.client.text_to_speech.stream(
+            text=text,
+            voice_id=voice,
+            model_id=settings.ELEVENLABS_MODEL,
+            output_format=settings.ELEVENLABS_OUTPUT_FORMAT
+        )
+
+    def warmup(self):
+        self.client
+
+
+class LocalTTSBackend(TTSBackend):
+    """
+    Offline CPU engine (pyttsx3: eSpeak on Linux, SAPI5 on Windows, NSSpeech on macOS)
+
+    Lower quality than the remote voices but keeps replies audible when the
+    network or a provider is down. Produces WAV. The engine is not
+    thread-safe, so calls are serialized.
+    """
+
+    name = "local"
+    audio_format = "wav"
+
+    def __init__(self):
+        super().__init__()
+        self._engine = None
+        self._lock = threading.Lock()
+        self._voice_ids: Dict[str, Optional[str]] = {}
+
+    @property
+    def engine(self):
+        if self._engine is None:
+            try:
+                import pyttsx3
+            except ImportError:
+                raise ImportError("The local TTS backend requires pyttsx3: pip install pyttsx3")
+            self._engine = pyttsx3.init()
+            self._engine.setProperty("rate", settings.LOCAL_TTS_RATE)
+        return self._engine
+
+    def voice_for(self, language: str) -> str:
+        return settings.LOCAL_TTS_VOICE_AR if language == "arabic" else settings.LOCAL_TTS_VOICE_EN
+
+    def synthesize(self, text: str, voice: str) -> bytes:
+        with self._lock:
+            engine = self.engine
+            voice_id = self._resolve_voice(voice)
+            if voice_id:
+                engine.setProperty("voice", voice_id)
+            fd, path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            try:
+                engine.save_to_file(text, path)
+                engine.runAndWait()
+                with open(path, "rb") as f:
+                    return f.read()
+            finally:
+                os.remove(path)
+
+    def warmup(self):
+        with self._lock:
+            self.engine
+
+    def _resolve_voice(self, voice: str) -> Optional[str]:
+        """Match a voice name or language code against the installed voices"""
+        if voice not in self._voice_ids:
+            needle = voice.lower()
+            match = None
+            for candidate in self.engine.getProperty("voices"):
+                if needle in (candidate.id or "").lower() or needle in (candidate.name or "").lower():
+                    match = candidate.id
+                    break
+            if match is None:
+                logger.warning(f"No local TTS voice matching '{voice}', using the default voice")
+            self._voice_ids[voice] = match
+        return self._voice_ids[voice]
+
+
+class TTSBackendFactory:
+    """Factory for TTS backends (one warm instance per backend)"""
+
+    BACKENDS = {
+        "gtts": GTTSBackend,
+        "elevenlabs": ElevenLabsBackend,
+        "local": LocalTTSBackend,
+    }
+
+    _instances: Dict[str, TTSBackend] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_backend(cls, name: str) -> TTSBackend:
+        """Get or create a backend (singleton per name)"""
+        backend = cls._instances.get(name)
+        if backend is None:
+            with cls._lock:
+                backend = cls._instances.get(name)
+                if backend is None:
+                    if name not in cls.BACKENDS:
+                        raise ValueError(f"Unsupported TTS backend: {name}")
+                    backend = cls.BACKENDS[name]()
+                    cls._instances[name] = backend
+        return backend
+
+    @classmethod
+    def warmup(cls, names: List[str]):
+        """Create and warm the given backends, logging (not raising) failures"""
+        for name in names:
+            try:
+                cls.get_backend(name).warmup()
+            except Exception as e:
+                logger.warning(f"TTS backend {name} failed to warm up: {e}")
+
+    @classmethod
+    def reset_instances(cls):
+        """Reset singleton instances (useful for testing)"""
+        cls._instances = {}
+
+
+def join_audio(clips: List[bytes], audio_format: str) -> bytes:
+    """
+    Stitch encoded clips of one format into a single clip without re-encoding
+
+    MP3 frames are self-delimiting and simply concatenate; WAV clips are
+    merged at the PCM level (they must share channel count, width and rate).
+    """
+    clips = [clip for clip in clips if clip]
+    if audio_format != "wav" or len(clips) < 2:
+        return b"".join(clips)
+
+    params = None
+    frames = []
+    for clip in clips:
+        with wave.open(io.BytesIO(clip), "rb") as wav_file:
+            clip_params = wav_file.getparams()[:3]
+            if params is None:
+                params = clip_params
+            elif clip_params != params:
+                raise ValueError("Cannot join WAV clips with different formats")
+            frames.append(wav_file.readframes(wav_file.getnframes()))
+
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(params[0])
+        wav_file.setsampwidth(params[1])
+        wav_file.setframerate(params[2])
+        wav_file.writeframes(b"".join(frames))
+    return buffer.getvalue()
+
+
+def transcode_audio(audio: bytes, source_format: str, target_format: str,
+                    like: Optional[bytes] = None) -> bytes:
+    """
+    Re-encode a clip into another format (needs pydub and ffmpeg)
+
+    Only used when no backend could render a clip in its reply's format.
+
+    Args:
+        audio: Encoded clip
+        source_format: Format of audio ('mp3' / 'wav')
+        target_format: Format to encode into
+        like: A WAV clip whose channels, sample width and rate the result
+            must share so join_audio() can merge them
+
+    Returns:
+        bytes: The clip encoded as target_format
+    """
+    if source_format == target_format or not audio:
+        return audio
+    from pydub import AudioSegment
+    segment = AudioSegment.from_file(io.BytesIO(audio), format=source_format)
+    if target_format == "wav" and like:
+        with wave.open(io.BytesIO(like), "rb") as wav_file:
+            channels, width, rate = wav_file.getparams()[:3]
+        segment = segment.set_channels(channels).set_sample_width(width).set_frame_rate(rate)
+    buffer = io.BytesIO()
+    segment.export(buffer, format=target_format)
+    return buffer.getvalue()
@@ -0,0 +1,262 @@
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+from loguru import logger
+from src.config.settings import settings
+from src.TextToSpeech.segmenter import segment_text
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_tts_text(text: str) -> str:
+    """Canonical form of a TTS input: NFKC, collapsed whitespace, stripped"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized audio
+
+    Entries are keyed by a SHA-256 of the normalized text, voice, language
+    and backend, and stored as one file per key. An in-memory index tracks
+    recency and sizes so eviction never scans the directory; small, recently
+    used entries are also kept in memory so repeated phrases skip the disk.
+    Both tiers are LRU with a byte budget.
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = None, memory_bytes: int = None,
+                 extension: str = ".mp3"):
+        """
+        Initialize the cache
+
+        Args:
+            directory: Cache directory (created if missing)
+            max_bytes: Disk budget in bytes
+            memory_bytes: In-memory budget in bytes
+            extension: File extension of cached audio
+        """
+        self.directory = directory or settings.TTS_CACHE_DIR
+        self.max_bytes = max_bytes or settings.TTS_CACHE_MAX_MB * 1024 * 1024
+        self.memory_bytes = settings.TTS_CACHE_MEMORY_MB * 1024 * 1024 if memory_bytes is None else memory_bytes
+        self.extension = extension
+
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._disk_bytes = 0
+        self._memory_used = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+
+    @staticmethod
+    def key(text: str, voice: str = "default", language: str = "en", backend: str = "gtts") -> str:
+        """Cache key for one synthesis request"""
+        material = "\x1f".join([backend, voice, language, normalize_tts_text(text)])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached audio for a key, or None"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self._index.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                return audio
+            if key not in self._index:
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = f.read()
+        except OSError:
+            # Removed behind our back; forget it
+            with self._lock:
+                self._disk_bytes -= self._index.pop(key, 0)
+                self.misses += 1
+            return None
+
+        with self._lock:
+            self.hits += 1
+            self._remember(key, audio)
+        return audio
+
+    def put(self, key: str, audio: bytes):
+        """Store audio under a key, evicting least recently used entries as needed"""
+        if not audio or len(audio) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"TTS cache write failed: {e}")
+            return
+
+        with self._lock:
+            self._disk_bytes += len(audio) - self._index.pop(key, 0)
+            self._index[key] = len(audio)
+            self._remember(key, audio)
+            self._evict_disk()
+
+    def get_or_synthesize(self, text: str, synthesize: Callable[[str], bytes], voice: str = "default",
+                          language: str = "en", backend: str = "gtts") -> bytes:
+        """
+        Return cached audio for one unit of text, synthesizing it on a miss
+
+        Args:
+            text: Text to speak (one sentence or phrase)
+            synthesize: TTS function mapping text to encoded audio bytes
+            voice, language, backend: Parts of the cache key
+
+        Returns:
+            bytes: Encoded audio
+        """
+        key = self.key(text, voice, language, backend)
+        audio = self.get(key)
+        if audio is None:
+            audio = synthesize(text)
+            self.put(key, audio)
+        return audio
+
+    def stats(self) -> Dict:
+        """Hit/miss counters and usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._index),
+                "disk_bytes": self._disk_bytes,
+                "memory_bytes": self._memory_used,
+                "evictions": self.evictions,
+            }
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            keys = list(self._index)
+            self._index.clear()
+            self._memory.clear()
+            self._disk_bytes = 0
+            self._memory_used = 0
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.extension)
+
+    def _load_index(self):
+        """Rebuild the index from the directory, oldest first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                # Left over from an interrupted write
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(self.extension):
+                continue
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, name[:-len(self.extension)], stat.st_size))
+
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._disk_bytes += size
+        with self._lock:
+            self._evict_disk()
+        if entries:
+            logger.info(f"TTS cache: {len(self._index)} entries, {self._disk_bytes / 1024 / 1024:.1f} MB")
+
+    def _remember(self, key: str, audio: bytes):
+        """Add to the in-memory tier (lock held)"""
+        if len(audio) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_used -= len(previous)
+        self._memory[key] = audio
+        self._memory_used += len(audio)
+        while self._memory_used > self.memory_bytes:
+            _, dropped = self._memory.popitem(last=False)
+            self._memory_used -= len(dropped)
+
+    def _evict_disk(self):
+        """Drop least recently used entries until under the disk budget (lock held)"""
+        while self._disk_bytes > self.max_bytes and self._index:
+            key, size = self._index.popitem(last=False)
+            self._disk_bytes -= size
+            dropped = self._memory.pop(key, None)
+            if dropped is not None:
+                self._memory_used -= len(dropped)
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+
+def cached_synthesizer(synthesize: Callable[[str], bytes], voice: str = "default", language: str = "en",
+                       backend: str = "gtts", cache: Optional[TTSCache] = None) -> Callable[[str], bytes]:
+    """
+    Wrap a per-sentence TTS function with the cache
+
+    Returns synthesize unchanged when caching is disabled.
+    """
+    if cache is None:
+        if not settings.TTS_CACHE_ENABLED:
+            return synthesize
+        cache = get_tts_cache()
+
+    def synthesize_cached(text: str) -> bytes:
+        return cache.get_or_synthesize(text, synthesize, voice, language, backend)
+    return synthesize_cached
+
+
+def synthesize_text_cached(text: str, synthesize: Callable[[str], bytes], voice: str = "default",
+                           language: str = "en", backend: str = "gtts",
+                           cache: Optional[TTSCache] = None) -> bytes:
+    """
+    Synthesize a full reply sentence by sentence, so shared sentences hit the cache
+
+    MP3 frames are self-delimiting, so the per-sentence clips are simply concatenated.
+    """
+    synthesize_unit = cached_synthesizer(synthesize, voice, language, backend, cache)
+    return b"".join(synthesize_unit(unit) for unit in segment_text(text))
+
+
+# Process-wide cache, see get_tts_cache()
+_tts_cache: Optional[TTSCache] = None
+_tts_cache_lock = threading.Lock()
+
+def get_tts_cache() -> TTSCache:
+    """Get the process-wide TTS cache"""
+    global _tts_cache
+    if _tts_cache is None:
+        with _tts_cache_lock:
+            if _tts_cache is None:
+                _tts_cache = TTSCache()
+    return _tts_cache
@@ -1,90 +1,44 @@
-import os
-from gtts import gTTS
+import asyncio
+from typing import Iterator
+from src.TextToSpeech.backends import TTSBackendFactory
 
-def text_to_speech_with_gtts_old(input_text, output_filepath, language="en"):
+# Text-to-speech helpers. Everything here returns audio (bytes, a chunk
+# iterator or a written file) and never plays it; local playback for CLI
+# demos lives in src.TextToSpeech.playback. These are thin wrappers over the
+# warm backends in src.TextToSpeech.backends.
 
-    audioobj= gTTS(
-        text=input_text,
-        lang=language,
-        slow=False
-    )
-    audioobj.save(output_filepath)
 
+def synthesize_with_gtts(input_text, language="en"):
+    """Synthesize text with gTTS and return the MP3 bytes (no file, no playback)"""
+    return TTSBackendFactory.get_backend("gtts").synthesize(input_text, language)
 
-# input_text="Hi this is AI with Hassan for testing purpose!"
-input_text= "مرحبًا، هذا ذكاء اصطناعي مع حسن لغرض الاختبار!"
-text_to_speech_with_gtts_old(input_text=input_text, output_filepath="gtts_testing.mp3", language="ar")
 
-#Step1b: Setup Text to Speech–TTS–model with ElevenLabs
-import elevenlabs
-from elevenlabs.client import ElevenLabs
+async def synthesize_with_gtts_async(input_text, language="en"):
+    """Async variant of synthesize_with_gtts; the blocking call runs in a worker thread"""
+    return await asyncio.to_thread(synthesize_with_gtts, input_text, language)
 
-ELEVENLABS_API_KEY=os.environ.get("ELEVEN_API_KEY")
 
-def text_to_speech_with_elevenlabs_old(input_text, output_filepath):
-    client=ElevenLabs(api_key=ELEVENLABS_API_KEY)
-    audio=client.generate(
-        text= input_text,
-        voice= "Aria",
-        output_format= "mp3_22050_32",
-        model= "eleven_turbo_v2"
-    )
-    elevenlabs.save(audio, output_filepath)
+def text_to_speech_with_gtts(input_text, output_filepath, language="en"):
+    """Synthesize text with gTTS into an MP3 file and return its path"""
+    with open(output_filepath, "wb") as f:
+        f.write(synthesize_with_gtts(input_text, language))
+    return output_filepath
 
-#text_to_speech_with_elevenlabs_old(input_text, output_filepath="elevenlabs_testing.mp3") 
 
-#Step2: Use Model for Text output to Voice
+def stream_with_elevenlabs(input_text, voice_id=None) -> Iterator[bytes]:
+    """Synthesize text with ElevenLabs and yield MP3 chunks as they arrive"""
+    backend = TTSBackendFactory.get_backend("elevenlabs")
+    return backend.stream(input_text, voice_id or backend.voice_for("english"))
 
-import subprocess
-import platform
 
-def text_to_speech_with_gtts(input_text, output_filepath):
-    language="en"
+def synthesize_with_elevenlabs(input_text, voice_id=None):
+    """Synthesize text with ElevenLabs and return the MP3 bytes (no file, no playback)"""
+    return b"".join(stream_with_elevenlabs(input_text, voice_id))
 
-    audioobj= gTTS(
-        text=input_text,
-        lang=language,
-        slow=False
-    )
-    audioobj.save(output_filepath)
-    os_name = platform.system()
-    try:
-        if os_name == "Darwin":  # macOS
-            subprocess.run(['afplay', output_filepath])
-        elif os_name == "Windows":  # Windows
-            subprocess.run(['powershell', '-c', f'(New-Object Media.SoundPlayer "{output_filepath}").PlaySync();'])
-        elif os_name == "Linux":  # Linux
-            subprocess.run(['aplay', output_filepath])  # Alternative: use 'mpg123' or 'ffplay'
-        else:
-            raise OSError("Unsupported operating system")
-    except Exception as e:
-        print(f"An error occurred while trying to play the audio: {e}")
 
-
-input_text="Hi this is Ai with Hassan, autoplay testing!"
-#text_to_speech_with_gtts(input_text=input_text, output_filepath="gtts_testing_autoplay.mp3")
-
-
-def text_to_speech_with_elevenlabs(input_text, output_filepath):
-    client=ElevenLabs(api_key=ELEVENLABS_API_KEY)
-    audio=client.generate(
-        text= input_text,
-        voice= "Aria",
-        output_format= "mp3_22050_32",
-        model= "eleven_turbo_v2"
-    )
-    elevenlabs.save(audio, output_filepath)
-    os_name = platform.system()
-    try:
-        if os_name == "Darwin":  # macOS
-            subprocess.run(['afplay', output_filepath])
-        elif os_name == "Windows":  # Windows
-            subprocess.run(['powershell', '-c', f'(New-Object Media.SoundPlayer "{output_filepath}").PlaySync();'])
-        elif os_name == "Linux":  # Linux
-            subprocess.run(['aplay', output_filepath])  # Alternative: use 'mpg123' or 'ffplay'
-        else:
-            raise OSError("Unsupported operating system")
-    except Exception as e:
-        print(f"An error occurred while trying to play the audio: {e}")
-
-#text_to_speech_with_elevenlabs(input_text, output_filepath="elevenlabs_testing_autoplay.mp3")
\ No newline at end of file
+def text_to_speech_with_elevenlabs(input_text, output_filepath, voice_id=None):
+    """Synthesize text with ElevenLabs into an MP3 file and return its path"""
+    with open(output_filepath, "wb") as f:
+        for chunk in stream_with_elevenlabs(input_text, voice_id):
+            f.write(chunk)
+    return output_filepath
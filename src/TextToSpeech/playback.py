@@ -0,0 +1,55 @@
+import os
+import platform
+import shutil
+import subprocess
+import tempfile
+from loguru import logger
+
+# Opt-in local playback sink for CLI demos. The server never imports this:
+# replies are returned to the browser as audio, not played on the host.
+
+# Linux players in order of preference (aplay only handles WAV)
+LINUX_PLAYERS = [
+    ["mpg123", "-q"],
+    ["ffplay", "-nodisp", "-autoexit", "-loglevel", "quiet"],
+    ["aplay", "-q"],
+]
+
+
+def play_audio_file(filepath):
+    """Play an audio file on the local machine, blocking until it finishes"""
+    os_name = platform.system()
+    if os_name == "Darwin":  # macOS
+        command = ['afplay', filepath]
+    elif os_name == "Windows":  # Windows
+        command = ['powershell', '-c', f'(New-Object Media.SoundPlayer "{filepath}").PlaySync();']
+    elif os_name == "Linux":  # Linux
+        player = next((player for player in LINUX_PLAYERS if shutil.which(player[0])), None)
+        if player is None:
+            raise OSError("No audio player found (install mpg123 or ffmpeg)")
+        command = player + [filepath]
+    else:
+        raise OSError("Unsupported operating system")
+    subprocess.run(command, check=True)
+
+
+def play_audio_bytes(audio, suffix=".mp3"):
+    """Play encoded audio bytes on the local machine"""
+    with tempfile.NamedTemporaryFile(suffix=suffix, delete=False) as f:
+        f.write(audio)
+        path = f.name
+    try:
+        play_audio_file(path)
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    # CLI demo: python -m src.TextToSpeech.playback
+    from src.TextToSpeech.gtts_tts import synthesize_with_gtts
+
+    input_text = "مرحبًا، هذا ذكاء اصطناعي مع حسن لغرض الاختبار!"
+    try:
+        play_audio_bytes(synthesize_with_gtts(input_text, language="ar"))
+    except Exception as e:
+        logger.error(f"An error occurred while trying to play the audio: {e}")
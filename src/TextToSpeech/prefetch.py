@@ -0,0 +1,158 @@
+import json
+import os
+import re
+import threading
+from typing import List, Optional
+from loguru import logger
+from src.config.messages import ERROR_MESSAGES
+from src.config.settings import settings
+from src.TextToSpeech.cache import normalize_tts_text
+from src.TextToSpeech.router import TTSRouter, get_tts_router
+from src.TextToSpeech.segmenter import CLAUSE_END, SENTENCE_END, SentenceSegmenter, segment_text
+
+# Openers the therapist prompt asks for ("Start with warm greeting"), in both languages
+GREETINGS = [
+    "مرحباً",
+    "أهلاً وسهلاً",
+    "السلام عليكم",
+    "وعليكم السلام",
+    "شكراً لمشاركتك",
+    "أنا هنا لمساعدتك",
+    "Hello",
+    "Hi there",
+    "Thank you for sharing",
+    "I'm here for you",
+]
+
+# Punctuation and spaces that may follow a phrase before the rest of the reply
+_PHRASE_TAIL = re.compile(rf"[\s{re.escape(CLAUSE_END + SENTENCE_END)}]+")
+
+
+def default_phrases() -> List[str]:
+    """Greetings, the bilingual error replies and any phrases from TTS_PREFETCH_PHRASES_PATH"""
+    phrases = GREETINGS + list(ERROR_MESSAGES.values())
+    path = settings.TTS_PREFETCH_PHRASES_PATH
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            phrases += json.load(f)
+    return phrases
+
+
+class PhrasePrefetcher:
+    """
+    Pre-render predictable therapist phrases into the TTS cache
+
+    warm() synthesizes every phrase the way the streaming path will later
+    ask for it, so a reply that opens with one of them gets its first audio
+    chunk from the cache. segmenter() returns a sentence segmenter that
+    emits a known opening phrase as its own unit as soon as it has streamed
+    in, instead of waiting for the rest of the sentence.
+    """
+
+    def __init__(self, phrases: Optional[List[str]] = None, router: Optional[TTSRouter] = None):
+        """
+        Initialize the prefetcher
+
+        Args:
+            phrases: Phrases to pre-render (defaults to default_phrases())
+            router: TTS router whose cache is warmed
+        """
+        self.phrases = [normalize_tts_text(phrase) for phrase in (phrases or default_phrases())]
+        self.router = router
+        self.ready = threading.Event()
+
+    def warm(self):
+        """Render every phrase (and every sentence of multi-sentence phrases) into the cache"""
+        router = self.router or get_tts_router()
+        rendered = 0
+        for phrase in self.phrases:
+            # Whole phrases serve as openers; their sentences match how full replies are cut
+            for unit in dict.fromkeys([phrase] + segment_text(phrase)):
+                try:
+                    router.synthesize_unit(unit)
+                    rendered += 1
+                except Exception as e:
+                    logger.warning(f"TTS prefetch failed for '{unit}': {e}")
+        self.ready.set()
+        logger.info(f"TTS prefetch: {rendered} phrases rendered")
+
+    def warm_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.warm, name="tts-prefetch", daemon=True)
+        thread.start()
+        return thread
+
+    def match_prefix(self, text: str) -> Optional[str]:
+        """
+        Longest known phrase that text starts with
+
+        The phrase must be followed by punctuation, whitespace or the end of
+        the text, so "Hello" does not match "Hellos".
+        """
+        text = normalize_tts_text(text)
+        best = None
+        for phrase in self.phrases:
+            if text.startswith(phrase) and (len(text) == len(phrase) or _PHRASE_TAIL.match(text, len(phrase))):
+                if best is None or len(phrase) > len(best):
+                    best = phrase
+        return best
+
+    def could_match(self, text: str) -> bool:
+        """Whether more text might still complete a known phrase"""
+        text = normalize_tts_text(text)
+        return any(phrase.startswith(text) and phrase != text for phrase in self.phrases)
+
+    def segmenter(self, **kwargs) -> "PrefixSegmenter":
+        return PrefixSegmenter(self, **kwargs)
+
+
+class PrefixSegmenter(SentenceSegmenter):
+    """SentenceSegmenter that splits a known opening phrase off the first sentence"""
+
+    def __init__(self, prefetcher: PhrasePrefetcher, **kwargs):
+        super().__init__(**kwargs)
+        self.prefetcher = prefetcher
+        self._opening = True
+
+    def feed(self, delta: str) -> List[str]:
+        if not self._opening:
+            return super().feed(delta)
+
+        self._buffer += delta
+        head = self._buffer.lstrip()
+        if not head:
+            return []
+
+        phrase = self.prefetcher.match_prefix(head)
+        if phrase is None:
+            if self.prefetcher.could_match(head):
+                return []
+            self._opening = False
+            return super().feed("")
+
+        rest = normalize_tts_text(head)[len(phrase):]
+        # Wait while a longer phrase may still be streaming in ("Hi" -> "Hi there")
+        # or the phrase boundary has not arrived yet ("Hello" -> "Hellos")
+        if not rest or self.prefetcher.could_match(head):
+            return []
+
+        self._opening = False
+        self._buffer = rest[_PHRASE_TAIL.match(rest).end():]
+        return [phrase] + super().feed("")
+
+    def flush(self) -> List[str]:
+        self._opening = False
+        return super().flush()
+
+
+# Process-wide prefetcher, see get_phrase_prefetcher()
+_prefetcher: Optional[PhrasePrefetcher] = None
+_prefetcher_lock = threading.Lock()
+
+def get_phrase_prefetcher() -> PhrasePrefetcher:
+    """Get the process-wide phrase prefetcher"""
+    global _prefetcher
+    if _prefetcher is None:
+        with _prefetcher_lock:
+            if _prefetcher is None:
+                _prefetcher = PhrasePrefetcher()
+    return _prefetcher
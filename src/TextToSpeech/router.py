@@ -0,0 +1,262 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+from src.config.settings import settings
+from src.TextToSpeech.backends import TTSBackend, TTSBackendFactory, join_audio, transcode_audio
+from src.TextToSpeech.cache import TTSCache, get_tts_cache
+from src.TextToSpeech.segmenter import segment_text
+from src.utils.language import split_by_script
+
+
+@dataclass
+class SpeechSegment:
+    """One piece of a reply and the language it is spoken in"""
+    text: str
+    language: str
+
+
+class TTSRouter:
+    """
+    Route each part of a reply to the backends configured for its language
+
+    Replies are cut into sentences, and sentences into runs of Arabic and
+    English script. Each run is synthesized by the first backend in its
+    language's route that answers within the per-attempt timeout, all runs
+    concurrently, and the encoded clips are joined in order without
+    re-encoding. A failed or slow run falls through to the next backend on
+    its own rather than re-synthesizing the whole reply.
+
+    Clips of one reply must share an encoding. When a fallback answers in
+    another format, its runs are re-rendered on a backend of the reply's
+    format, or the whole reply moves to the fallback's format; a clip is
+    transcoded only when neither is possible.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, List[str]]] = None,
+                 cache: Optional[TTSCache] = None, max_workers: int = None, retries: int = None,
+                 timeout: float = None, prefer_fastest: bool = None):
+        """
+        Initialize the router
+
+        Args:
+            routes: language ('arabic' / 'english') -> backend names in order of preference
+            cache: TTS cache (the process-wide one if caching is enabled)
+            max_workers: Segments synthesized concurrently
+            retries: Extra attempts per backend for a failed segment
+            timeout: Seconds to wait for one backend before trying the next
+            prefer_fastest: Order each route by observed backend latency
+        """
+        self.routes = routes or {
+            "arabic": _parse_route(settings.TTS_ARABIC_BACKEND),
+            "english": _parse_route(settings.TTS_ENGLISH_BACKEND),
+        }
+        if cache is None and settings.TTS_CACHE_ENABLED:
+            cache = get_tts_cache()
+        self.cache = cache
+        self.retries = settings.TTS_RETRIES if retries is None else retries
+        self.timeout = timeout or settings.TTS_BACKEND_TIMEOUT_SECONDS
+        self.prefer_fastest = settings.TTS_PREFER_FASTEST if prefer_fastest is None else prefer_fastest
+
+        workers = max_workers or settings.TTS_MAX_WORKERS
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts-router")
+        # Attempts run on one pool per backend, so a slow backend can be abandoned
+        # and calls still hanging on it never delay the backends behind it
+        self._attempt_workers = workers
+        self._attempts: Dict[str, ThreadPoolExecutor] = {}
+        self._attempts_lock = threading.Lock()
+
+        # The format replies are pinned to: the one most primary backends produce
+        primaries = [TTSBackendFactory.BACKENDS[route[0]].audio_format for route in self.routes.values() if route]
+        self.audio_format = Counter(primaries).most_common(1)[0][0] if primaries else "mp3"
+        formats = {TTSBackendFactory.BACKENDS[name].audio_format for route in self.routes.values() for name in route}
+        if len(formats) > 1:
+            logger.warning(f"TTS routes mix audio formats {sorted(formats)}; "
+                           f"odd clips are re-rendered or transcoded to {self.audio_format}")
+
+    def plan(self, text: str, sentences: bool = True) -> List[SpeechSegment]:
+        """
+        Split text into routed segments
+
+        Args:
+            text: Reply text
+            sentences: Also cut at sentence boundaries (better cache reuse)
+
+        Returns:
+            List[SpeechSegment] in speaking order
+        """
+        units = segment_text(text) if sentences else [text]
+        segments = []
+        for unit in units:
+            for piece, language in split_by_script(unit):
+                if not piece.strip():
+                    continue
+                # 'mixed' (no letters at all) follows the previous segment's voice
+                if language not in self.routes:
+                    language = segments[-1].language if segments else "english"
+                segments.append(SpeechSegment(piece.strip(), language))
+        return segments
+
+    def synthesize(self, text: str) -> Tuple[bytes, str]:
+        """
+        Synthesize a full reply
+
+        Returns:
+            Tuple[bytes, str]: (audio, format) -- the format is the router's
+            audio_format unless a fallback forced the whole reply into another
+        """
+        return self._render(self.plan(text), switch_format=True)
+
+    def synthesize_unit(self, text: str) -> bytes:
+        """Synthesize one already-segmented sentence (streaming path), always in audio_format"""
+        return self._render(self.plan(text, sentences=False))[0]
+
+    def candidates(self, language: str, audio_format: Optional[str] = None) -> List[TTSBackend]:
+        """Backends for a language in the order they will be tried, optionally only those of one format"""
+        backends = [TTSBackendFactory.get_backend(name) for name in self.routes[language]]
+        if audio_format is not None:
+            backends = [backend for backend in backends if backend.audio_format == audio_format]
+        if self.prefer_fastest:
+            # Unmeasured backends keep their configured place after the measured ones
+            backends.sort(key=lambda backend: (backend.latency_ema is None, backend.latency_ema or 0.0))
+        return backends
+
+    def _render(self, segments: List[SpeechSegment], switch_format: bool = False) -> Tuple[bytes, str]:
+        """
+        Synthesize segments concurrently and join them in one format
+
+        Args:
+            segments: Routed segments in speaking order
+            switch_format: Allow the whole reply to move to a fallback's format
+                instead of transcoding (streamed chunks must keep audio_format)
+
+        Returns:
+            Tuple[bytes, str]: (audio, format)
+        """
+        if not segments:
+            return b"", self.audio_format
+        # Backends already tried per segment; a fallback step never waits on them again
+        tried = [set() for _ in segments]
+        results = self._synthesize_all(segments, tried)
+        odd = [i for i, (_, audio_format) in enumerate(results) if audio_format != self.audio_format]
+        if not odd:
+            return join_audio([audio for audio, _ in results], self.audio_format), self.audio_format
+
+        # Runs a fallback answered are re-rendered on untried backends of the reply's format
+        retried = self._synthesize_all([segments[i] for i in odd], [tried[i] for i in odd], self.audio_format)
+        for i, result in zip(odd, retried):
+            if result is not None:
+                results[i] = result
+        odd = [i for i, (_, audio_format) in enumerate(results) if audio_format != self.audio_format]
+        if not odd:
+            return join_audio([audio for audio, _ in results], self.audio_format), self.audio_format
+
+        if switch_format:
+            # Otherwise the whole reply is rendered in the fallback's format, if every run can be
+            fallback_format = results[odd[0]][1]
+            rest = [i for i, (_, audio_format) in enumerate(results) if audio_format != fallback_format]
+            switched = self._synthesize_all([segments[i] for i in rest], [tried[i] for i in rest], fallback_format)
+            if all(result is not None for result in switched):
+                for i, result in zip(rest, switched):
+                    results[i] = result
+                logger.warning(f"TTS reply rendered in {fallback_format} instead of {self.audio_format}")
+                return join_audio([audio for audio, _ in results], fallback_format), fallback_format
+
+        # Last resort: re-encode the odd clips
+        logger.warning(f"Transcoding {len(odd)} TTS clip(s) to {self.audio_format}")
+        like = next((audio for audio, audio_format in results if audio_format == self.audio_format), None)
+        clips = [transcode_audio(audio, audio_format, self.audio_format, like) for audio, audio_format in results]
+        return join_audio(clips, self.audio_format), self.audio_format
+
+    def _synthesize_all(self, segments: List[SpeechSegment], tried: List[set],
+                        audio_format: Optional[str] = None) -> List[Optional[Tuple[bytes, str]]]:
+        """
+        Synthesize segments concurrently
+
+        Without a format every segment must succeed (errors are raised); with
+        one, only untried backends of that format are used and a segment none
+        of them can render yields None.
+        """
+        if audio_format is None and len(segments) == 1:
+            return [self._synthesize_segment(segments[0], tried[0])]
+
+        def synthesize(segment: SpeechSegment, skip: set) -> Optional[Tuple[bytes, str]]:
+            if audio_format is None:
+                return self._synthesize_segment(segment, skip)
+            try:
+                return self._synthesize_segment(segment, skip, audio_format)
+            except RuntimeError:
+                return None
+
+        futures = [self._executor.submit(synthesize, segment, skip) for segment, skip in zip(segments, tried)]
+        return [future.result() for future in futures]
+
+    def _synthesize_segment(self, segment: SpeechSegment, tried: set,
+                            audio_format: Optional[str] = None) -> Tuple[bytes, str]:
+        """
+        Synthesize one segment, falling through the route; returns (audio, format)
+
+        Backends named in tried are skipped, and every backend attempted is added to it.
+        """
+        errors = []
+        for backend in self.candidates(segment.language, audio_format):
+            if backend.name in tried:
+                continue
+            tried.add(backend.name)
+            voice = backend.voice_for(segment.language)
+            future = self._attempt_pool(backend).submit(self._synthesize_with, backend, segment, voice)
+            try:
+                return future.result(timeout=self.timeout), backend.audio_format
+            except FutureTimeoutError:
+                backend.record_latency(self.timeout)
+                errors.append(f"{backend.name}: timed out after {self.timeout:.1f}s")
+            except Exception as e:
+                errors.append(f"{backend.name}: {e}")
+            logger.warning(f"TTS {backend.name} [{voice}] failed for {segment.language} segment, trying next backend")
+        raise RuntimeError(f"All TTS backends failed: {'; '.join(errors)}")
+
+    def _attempt_pool(self, backend: TTSBackend) -> ThreadPoolExecutor:
+        pool = self._attempts.get(backend.name)
+        if pool is None:
+            with self._attempts_lock:
+                pool = self._attempts.get(backend.name)
+                if pool is None:
+                    pool = ThreadPoolExecutor(
+                        max_workers=self._attempt_workers, thread_name_prefix=f"tts-{backend.name}"
+                    )
+                    self._attempts[backend.name] = pool
+        return pool
+
+    def _synthesize_with(self, backend: TTSBackend, segment: SpeechSegment, voice: str) -> bytes:
+        def render(text: str) -> bytes:
+            for attempt in range(self.retries + 1):
+                try:
+                    return backend.timed_synthesize(text, voice)
+                except Exception as e:
+                    if attempt == self.retries:
+                        raise
+                    logger.warning(f"TTS {backend.name} [{voice}] failed, retrying: {e}")
+
+        if self.cache is None:
+            return render(segment.text)
+        return self.cache.get_or_synthesize(segment.text, render, voice, segment.language, backend.name)
+
+
+def _parse_route(value: str) -> List[str]:
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+# Process-wide router, see get_tts_router()
+_tts_router: Optional[TTSRouter] = None
+_tts_router_lock = threading.Lock()
+
+def get_tts_router() -> TTSRouter:
+    """Get the process-wide TTS router"""
+    global _tts_router
+    if _tts_router is None:
+        with _tts_router_lock:
+            if _tts_router is None:
+                _tts_router = TTSRouter()
+    return _tts_router
@@ -0,0 +1,99 @@
+import re
+from typing import List
+
+# Sentence-final punctuation in English and Arabic script
+# ('.', '!', '?', '…', Arabic question mark '؟', Arabic full stop '۔')
+SENTENCE_END = ".!?…؟۔"
+
+# Clause punctuation used to split over-long sentences
+# (',', ';', ':', Arabic comma '،', Arabic semicolon '؛')
+CLAUSE_END = ",;:،؛"
+
+_SENTENCE_BOUNDARY = re.compile(rf"[{re.escape(SENTENCE_END)}]+[\"'”»)\]]*(?=\s)|\n+")
+_CLAUSE_BOUNDARY = re.compile(rf"[{re.escape(CLAUSE_END)}](?=\s)")
+
+
+class SentenceSegmenter:
+    """
+    Incrementally cut streamed text into speakable units
+
+    Text deltas are fed as they arrive; complete sentences are returned as
+    soon as their closing punctuation is followed by whitespace, so a unit
+    can be synthesized while the rest of the reply is still generating.
+    """
+
+    def __init__(self, min_chars: int = 20, max_chars: int = 250):
+        """
+        Initialize the segmenter
+
+        Args:
+            min_chars: Units shorter than this are merged with the next one
+            max_chars: Units longer than this are split at clause punctuation
+        """
+        self.min_chars = min_chars
+        self.max_chars = max_chars
+        self._buffer = ""
+
+    def feed(self, delta: str) -> List[str]:
+        """
+        Add a text delta
+
+        Args:
+            delta: Newly generated text
+
+        Returns:
+            List[str]: Units completed by this delta (may be empty)
+        """
+        self._buffer += delta
+        units = []
+
+        while True:
+            cut = self._next_cut()
+            if cut is None:
+                break
+            unit, self._buffer = self._buffer[:cut].strip(), self._buffer[cut:]
+            if unit:
+                units.append(unit)
+
+        return units
+
+    def flush(self) -> List[str]:
+        """Return whatever text remains once the stream has ended"""
+        unit, self._buffer = self._buffer.strip(), ""
+        return [unit] if unit else []
+
+    def _next_cut(self):
+        search_from = 0
+        while True:
+            match = _SENTENCE_BOUNDARY.search(self._buffer, search_from)
+            if match is None:
+                break
+            if len(self._buffer[:match.end()].strip()) >= self.min_chars:
+                return match.end()
+            search_from = match.end()
+
+        if len(self._buffer) > self.max_chars:
+            clauses = [m.end() for m in _CLAUSE_BOUNDARY.finditer(self._buffer, 0, self.max_chars)]
+            if clauses:
+                return clauses[-1]
+            # No punctuation at all: fall back to the last word break
+            space = self._buffer.rfind(" ", 0, self.max_chars)
+            return space if space > 0 else self.max_chars
+
+        return None
+
+
+def segment_text(text: str, min_chars: int = 20, max_chars: int = 250) -> List[str]:
+    """
+    Split complete text into speakable units
+
+    Args:
+        text: Text to split
+        min_chars: Units shorter than this are merged with the next one
+        max_chars: Units longer than this are split at clause punctuation
+
+    Returns:
+        List[str]: Units in order
+    """
+    segmenter = SentenceSegmenter(min_chars=min_chars, max_chars=max_chars)
+    return segmenter.feed(text) + segmenter.flush()
@@ -0,0 +1,123 @@
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from loguru import logger
+from src.config.settings import settings
+
+
+class AudioSpool:
+    """
+    Bounded, self-cleaning directory for audio that has to be served as a file
+
+    Files are tracked in write order in memory. Every write drops files older
+    than max_age_seconds and then the oldest files until the spool is within
+    max_bytes and max_files. Anything left in the directory from a previous
+    run is removed on startup.
+    """
+
+    def __init__(self, directory: str = None, max_bytes: int = None, max_files: int = None,
+                 max_age_seconds: float = None):
+        """
+        Initialize the spool
+
+        Args:
+            directory: Spool directory (created if missing)
+            max_bytes: Total size cap in bytes
+            max_files: Maximum number of files kept
+            max_age_seconds: Retention time for a file
+        """
+        self.directory = directory or settings.TTS_SPOOL_DIR
+        self.max_bytes = max_bytes or settings.TTS_SPOOL_MAX_MB * 1024 * 1024
+        self.max_files = max_files or settings.TTS_SPOOL_MAX_FILES
+        self.max_age_seconds = max_age_seconds or settings.TTS_SPOOL_MAX_AGE_SECONDS
+
+        self._files: Deque[Tuple[str, int, float]] = deque()  # (path, size, created)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.written = 0
+        self.removed = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._purge_directory()
+
+    def write(self, audio: bytes, suffix: str = ".mp3") -> str:
+        """
+        Write audio to a new spool file
+
+        Args:
+            audio: Encoded audio
+            suffix: File extension matching the audio's format (e.g. ".wav")
+
+        Returns:
+            str: Path of the file (valid until retention or the size cap removes it)
+        """
+        path = os.path.join(self.directory, f"{uuid.uuid4().hex}{suffix}")
+        with open(path, "wb") as f:
+            f.write(audio)
+        with self._lock:
+            self._files.append((path, len(audio), time.monotonic()))
+            self._total_bytes += len(audio)
+            self.written += 1
+            self._cleanup_locked()
+        return path
+
+    def cleanup(self):
+        """Apply the retention policy and size caps now"""
+        with self._lock:
+            self._cleanup_locked()
+
+    def stats(self) -> Dict:
+        """Spool size and activity"""
+        with self._lock:
+            return {
+                "files": len(self._files),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "max_files": self.max_files,
+                "written": self.written,
+                "removed": self.removed,
+            }
+
+    def _cleanup_locked(self):
+        cutoff = time.monotonic() - self.max_age_seconds
+        while self._files and (
+            self._files[0][2] < cutoff
+            or self._total_bytes > self.max_bytes
+            or len(self._files) > self.max_files
+        ):
+            path, size, _ = self._files.popleft()
+            self._total_bytes -= size
+            self.removed += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _purge_directory(self):
+        """Remove files left by a previous process"""
+        removed = 0
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+                removed += 1
+            except OSError:
+                pass
+        if removed:
+            logger.info(f"Audio spool: removed {removed} stale files from {self.directory}")
+
+
+# Process-wide spool, see get_audio_spool()
+_audio_spool: Optional[AudioSpool] = None
+_audio_spool_lock = threading.Lock()
+
+def get_audio_spool() -> AudioSpool:
+    """Get the process-wide audio spool"""
+    global _audio_spool
+    if _audio_spool is None:
+        with _audio_spool_lock:
+            if _audio_spool is None:
+                _audio_spool = AudioSpool()
+    return _audio_spool
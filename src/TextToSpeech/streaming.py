@@ -0,0 +1,119 @@
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable, Optional, Tuple
+from loguru import logger
+from src.TextToSpeech.segmenter import SentenceSegmenter
+
+_END = object()
+
+
+class SpeechStream:
+    """
+    Iterator of (sentence, audio bytes) pairs, see stream_speech()
+
+    close() may be called from any thread, including while another thread
+    is blocked in next(): it stops the producer (which then closes the delta
+    stream, ending LLM generation), cancels queued synthesis and wakes the
+    consumer.
+    """
+
+    def __init__(self, deltas: Iterable[str], synthesize: Callable[[str], bytes],
+                 segmenter: SentenceSegmenter, max_workers: int):
+        self._deltas = deltas
+        self._synthesize = synthesize
+        self._segmenter = segmenter
+        self._pending: "queue.Queue" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-stream")
+        self._stop = threading.Event()
+
+        self._producer = threading.Thread(target=self._produce, name="tts-stream-producer", daemon=True)
+        self._producer.start()
+
+    def __iter__(self) -> "SpeechStream":
+        return self
+
+    def __next__(self) -> Tuple[str, bytes]:
+        while True:
+            if self._stop.is_set():
+                raise StopIteration
+            item = self._pending.get()
+            if item is _END:
+                self.close()
+                raise StopIteration
+            unit, future = item
+            try:
+                audio = future.result()
+            except Exception as e:
+                if self._stop.is_set():
+                    raise StopIteration
+                if not unit:
+                    # The text stream itself failed
+                    self.close()
+                    raise
+                logger.error(f"TTS failed for streamed sentence: {e}")
+                continue
+            if audio:
+                return unit, audio
+
+    def close(self):
+        """Stop generating and synthesizing; safe to call repeatedly and from any thread"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._pending.put(_END)
+
+    def _submit(self, unit: str):
+        try:
+            future = self._executor.submit(self._synthesize, unit)
+        except RuntimeError:
+            # Closed while the delta was being segmented
+            return
+        self._pending.put((unit, future))
+
+    def _produce(self):
+        try:
+            for delta in self._deltas:
+                if self._stop.is_set():
+                    return
+                for unit in self._segmenter.feed(delta):
+                    self._submit(unit)
+            for unit in self._segmenter.flush():
+                self._submit(unit)
+        except Exception as e:
+            failed: Future = Future()
+            failed.set_exception(e)
+            self._pending.put(("", failed))
+        finally:
+            # Closing the generator chain closes the LLM's HTTP stream
+            close = getattr(self._deltas, "close", None)
+            if close is not None:
+                close()
+            self._pending.put(_END)
+
+
+def stream_speech(
+    deltas: Iterable[str],
+    synthesize: Callable[[str], bytes],
+    segmenter: Optional[SentenceSegmenter] = None,
+    max_workers: int = 2
+) -> SpeechStream:
+    """
+    Turn a stream of LLM text deltas into a stream of audio chunks
+
+    Deltas are consumed on a background thread and cut into sentences;
+    each sentence is synthesized as soon as it is complete, while the LLM
+    keeps generating. Chunks are yielded in sentence order.
+
+    Args:
+        deltas: Text deltas, e.g. from OmaniTherapistAI.stream_therapeutic_response
+        synthesize: TTS function mapping one sentence to encoded audio bytes
+        segmenter: Sentence segmenter (a default one is created if not provided)
+        max_workers: Number of sentences synthesized concurrently
+
+    Returns:
+        SpeechStream: Iterator of (sentence, audio bytes) pairs; close() it to
+        abandon the reply
+    """
+    return SpeechStream(deltas, synthesize, segmenter or SentenceSegmenter(), max_workers)
@@ -0,0 +1,303 @@
+import argparse
+import math
+import time
+from typing import Dict, List, Optional, Sequence
+import faiss
+import numpy as np
+from loguru import logger
+from src.config.settings import settings
+
+INDEX_TYPES = ["flat", "hnsw", "ivf", "pq", "ivfpq"]
+
+# "auto" picks the first type whose corpus-size ceiling is above the vector count:
+# exact search while it is cheap, then graph search, then inverted lists,
+# and product quantization (AUTO_INDEX_TOP) once raw float32 vectors stop
+# fitting comfortably in RAM
+AUTO_INDEX_CEILINGS = [
+    (20_000, "flat"),
+    (500_000, "hnsw"),
+    (5_000_000, "ivf"),
+]
+AUTO_INDEX_TOP = "ivfpq"
+
+HNSW_EF_CONSTRUCTION = 200
+PQ_BITS = 8
+TRAIN_POINTS_PER_CENTROID = 64
+ADD_BLOCK_SIZE = 65536
+
+
+def choose_index_type(num_vectors: int) -> str:
+    """Index type "auto" resolves to for a corpus of num_vectors"""
+    for ceiling, index_type in AUTO_INDEX_CEILINGS:
+        if num_vectors < ceiling:
+            return index_type
+    return AUTO_INDEX_TOP
+
+
+def resolve_index_type(index_type: Optional[str], num_vectors: int) -> str:
+    index_type = (index_type or settings.VECTORSTORE_INDEX_TYPE).lower()
+    if index_type == "auto":
+        return choose_index_type(num_vectors)
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unsupported index type: {index_type} (expected auto or one of {INDEX_TYPES})")
+    return index_type
+
+
+def target_index_type(index, num_vectors: int) -> str:
+    """
+    Index type a compaction should rebuild to
+
+    An explicit VECTORSTORE_INDEX_TYPE always wins. Under "auto" the current
+    type is kept (including one chosen by hand with the rebuild command)
+    unless the corpus has outgrown it.
+    """
+    configured = settings.VECTORSTORE_INDEX_TYPE.lower()
+    if configured != "auto":
+        return resolve_index_type(configured, num_vectors)
+    current = index_type_of(index)
+    ladder = [index_type for _, index_type in AUTO_INDEX_CEILINGS] + [AUTO_INDEX_TOP]
+    chosen = choose_index_type(num_vectors)
+    if current not in ladder or ladder.index(current) >= ladder.index(chosen):
+        return current
+    return chosen
+
+
+def index_type_of(index) -> str:
+    """Name of a FAISS index's type, as used in INDEX_TYPES"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivfpq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    if isinstance(index, faiss.IndexPQ):
+        return "pq"
+    return "flat"
+
+
+def is_lossless(index) -> bool:
+    """Whether reconstruct() returns the exact stored vectors (no quantization)"""
+    return index_type_of(index) in ("flat", "hnsw", "ivf")
+
+
+def ivf_list_count(num_vectors: int) -> int:
+    """Inverted lists for an IVF index: ~4·sqrt(N), with enough training points per centroid"""
+    return int(max(1, min(4 * math.sqrt(num_vectors), num_vectors // TRAIN_POINTS_PER_CENTROID)))
+
+
+def pq_subquantizers(dim: int) -> int:
+    """PQ sub-vector count: the largest divisor of dim giving sub-vectors of 8+ dimensions"""
+    for m in range(max(1, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def build_index(vectors: np.ndarray, index_type: str, metric: int = faiss.METRIC_L2):
+    """
+    Build and fill a FAISS index
+
+    Args:
+        vectors: (N, d) float32 vectors, already normalized if the store normalizes
+        index_type: One of INDEX_TYPES
+        metric: faiss.METRIC_L2 or faiss.METRIC_INNER_PRODUCT (match the store)
+
+    Returns:
+        A trained index holding the vectors at positions 0..N-1
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    num_vectors, dim = vectors.shape
+    if index_type == "flat":
+        index = faiss.IndexFlat(dim, metric)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, settings.VECTORSTORE_HNSW_M, metric)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif index_type == "ivf":
+        index = faiss.IndexIVFFlat(faiss.IndexFlat(dim, metric), dim, ivf_list_count(num_vectors), metric)
+    elif index_type == "pq":
+        index = faiss.IndexPQ(dim, pq_subquantizers(dim), PQ_BITS, metric)
+    elif index_type == "ivfpq":
+        index = faiss.IndexIVFPQ(
+            faiss.IndexFlat(dim, metric), dim, ivf_list_count(num_vectors), pq_subquantizers(dim), PQ_BITS, metric
+        )
+    else:
+        raise ValueError(f"Unsupported index type: {index_type}")
+
+    if not index.is_trained:
+        needed = 2 ** PQ_BITS if index_type in ("pq", "ivfpq") else 1
+        if num_vectors < needed:
+            raise ValueError(f"A {index_type} index needs at least {needed} vectors to train, got {num_vectors}")
+        # Train on a sample; centroids and codebooks converge long before the full corpus
+        sample_size = max(needed, TRAIN_POINTS_PER_CENTROID * getattr(index, "nlist", 256))
+        if num_vectors > sample_size:
+            sample = vectors[np.random.default_rng(0).choice(num_vectors, sample_size, replace=False)]
+        else:
+            sample = vectors
+        index.train(sample)
+
+    for start in range(0, num_vectors, ADD_BLOCK_SIZE):
+        index.add(vectors[start:start + ADD_BLOCK_SIZE])
+    if index_type in ("ivf", "ivfpq"):
+        # Keeps reconstruct_n() available for compaction and rebuilds
+        index.make_direct_map()
+    set_search_params(index)
+    return index
+
+
+def set_search_params(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """
+    Apply the recall/latency knobs of an index
+
+    Args:
+        index: FAISS index (flat and PQ indexes have no knobs)
+        nprobe: Inverted lists scanned per query (IVF types)
+        ef_search: Candidate list size per query (HNSW)
+    """
+    index_type = index_type_of(index)
+    if index_type in ("ivf", "ivfpq"):
+        ivf = faiss.extract_index_ivf(index)
+        ivf.nprobe = min(nprobe or settings.VECTORSTORE_NPROBE, ivf.nlist)
+    elif index_type == "hnsw":
+        faiss.downcast_index(index).hnsw.efSearch = ef_search or settings.VECTORSTORE_EF_SEARCH
+
+
+def stored_vectors(vectorstore, embeddings=None, positions: Optional[Sequence[int]] = None) -> np.ndarray:
+    """
+    Vectors of a LangChain FAISS store, by index position
+
+    Lossless indexes are read back with reconstruct, touching only the
+    requested positions. Quantized ones only hold approximations, so their
+    chunks are re-embedded from the docstore text when embeddings are given
+    (VectorStoreManager.exact_vectors avoids that using its raw vectors).
+    """
+    index = vectorstore.index
+    if is_lossless(index) or embeddings is None:
+        if index_type_of(index) in ("ivf", "ivfpq"):
+            faiss.extract_index_ivf(index).make_direct_map()
+        if positions is None:
+            return index.reconstruct_n(0, index.ntotal)
+        return index.reconstruct_batch(np.asarray(positions, dtype=np.int64))
+    if positions is None:
+        positions = range(index.ntotal)
+
+    texts = [vectorstore.docstore.search(vectorstore.index_to_docstore_id[position]).page_content
+             for position in positions]
+    vectors = np.asarray(embeddings.embed_documents(texts), dtype=np.float32)
+    if getattr(vectorstore, "_normalize_L2", False):
+        faiss.normalize_L2(vectors)
+    return vectors
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)]))
+
+
+def benchmark(vectors: np.ndarray, index_types: Sequence[str] = INDEX_TYPES, k: int = 10,
+              num_queries: int = 200, nprobes: Sequence[int] = (1, 4, 16, 64),
+              ef_searches: Sequence[int] = (16, 64, 256), metric: int = faiss.METRIC_L2) -> List[Dict]:
+    """
+    Measure recall@k against exact search and single-query latency per index type and knob
+
+    Queries are stored vectors with a little noise added, searched one at a
+    time as the RAG node does.
+
+    Returns:
+        List of rows: type, params, build_seconds, recall, ms_per_query, bytes
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    rng = np.random.default_rng(0)
+    picks = rng.choice(len(vectors), min(num_queries, len(vectors)), replace=False)
+    queries = vectors[picks] + rng.normal(0, 0.01 * float(vectors.std()), (len(picks), vectors.shape[1])).astype(np.float32)
+
+    exact = faiss.IndexFlat(vectors.shape[1], metric)
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+
+    rows = []
+    for index_type in index_types:
+        start = time.perf_counter()
+        try:
+            index = build_index(vectors, index_type, metric)
+        except ValueError as e:
+            logger.warning(f"Skipping {index_type}: {e}")
+            continue
+        build_seconds = time.perf_counter() - start
+        size = faiss.serialize_index(index).nbytes
+
+        if index_type in ("ivf", "ivfpq"):
+            knobs = [{"nprobe": nprobe} for nprobe in nprobes]
+        elif index_type == "hnsw":
+            knobs = [{"ef_search": ef_search} for ef_search in ef_searches]
+        else:
+            knobs = [{}]
+        for knob in knobs:
+            set_search_params(index, **knob)
+            found = np.empty_like(truth)
+            start = time.perf_counter()
+            for i, query in enumerate(queries):
+                _, found[i] = index.search(query[None, :], k)
+            elapsed = time.perf_counter() - start
+            rows.append({
+                "type": index_type,
+                "params": ", ".join(f"{name}={value}" for name, value in knob.items()) or "-",
+                "build_seconds": round(build_seconds, 2),
+                "recall": round(recall_at_k(found, truth), 4),
+                "ms_per_query": round(1000 * elapsed / len(queries), 3),
+                "bytes": size,
+            })
+    return rows
+
+
+def format_rows(rows: List[Dict]) -> str:
+    header = f"{'type':<7}{'params':<16}{'build s':>9}{'recall@k':>10}{'ms/query':>10}{'MB':>9}"
+    lines = [header, "-" * len(header)]
+    for row in rows:
+        lines.append(
+            f"{row['type']:<7}{row['params']:<16}{row['build_seconds']:>9}{row['recall']:>10}"
+            f"{row['ms_per_query']:>10}{row['bytes'] / 1024 / 1024:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    """CLI: rebuild the knowledge-base index, or benchmark the index types on it"""
+    parser = argparse.ArgumentParser(description="Approximate-nearest-neighbour index tools for the vector store")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = subparsers.add_parser("rebuild", help="Train and rebuild the index, then save a snapshot")
+    rebuild.add_argument("--type", default=None, help=f"auto or one of {INDEX_TYPES} (default VECTORSTORE_INDEX_TYPE)")
+    rebuild.add_argument("--path", default=None, help="Vector store path (default VECTORSTORE_PATH)")
+
+    bench = subparsers.add_parser("benchmark", help="Recall vs latency of each index type")
+    bench.add_argument("--path", default=None, help="Vector store path (default VECTORSTORE_PATH)")
+    bench.add_argument("--synthetic", type=int, default=0, help="Use N random vectors instead of the store")
+    bench.add_argument("--dim", type=int, default=384, help="Dimensions of synthetic vectors")
+    bench.add_argument("--types", default=",".join(INDEX_TYPES))
+    bench.add_argument("--k", type=int, default=10)
+    bench.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.command == "benchmark" and args.synthetic:
+        vectors = np.random.default_rng(0).standard_normal((args.synthetic, args.dim)).astype(np.float32)
+        metric = faiss.METRIC_L2
+    else:
+        from src.agenticRAG.components.vectorstore import VectorStoreManager
+        manager = VectorStoreManager()
+        if not manager.load_vectorstore(args.path):
+            parser.error("No vector store found")
+        if args.command == "rebuild":
+            index_type = manager.rebuild_index(args.type, args.path)
+            print(f"Rebuilt {manager.vectorstore.index.ntotal} vectors as a {index_type} index")
+            return
+        vectors = manager.exact_vectors()
+        metric = manager.vectorstore.index.metric_type
+
+    types = [name.strip() for name in args.types.split(",") if name.strip()]
+    print(f"{len(vectors)} vectors, {vectors.shape[1]} dims, k={args.k}")
+    print(format_rows(benchmark(vectors, types, k=args.k, num_queries=args.queries, metric=metric)))
+
+
+if __name__ == "__main__":
+    main()
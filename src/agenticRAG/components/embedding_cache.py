@@ -0,0 +1,278 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from loguru import logger
+from src.config.settings import settings
+from src.utils.file_lock import file_lock
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_embedding_text(text: str) -> str:
+    """Canonical form of an embedding input: NFKC, collapsed whitespace, stripped"""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class EmbeddingDiskCache:
+    """
+    Persistent embedding store: a memory-mapped float32 matrix plus a key index
+
+    vectors.f32 holds one row per cached text and is only ever appended to;
+    keys.jsonl maps each key to its row. A row is readable once its key line
+    is written, so a crash mid-append loses at most that one entry. Lookups
+    read straight from the page cache through np.memmap.
+
+    Several processes (the Flask and Gradio services) may share a directory:
+    appends are serialized by a file lock, and each process picks up rows
+    the others appended before writing and on a lookup miss.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = None):
+        """
+        Initialize the disk tier
+
+        Args:
+            directory: Directory for this model's vectors (created if missing)
+            max_bytes: Size cap for the vector file; new entries are skipped beyond it
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes or settings.EMBEDDING_CACHE_DISK_MAX_MB * 1024 * 1024
+        self.vectors_path = os.path.join(directory, "vectors.f32")
+        self.keys_path = os.path.join(directory, "keys.jsonl")
+        self.meta_path = os.path.join(directory, "meta.json")
+        self.lock_path = os.path.join(directory, ".lock")
+
+        self.dim: Optional[int] = None
+        self._rows: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._map: Optional[np.memmap] = None
+        self._full = False
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        with self._lock, file_lock(self.lock_path):
+            self._load()
+        logger.info(f"Embedding disk cache loaded: {len(self._rows)} vectors from {self.directory}")
+
+    def __len__(self):
+        return len(self._rows)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            row = self._rows.get(key)
+            if row is None:
+                # Another process may have cached it since
+                self._catch_up()
+                row = self._rows.get(key)
+                if row is None:
+                    return None
+            if self._map is None or row >= self._map.shape[0]:
+                self._remap()
+            return np.array(self._map[row])
+
+    def put(self, key: str, vector: np.ndarray):
+        vector = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            if key in self._rows or self._full:
+                return
+            with file_lock(self.lock_path):
+                self._load()
+                if key in self._rows:
+                    return
+                if self.dim is None:
+                    self.dim = int(vector.shape[0])
+                    with open(self.meta_path, "w", encoding="utf-8") as f:
+                        json.dump({"dim": self.dim}, f)
+                elif vector.shape[0] != self.dim:
+                    raise ValueError(f"Embedding has {vector.shape[0]} dimensions, cache holds {self.dim}")
+                if (len(self._rows) + 1) * self.dim * 4 > self.max_bytes:
+                    self._full = True
+                    logger.warning(f"Embedding disk cache {self.directory} is full; new entries stay in memory only")
+                    return
+                row = len(self._rows)
+                with open(self.vectors_path, "ab") as f:
+                    f.write(vector.tobytes())
+                with open(self.keys_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"key": key, "row": row}) + "\n")
+                self._keys_offset = os.path.getsize(self.keys_path)
+                self._rows[key] = row
+
+    def _load(self):
+        """Catch up with the files and drop bytes no key refers to; call with the file lock held"""
+        if self.dim is None:
+            if not os.path.exists(self.meta_path):
+                return
+            with open(self.meta_path, "r", encoding="utf-8") as f:
+                self.dim = json.load(f)["dim"]
+        if not os.path.exists(self.vectors_path):
+            return
+        self._catch_up()
+        # Drop a torn key line so the next append starts on a fresh line
+        if os.path.exists(self.keys_path) and os.path.getsize(self.keys_path) > self._keys_offset:
+            with open(self.keys_path, "r+b") as f:
+                f.truncate(self._keys_offset)
+        # Drop bytes of a vector whose key never made it to the index
+        valid_bytes = len(self._rows) * self.dim * 4
+        if os.path.getsize(self.vectors_path) > valid_bytes:
+            with open(self.vectors_path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+    def _catch_up(self):
+        """Index key lines appended since the last read (by this or another process)"""
+        if self.dim is None or not os.path.exists(self.keys_path) or not os.path.exists(self.vectors_path):
+            return
+        if os.path.getsize(self.keys_path) <= self._keys_offset:
+            return
+        complete_rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        with open(self.keys_path, "rb") as f:
+            f.seek(self._keys_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # still being written, or torn by a crash
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break
+                if entry["row"] != len(self._rows) or entry["row"] >= complete_rows:
+                    break
+                self._rows[entry["key"]] = entry["row"]
+                self._keys_offset += len(line)
+
+    def _remap(self):
+        rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        self._map = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Caching wrapper around a LangChain embeddings model
+
+    Vectors are kept in an in-memory LRU keyed by model, input kind (query
+    or document) and normalized text, with an optional persistent disk tier
+    underneath. Repeated and replayed queries skip the model entirely.
+    Drop-in for FAISS and VectorStoreManager; other attributes are forwarded
+    to the wrapped model.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, max_entries: int = None,
+                 disk_dir: Optional[str] = None, cache_documents: bool = None):
+        """
+        Initialize the wrapper
+
+        Args:
+            embeddings: Model to wrap
+            model_name: Model identifier, part of every key
+            max_entries: Vectors kept in memory
+            disk_dir: Directory for the persistent tier (None disables it)
+            cache_documents: Also cache embed_documents (ingestion) results
+        """
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.max_entries = max_entries or settings.EMBEDDING_CACHE_SIZE
+        self.cache_documents = settings.EMBEDDING_CACHE_DOCUMENTS if cache_documents is None else cache_documents
+        self.disk: Optional[EmbeddingDiskCache] = None
+        if disk_dir:
+            safe_name = re.sub(r"[^A-Za-z0-9._-]+", "_", model_name)
+            self.disk = EmbeddingDiskCache(os.path.join(disk_dir, safe_name))
+
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def __getattr__(self, name):
+        # Only reached for attributes the wrapper does not define itself
+        if name == "embeddings":
+            raise AttributeError(name)
+        return getattr(self.embeddings, name)
+
+    def key(self, text: str, kind: str = "query") -> str:
+        material = "\x1f".join([self.model_name, kind, normalize_embedding_text(text)])
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.key(text)
+        vector = self._lookup(key)
+        if vector is None:
+            vector = np.asarray(self.embeddings.embed_query(text), dtype=np.float32)
+            self._store(key, vector)
+        return vector.tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        if not self.cache_documents:
+            return self.embeddings.embed_documents(texts)
+
+        keys = [self.key(text, "document") for text in texts]
+        vectors: List[Optional[np.ndarray]] = [self._lookup(key) for key in keys]
+
+        # Embed each distinct missing text once, in a single model call
+        missing: Dict[str, int] = {}
+        for index, vector in enumerate(vectors):
+            if vector is None and keys[index] not in missing:
+                missing[keys[index]] = index
+        if missing:
+            embedded = self.embeddings.embed_documents([texts[index] for index in missing.values()])
+            fresh = {}
+            for key, vector in zip(missing, embedded):
+                fresh[key] = np.asarray(vector, dtype=np.float32)
+                self._store(key, fresh[key])
+            vectors = [fresh[key] if vector is None else vector for key, vector in zip(keys, vectors)]
+        return [vector.tolist() for vector in vectors]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._memory),
+                "disk_entries": len(self.disk) if self.disk is not None else 0,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+    def clear(self):
+        """Drop the in-memory tier (the disk tier is kept)"""
+        with self._lock:
+            self._memory.clear()
+
+    def _lookup(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return vector
+        vector = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if vector is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, vector)
+        return vector
+
+    def _store(self, key: str, vector: np.ndarray):
+        with self._lock:
+            self._remember(key, vector)
+        if self.disk is not None:
+            try:
+                self.disk.put(key, vector)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not persist embedding: {e}")
+
+    def _remember(self, key: str, vector: np.ndarray):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
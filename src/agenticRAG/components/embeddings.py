@@ -1,6 +1,8 @@
+from langchain_core.embeddings import Embeddings
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_openai import OpenAIEmbeddings
 from src.config.settings import settings
+from src.agenticRAG.components.embedding_cache import CachedEmbeddings
 from typing import Union, Literal
 
 class EmbeddingFactory:
@@ -10,24 +12,36 @@ class EmbeddingFactory:
     _openai_instance = None
     
     @classmethod
-    def get_embeddings(cls, provider: Literal["huggingface", "openai"] = "huggingface") -> Union[HuggingFaceEmbeddings, OpenAIEmbeddings]:
-        """Get or create embeddings instance (singleton pattern)"""
+    def get_embeddings(cls, provider: Literal["huggingface", "openai"] = "huggingface") -> Embeddings:
+        """Get or create embeddings instance (singleton pattern), cached when EMBEDDING_CACHE_ENABLED"""
         if provider == "huggingface":
             if cls._huggingface_instance is None:
-                cls._huggingface_instance = HuggingFaceEmbeddings(
-                    model_name=settings.EMBEDDING_MODEL
+                cls._huggingface_instance = cls._with_cache(
+                    HuggingFaceEmbeddings(model_name=settings.EMBEDDING_MODEL),
+                    settings.EMBEDDING_MODEL
                 )
             return cls._huggingface_instance
         elif provider == "openai":
             if cls._openai_instance is None:
-                cls._openai_instance = OpenAIEmbeddings(
-                    model=settings.OPENAI_EMBEDDING_MODEL,
-                    openai_api_key=settings.OPENAI_API_KEY
+                cls._openai_instance = cls._with_cache(
+                    OpenAIEmbeddings(
+                        model=settings.OPENAI_EMBEDDING_MODEL,
+                        openai_api_key=settings.OPENAI_API_KEY
+                    ),
+                    settings.OPENAI_EMBEDDING_MODEL
                 )
             return cls._openai_instance
         else:
             raise ValueError(f"Unsupported provider: {provider}")
     
+    @staticmethod
+    def _with_cache(embeddings: Embeddings, model_name: str) -> Embeddings:
+        """Wrap a model in the query-embedding cache if enabled"""
+        if not settings.EMBEDDING_CACHE_ENABLED:
+            return embeddings
+        disk_dir = settings.EMBEDDING_CACHE_DIR if settings.EMBEDDING_CACHE_DISK_ENABLED else None
+        return CachedEmbeddings(embeddings, model_name, disk_dir=disk_dir)
+    
     @classmethod
     def create_new_embeddings(cls, provider: Literal["huggingface", "openai"] = "huggingface", **kwargs) -> Union[HuggingFaceEmbeddings, OpenAIEmbeddings]:
         """Create a new embeddings instance with custom parameters"""
@@ -46,15 +60,25 @@ class EmbeddingFactory:
             raise ValueError(f"Unsupported provider: {provider}")
     
     @classmethod
-    def get_huggingface_embeddings(cls) -> HuggingFaceEmbeddings:
+    def get_huggingface_embeddings(cls) -> Embeddings:
         """Convenience method to get HuggingFace embeddings"""
         return cls.get_embeddings("huggingface")
     
     @classmethod
-    def get_openai_embeddings(cls) -> OpenAIEmbeddings:
+    def get_openai_embeddings(cls) -> Embeddings:
         """Convenience method to get OpenAI embeddings"""
         return cls.get_embeddings("openai")
     
+    @classmethod
+    def cache_stats(cls) -> dict:
+        """Hit-rate metrics of the loaded cached embeddings, by provider"""
+        instances = {"huggingface": cls._huggingface_instance, "openai": cls._openai_instance}
+        return {
+            provider: instance.stats()
+            for provider, instance in instances.items()
+            if isinstance(instance, CachedEmbeddings)
+        }
+    
     @classmethod
     def reset_instances(cls):
         """Reset singleton instances (useful for testing)"""
@@ -0,0 +1,198 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from src.config.settings import settings
+from src.agenticRAG.components.document_parsing import DocumentChunker
+from src.agenticRAG.components.embedding_cache import CachedEmbeddings
+from src.agenticRAG.components.vectorstore import VectorStoreManager
+
+# Chunker of the current parse worker, reused for every file it handles
+_worker_chunker: Optional[DocumentChunker] = None
+
+
+def _init_parse_worker(chunk_size: int, chunk_overlap: int):
+    global _worker_chunker
+    _worker_chunker = DocumentChunker(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+
+
+def _parse_file(file_path: str) -> Tuple[str, List[str], Optional[str]]:
+    """Load and chunk one file in a parse worker; returns (path, chunks, error)"""
+    try:
+        return file_path, _worker_chunker.process_file(file_path), None
+    except Exception as e:
+        return file_path, [], str(e)
+
+
+def default_chunk_metadata(file_path: str, chunk_index: int, total_chunks: int) -> dict:
+    """Chunk metadata as written by store_documents_in_vectorstore"""
+    return {
+        "source": file_path,
+        "file_name": Path(file_path).name,
+        "file_extension": Path(file_path).suffix,
+        "chunk_index": chunk_index,
+    }
+
+
+class IngestionEngine:
+    """
+    Parallel knowledge-base ingestion
+
+    Files are loaded and chunked in a process pool. Chunks from all files
+    stream into one micro-batch; each full batch is embedded in a single
+    call (sentence-transformers multi-process encoding across every core
+    when the model supports it) and appended to the FAISS index as one
+    block. Small jobs that never fill a batch embed in-process and skip the
+    cost of starting encode workers.
+    """
+
+    def __init__(self, vectorstore_manager: Optional[VectorStoreManager] = None,
+                 chunk_size: int = 1000, chunk_overlap: int = 200, parse_workers: int = None,
+                 batch_size: int = None, encode_batch_size: int = None,
+                 encode_devices: Optional[List[str]] = None):
+        """
+        Initialize the engine
+
+        Args:
+            vectorstore_manager: Manager whose index receives the chunks
+            chunk_size: Size of each chunk
+            chunk_overlap: Overlap between chunks
+            parse_workers: Processes loading and chunking files (0 = all cores)
+            batch_size: Chunks embedded and appended per block, across files
+            encode_batch_size: Batch size inside each encode worker
+            encode_devices: Devices for encode workers, e.g. ["cuda:0", "cuda:1"]
+        """
+        self.vectorstore_manager = vectorstore_manager or VectorStoreManager()
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        workers = settings.INGEST_PARSE_WORKERS if parse_workers is None else parse_workers
+        self.parse_workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.encode_batch_size = encode_batch_size or settings.INGEST_ENCODE_BATCH_SIZE
+        self.encode_devices = encode_devices or [
+            device.strip() for device in settings.INGEST_ENCODE_DEVICES.split(",") if device.strip()
+        ]
+
+        self._model = None
+        self._pool = None
+
+    def ingest(self, file_paths: List[str],
+               metadata_fn: Callable[[str, int, int], dict] = default_chunk_metadata) -> Dict[str, Any]:
+        """
+        Parse, embed and index files
+
+        Args:
+            file_paths: Files to ingest
+            metadata_fn: (file_path, chunk_index, total_chunks) -> chunk metadata,
+                or None to store chunks without metadata
+
+        Returns:
+            Dict[str, Any]: Statistics in the store_documents_in_vectorstore format,
+            plus the number of embedding batches and elapsed seconds
+        """
+        start = time.monotonic()
+        results = {
+            "total_files": len(file_paths),
+            "processed_files": 0,
+            "failed_files": [],
+            "total_chunks": 0,
+            "chunks_by_file": {},
+            "embedding_batches": 0,
+        }
+        texts: List[str] = []
+        metadatas: List[dict] = []
+
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(self.parse_workers, max(1, len(file_paths))),
+                initializer=_init_parse_worker,
+                initargs=(self.chunk_size, self.chunk_overlap),
+                # Forking a process that already runs torch/tokenizers threads
+                # can deadlock the children; start clean interpreters instead
+                mp_context=multiprocessing.get_context("spawn")
+            ) as parse_pool:
+                futures = [parse_pool.submit(_parse_file, file_path) for file_path in file_paths]
+                for future in as_completed(futures):
+                    file_path, chunks, error = future.result()
+                    if error or not chunks:
+                        logger.warning(f"No chunks ingested from {file_path}{': ' + error if error else ''}")
+                        results["failed_files"].append(file_path)
+                        continue
+
+                    texts.extend(chunks)
+                    if metadata_fn is not None:
+                        metadatas.extend(metadata_fn(file_path, i, len(chunks)) for i in range(len(chunks)))
+                    results["processed_files"] += 1
+                    results["total_chunks"] += len(chunks)
+                    results["chunks_by_file"][file_path] = len(chunks)
+
+                    # Embed full blocks while the remaining files are still being parsed
+                    while len(texts) >= self.batch_size:
+                        self._flush(texts[:self.batch_size], metadatas[:self.batch_size] or None)
+                        del texts[:self.batch_size]
+                        del metadatas[:self.batch_size]
+                        results["embedding_batches"] += 1
+
+            if texts:
+                self._flush(texts, metadatas or None)
+                results["embedding_batches"] += 1
+        finally:
+            self._stop_pool()
+
+        results["seconds"] = round(time.monotonic() - start, 2)
+        logger.info(
+            f"Ingested {results['total_chunks']} chunks from {results['processed_files']} files "
+            f"in {results['embedding_batches']} batches ({results['seconds']}s)"
+        )
+        return results
+
+    def _flush(self, texts: List[str], metadatas: Optional[List[dict]]):
+        vectors = self._embed(texts)
+        self.vectorstore_manager.add_embeddings(texts, vectors, metadatas)
+        # Journal each block so pending vectors do not pile up as a second copy of the corpus
+        self.vectorstore_manager.flush()
+
+    def _embed(self, texts: List[str]):
+        model = self._sentence_transformer()
+        # Only a full block is worth starting one encode worker per core
+        if model is None or (self._pool is None and len(texts) < self.batch_size):
+            return self.vectorstore_manager.embeddings.embed_documents(texts)
+        if self._pool is None:
+            self._pool = model.start_multi_process_pool(self._target_devices())
+        encode_kwargs = getattr(self._base_embeddings(), "encode_kwargs", None) or {}
+        return model.encode_multi_process(
+            texts,
+            self._pool,
+            batch_size=self.encode_batch_size,
+            normalize_embeddings=encode_kwargs.get("normalize_embeddings", False),
+        )
+
+    def _base_embeddings(self):
+        embeddings = self.vectorstore_manager.embeddings
+        if isinstance(embeddings, CachedEmbeddings):
+            return embeddings.embeddings
+        return embeddings
+
+    def _sentence_transformer(self):
+        """The SentenceTransformer behind HuggingFaceEmbeddings, or None for other providers"""
+        if self._model is None:
+            client = getattr(self._base_embeddings(), "client", None)
+            if client is not None and hasattr(client, "encode_multi_process"):
+                self._model = client
+        return self._model
+
+    def _target_devices(self) -> List[str]:
+        if self.encode_devices:
+            return self.encode_devices
+        import torch
+        if torch.cuda.is_available():
+            return [f"cuda:{i}" for i in range(torch.cuda.device_count())]
+        return ["cpu"] * (os.cpu_count() or 1)
+
+    def _stop_pool(self):
+        if self._pool is not None:
+            self._model.stop_multi_process_pool(self._pool)
+            self._pool = None
@@ -1,57 +1,726 @@
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 from langchain_huggingface  import HuggingFaceEmbeddings
 from typing import List, Optional
 from src.config.settings import settings
 from src.agenticRAG.components.embeddings import EmbeddingFactory
+from src.agenticRAG.components.ann_index import (
+    ADD_BLOCK_SIZE, build_index, index_type_of, is_lossless, resolve_index_type, set_search_params,
+    stored_vectors, target_index_type
+)
 import os
-from typing import Dict, Any, List, Optional
+import json
+import shutil
+import threading
+import uuid
+import faiss
+from contextlib import contextmanager
+import numpy as np
+from typing import Dict, Any, List, Optional, Sequence, Set
 from pathlib import Path
 from src.agenticRAG.components.document_parsing import DocumentChunker
+from src.utils.file_lock import file_lock
+
+# Store layout: CURRENT names the live generation directory, which holds the
+# FAISS snapshot (index.faiss / index.pkl) plus the vector segment and journal
+# appended since. Stores written before generations keep these files at the root.
+CURRENT_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+GENERATION_PREFIX = "gen-"
+SEGMENT_FILE = "segment.f32"
+JOURNAL_FILE = "journal.jsonl"
+SNAPSHOT_FILES = ["index.faiss", "index.pkl"]
+RAW_VECTORS_FILE = "vectors.f32"  # unquantized vectors of a PQ snapshot, by index position
+UPLOAD_SOURCE_PREFIX = "upload:"
 
 
 class VectorStoreManager:
-    """Manager for vector store operations"""
+    """
+    Manager for vector store operations
+    
+    On disk a store is a FAISS snapshot (save_local) plus, since the last
+    snapshot, an append-only float32 vector segment and a JSONL journal of
+    the matching docstore additions. save_incremental() appends only the
+    new chunks, so an upload costs O(chunks uploaded) rather than rewriting
+    and re-pickling the whole corpus; loading replays the journal on top of
+    the snapshot. Once the journal grows past VECTORSTORE_COMPACT_ROWS or
+    VECTORSTORE_COMPACT_RATIO of the snapshot, it is folded into a fresh
+    snapshot in the background.
+    
+    Snapshots are written to a new generation directory and published by
+    atomically replacing the CURRENT pointer, so a crash leaves either the
+    old or the new generation intact. Several processes may share a path
+    (the Flask service, batch ingestion, the ann_index CLI): every write
+    holds a file lock and first catches up with the store on disk, replaying
+    journal lines other processes appended, or reloading if they published
+    a new generation.
+    
+    Chunks are indexed by source file (see source_of). delete_by_source()
+    tombstones a file's chunks and journals the deletion; searches skip
+    tombstoned chunks, and once they pass VECTORSTORE_TOMBSTONE_RATIO of the
+    index, compaction rebuilds it without them.
+    
+    The index type (flat, HNSW, IVF, PQ variants; see ann_index) follows
+    VECTORSTORE_INDEX_TYPE, "auto" choosing by corpus size at each rebuild.
+    """
     
     def __init__(self):
         self.embeddings = EmbeddingFactory.get_embeddings()
         self.vectorstore = None
+        self.path: Optional[str] = None
+        self._generation: Optional[str] = None  # generation directory loaded ("" for the store root)
+        self._journal_offset = 0  # journal bytes applied
+        self._pending: List[tuple] = []  # (ids, texts, vectors, metadatas) not yet journaled
+        self._segment_rows = 0
+        self._segment_dim = 0
+        self._segment_ids: Dict[str, int] = {}  # journaled chunk id -> segment row
+        self._raw_rows = 0  # snapshot positions with raw vectors on disk (PQ indexes)
+        self._tombstones: Set[str] = set()
+        self._sources: Dict[str, List[str]] = {}  # source file -> live docstore ids
+        self._lock = threading.RLock()
+        self._locked_path: Optional[str] = None  # path whose file lock this thread holds
+        self._compaction: Optional[threading.Thread] = None
     
     def load_vectorstore(self, path: Optional[str] = None) -> bool:
-        """Load vector store from path"""
+        """Load vector store from path (snapshot plus journal)"""
         try:
             path = path or settings.VECTORSTORE_PATH
-            if os.path.exists(path):
-                self.vectorstore = FAISS.load_local(path, self.embeddings, allow_dangerous_deserialization=True)
-                return True
-            return False
+            with self._lock:
+                if not os.path.isdir(path):
+                    self._reset(path)
+                    return False
+                with file_lock(os.path.join(path, LOCK_FILE), shared=True):
+                    self._load(path)
+                return self.vectorstore is not None
         except Exception as e:
             print(f"Error loading vectorstore: {e}")
             return False
     
     def search_documents(self, query: str, k: int = 3) -> List[str]:
         """Search for similar documents"""
+        try:
+            self.refresh()
+        except Exception as e:
+            print(f"Error refreshing vectorstore: {e}")
         if not self.vectorstore:
             return []
         
         try:
-            docs = self.vectorstore.similarity_search(query, k=k)
+            vectorstore, tombstones = self.vectorstore, self._tombstones
+            if not tombstones:
+                docs = vectorstore.similarity_search(query, k=k)
+            else:
+                # Over-fetch in doubling steps until k live chunks survive the filter;
+                # tombstones stay under VECTORSTORE_TOMBSTONE_RATIO, so one or two rounds
+                embedding = self.embeddings.embed_query(query)
+                fetch_k = 2 * k
+                while True:
+                    fetch_k = min(fetch_k, vectorstore.index.ntotal)
+                    docs = vectorstore.similarity_search_by_vector(embedding, k=fetch_k)
+                    docs = [doc for doc in docs if getattr(doc, "id", None) not in tombstones]
+                    if len(docs) >= k or fetch_k >= vectorstore.index.ntotal:
+                        break
+                    fetch_k *= 2
+                docs = docs[:k]
             return [doc.page_content for doc in docs]
         except Exception as e:
             print(f"Error searching documents: {e}")
             return []
     
+    def refresh(self) -> bool:
+        """
+        Apply writes other processes made to the loaded store
+        
+        Costs a stat and a read of CURRENT when nothing changed, so searches
+        call it every time; the Gradio service picks up knowledge-base
+        uploads and deletes made through the Flask service this way.
+        
+        Returns:
+            bool: Whether the store on disk had changed
+        """
+        path, generation = self.path, self._generation
+        if not path or generation is None:
+            return False
+        try:
+            journal_size = os.path.getsize(os.path.join(generation_dir(path, generation), JOURNAL_FILE))
+        except OSError:
+            journal_size = 0  # none yet, or the generation was just replaced
+        if current_generation(path) == generation and journal_size <= self._journal_offset:
+            return False
+        with self._lock, file_lock(os.path.join(path, LOCK_FILE), shared=True):
+            self._sync(path)
+        return True
+    
     def add_documents(self, texts: List[str], metadatas: Optional[List[dict]] = None):
         """Add documents to vector store"""
+        self.add_embeddings(texts, self.embeddings.embed_documents(texts), metadatas)
+    
+    def add_embeddings(self, texts: List[str], embeddings, metadatas: Optional[List[dict]] = None):
+        """Add documents whose vectors were already computed (one index append per call)"""
+        if not texts:
+            return
+        ids = [str(uuid.uuid4()) for _ in texts]
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            self._add(ids, texts, vectors, metadatas)
+            self._pending.append((ids, texts, vectors, metadatas))
+    
+    def sources(self) -> Dict[str, int]:
+        """Live chunk count per source file"""
+        with self._lock:
+            return {source: len(ids) for source, ids in self._sources.items() if source}
+    
+    def delete_by_source(self, source: str, path: Optional[str] = None) -> int:
+        """
+        Delete every chunk of a source file
+        
+        The chunks are tombstoned (hidden from searches at once) and the
+        deletion is journaled; compaction removes them from the index.
+        
+        Args:
+            source: Source key, see source_of (upload_source(filename) for uploads)
+            path: Store path to journal the deletion to
+            
+        Returns:
+            int: Number of chunks deleted
+        """
+        return self.delete_sources([source], path)
+    
+    def delete_uploads(self, path: Optional[str] = None) -> int:
+        """Delete every chunk uploaded through the knowledge-base service; batch-ingested files stay"""
+        path = path or self.path or settings.VECTORSTORE_PATH
+        with self._writing(path):
+            uploads = [source for source in self._sources if source.startswith(UPLOAD_SOURCE_PREFIX)]
+            return self.delete_sources(uploads, path)
+    
+    def delete_sources(self, sources: List[str], path: Optional[str] = None) -> int:
+        """Delete every chunk of several source files as one journaled deletion; returns chunks deleted"""
+        path = path or self.path or settings.VECTORSTORE_PATH
+        with self._writing(path):
+            ids = [doc_id for source in sources for doc_id in self._sources.pop(source, [])]
+            if not ids:
+                return 0
+            self._tombstones = self._tombstones | set(ids)
+            self._flush_pending(path)
+            self._append_journal(path, [{"op": "delete", "ids": ids}])
+            if self._needs_compaction():
+                self.compact_in_background(path)
+            return len(ids)
+    
+    def clear(self, path: Optional[str] = None):
+        """Delete every chunk, in memory and on disk"""
+        path = path or self.path or settings.VECTORSTORE_PATH
+        with self._writing(path):
+            self.vectorstore = None
+            self._pending = []
+            self._tombstones = set()
+            self._sources = {}
+            self._publish(path)
+    
+    def tombstone_ratio(self) -> float:
+        if not self.vectorstore or not self.vectorstore.index.ntotal:
+            return 0.0
+        return len(self._tombstones) / self.vectorstore.index.ntotal
+    
+    def save_vectorstore(self, path: Optional[str] = None):
+        """Save a full snapshot to path and reset its journal"""
+        path = path or self.path or settings.VECTORSTORE_PATH
+        with self._writing(path):
+            if self.vectorstore:
+                self._write_snapshot(path)
+    
+    def save_incremental(self, path: Optional[str] = None):
+        """
+        Persist chunks added since the last save by appending to the journal
+        
+        Compaction into a new snapshot starts in the background once the
+        journal is large enough.
+        """
+        path = path or self.path or settings.VECTORSTORE_PATH
+        with self._writing(path):
+            if not self.vectorstore or not self._pending:
+                return
+            self._flush_pending(path)
+            if self._needs_compaction():
+                self.compact_in_background(path)
+    
+    def flush(self, path: Optional[str] = None):
+        """
+        Journal chunks added since the last save, without compacting
+        
+        Bulk ingestion calls this after every block so the pending copies of
+        the vectors are written out instead of accumulating in memory. A
+        manager that has no store path yet keeps them until it is saved.
+        """
+        path = path or self.path
+        if not path:
+            return
+        with self._writing(path):
+            self._flush_pending(path)
+    
+    def compact(self, path: Optional[str] = None):
+        """Fold the journal into a fresh FAISS snapshot, dropping deleted chunks"""
+        path = path or self.path or settings.VECTORSTORE_PATH
+        with self._writing(path):
+            if self.vectorstore:
+                self._write_snapshot(path)
+                total = self.vectorstore.index.ntotal if self.vectorstore else 0
+                print(f"Vectorstore compacted: {total} vectors")
+    
+    def compact_in_background(self, path: Optional[str] = None) -> threading.Thread:
+        with self._lock:
+            if self._compaction is None or not self._compaction.is_alive():
+                self._compaction = threading.Thread(
+                    target=self.compact, args=(path,), name="vectorstore-compaction", daemon=True
+                )
+                self._compaction.start()
+            return self._compaction
+    
+    @contextmanager
+    def _writing(self, path: str):
+        """
+        Hold the write locks on path (this manager's, then the cross-process
+        file lock) and catch up with the store on disk first
+        """
+        with self._lock:
+            if self._locked_path == path:
+                # Already held further up this thread's stack
+                yield
+                return
+            with file_lock(os.path.join(path, LOCK_FILE)):
+                self._locked_path = path
+                try:
+                    if path == self.path:
+                        self._sync(path, repair=True)
+                    yield
+                finally:
+                    self._locked_path = None
+    
+    def _reset(self, path: str):
+        self.path = path
+        self.vectorstore = None
+        self._generation = current_generation(path)
+        self._journal_offset = 0
+        self._pending = []
+        self._segment_rows = 0
+        self._segment_dim = 0
+        self._segment_ids = {}
+        self._raw_rows = 0
+        self._tombstones = set()
+        self._sources = {}
+    
+    def _load(self, path: str):
+        """Load the current generation of path; call with the file lock held"""
+        directory = generation_dir(path, current_generation(path))
+        vectorstore = None
+        if os.path.exists(os.path.join(directory, "index.faiss")):
+            vectorstore = FAISS.load_local(directory, self.embeddings, allow_dangerous_deserialization=True)
+        # Searches keep using the previous index until the new one is in place
+        self._reset(path)
+        self.vectorstore = vectorstore
+        raw_path = os.path.join(directory, RAW_VECTORS_FILE)
+        if vectorstore and os.path.exists(raw_path):
+            self._raw_rows = min(os.path.getsize(raw_path) // (vectorstore.index.d * 4), vectorstore.index.ntotal)
+        self._index_sources()
+        replayed = self._replay_journal(directory)
+        if replayed:
+            print(f"Replayed {replayed} journaled chunks onto the vectorstore")
+        self.set_search_params()
+    
+    def _sync(self, path: str, repair: bool = False):
+        """
+        Catch up with changes other processes made to path; call with the file lock held
+        
+        Journal lines appended since the last read are replayed. If another
+        process published a new generation, the store is reloaded and the
+        chunks this manager has not journaled yet are added back on top.
+        
+        Args:
+            path: Store path this manager was loaded from
+            repair: Also truncate a torn journal/segment tail (exclusive lock only)
+        """
+        if current_generation(path) != self._generation:
+            pending = self._pending
+            self._load(path)
+            for ids, texts, vectors, metadatas in pending:
+                self._add(ids, texts, vectors, metadatas)
+            self._pending = pending
+            if pending:
+                print(f"Vectorstore reloaded after another process saved it; kept {len(pending)} unsaved batches")
+        else:
+            self._replay_journal(generation_dir(path, self._generation))
+        if repair:
+            self._truncate_torn_tail(generation_dir(path, self._generation))
+    
+    def _add(self, ids: List[str], texts: List[str], vectors: np.ndarray, metadatas: Optional[List[dict]]):
+        text_embeddings = list(zip(texts, vectors))
         if not self.vectorstore:
-            self.vectorstore = FAISS.from_texts(texts, self.embeddings, metadatas=metadatas)
+            self.vectorstore = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas, ids=ids)
         else:
-            self.vectorstore.add_texts(texts, metadatas=metadatas)
+            self.vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+        for doc_id, metadata in zip(ids, metadatas or [{}] * len(ids)):
+            self._sources.setdefault(source_of(metadata), []).append(doc_id)
     
-    def save_vectorstore(self, path: Optional[str] = None):
-        """Save vector store to path"""
+    def _flush_pending(self, path: str):
+        """Append pending chunks to the vector segment and the journal"""
+        if not self._pending:
+            return
+        directory = generation_dir(path, self._generation)
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, SEGMENT_FILE), "ab") as segment:
+            for _, _, vectors, _ in self._pending:
+                segment.write(vectors.tobytes())
+        # Vectors go first, so every journal line points at rows that exist
+        records = []
+        for ids, texts, vectors, metadatas in self._pending:
+            for i, (doc_id, text) in enumerate(zip(ids, texts)):
+                records.append({
+                    "op": "add",
+                    "id": doc_id,
+                    "row": self._segment_rows,
+                    "dim": int(vectors.shape[1]),
+                    "text": text,
+                    "metadata": metadatas[i] if metadatas else {},
+                })
+                self._segment_ids[doc_id] = self._segment_rows
+                self._segment_rows += 1
+                self._segment_dim = int(vectors.shape[1])
+        self._append_journal(path, records)
+        self._pending = []
+    
+    def _append_journal(self, path: str, records: List[dict]):
+        journal_path = os.path.join(generation_dir(path, self._generation), JOURNAL_FILE)
+        os.makedirs(os.path.dirname(journal_path), exist_ok=True)
+        with open(journal_path, "a", encoding="utf-8") as journal:
+            for record in records:
+                journal.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+        # The file lock is held, so everything up to here is applied
+        self._journal_offset = os.path.getsize(journal_path)
+    
+    def _needs_compaction(self) -> bool:
+        if not self.vectorstore:
+            return False
+        if self.tombstone_ratio() > settings.VECTORSTORE_TOMBSTONE_RATIO:
+            return True
+        snapshot_rows = self.vectorstore.index.ntotal - self._segment_rows
+        return (self._segment_rows >= settings.VECTORSTORE_COMPACT_ROWS or
+                self._segment_rows > settings.VECTORSTORE_COMPACT_RATIO * max(snapshot_rows, 1))
+    
+    def _index_sources(self):
+        self._sources = {}
+        if not self.vectorstore:
+            return
+        for doc_id in self.vectorstore.index_to_docstore_id.values():
+            if doc_id in self._tombstones:
+                continue
+            doc = self.vectorstore.docstore.search(doc_id)
+            self._sources.setdefault(source_of(getattr(doc, "metadata", None) or {}), []).append(doc_id)
+    
+    def rebuild_index(self, index_type: Optional[str] = None, path: Optional[str] = None) -> str:
+        """
+        Retrain and rebuild the index, then save a full snapshot
+        
+        Args:
+            index_type: 'auto' or one of ann_index.INDEX_TYPES (default VECTORSTORE_INDEX_TYPE)
+            path: Store path to save to
+            
+        Returns:
+            str: Index type built
+        """
+        path = path or self.path or settings.VECTORSTORE_PATH
+        with self._writing(path):
+            if not self.vectorstore:
+                return ""
+            index_type = resolve_index_type(index_type, self.vectorstore.index.ntotal)
+            self._write_snapshot(path, index_type)
+            return index_type if self.vectorstore else ""
+    
+    def set_search_params(self, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+        """Tune recall against latency: IVF lists probed / HNSW candidate list size per query"""
         if self.vectorstore:
-            path = path or settings.VECTORSTORE_PATH
-            self.vectorstore.save_local(path)
+            set_search_params(self.vectorstore.index, nprobe, ef_search)
+    
+    def exact_vectors(self, positions: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        Unquantized vectors of the index, by position (default: all)
+        
+        Lossless indexes are read back with reconstruct. PQ indexes only hold
+        approximations, so their vectors come from the raw vector file saved
+        with the snapshot and, for chunks added since, from the segment or
+        the pending batches. Only chunks found in none of them (a PQ store
+        saved before raw vector files existed) are re-embedded.
+        """
+        index = self.vectorstore.index
+        if positions is None:
+            positions = range(index.ntotal)
+        positions = np.asarray(positions, dtype=np.int64)
+        if is_lossless(index):
+            return stored_vectors(self.vectorstore, positions=positions)
+        
+        directory = generation_dir(self.path, self._generation)
+        vectors = np.empty((len(positions), index.d), dtype=np.float32)
+        in_raw = positions < self._raw_rows
+        if in_raw.any():
+            raw = np.memmap(os.path.join(directory, RAW_VECTORS_FILE), dtype=np.float32, mode="r",
+                            shape=(self._raw_rows, index.d))
+            vectors[in_raw] = raw[positions[in_raw]]
+        tail = np.flatnonzero(~in_raw)
+        if not len(tail):
+            return vectors
+        
+        pending = {doc_id: vector for ids, _, batch, _ in self._pending for doc_id, vector in zip(ids, batch)}
+        segment = None
+        if self._segment_rows:
+            segment = np.memmap(os.path.join(directory, SEGMENT_FILE), dtype=np.float32, mode="r",
+                                shape=(self._segment_rows, self._segment_dim))
+        found, missing = [], []
+        for i in tail:
+            doc_id = self.vectorstore.index_to_docstore_id[int(positions[i])]
+            if doc_id in pending:
+                vectors[i] = pending[doc_id]
+            elif doc_id in self._segment_ids:
+                vectors[i] = segment[self._segment_ids[doc_id]]
+            else:
+                missing.append(i)
+                continue
+            found.append(i)
+        if found and self.vectorstore._normalize_L2:
+            # Segment and pending rows are stored as embedded; the index holds them normalized
+            found_vectors = np.ascontiguousarray(vectors[found])
+            faiss.normalize_L2(found_vectors)
+            vectors[found] = found_vectors
+        if missing:
+            print(f"Re-embedding {len(missing)} chunks with no raw vectors on disk")
+            vectors[missing] = stored_vectors(self.vectorstore, self.embeddings, positions[missing])
+        return vectors
+    
+    def _rebuild(self, index_type: str) -> Optional[np.ndarray]:
+        """Rebuild the index from the live (non-tombstoned) vectors as index_type; returns those vectors"""
+        vectorstore = self.vectorstore
+        live = [
+            (position, doc_id)
+            for position, doc_id in sorted(vectorstore.index_to_docstore_id.items())
+            if doc_id not in self._tombstones
+        ]
+        purged = len(self._tombstones)
+        if not live:
+            self.vectorstore = None
+            self._tombstones = set()
+            return None
+        
+        vectors = self.exact_vectors([position for position, _ in live])
+        self.vectorstore = FAISS(
+            embedding_function=self.embeddings,
+            index=build_index(vectors, index_type, vectorstore.index.metric_type),
+            docstore=InMemoryDocstore({doc_id: vectorstore.docstore.search(doc_id) for _, doc_id in live}),
+            index_to_docstore_id={i: doc_id for i, (_, doc_id) in enumerate(live)},
+            distance_strategy=vectorstore.distance_strategy,
+            normalize_L2=vectorstore._normalize_L2,
+        )
+        self._tombstones = set()
+        print(f"Vectorstore rebuilt as {index_type} index: {len(live)} vectors, {purged} deleted chunks dropped")
+        return vectors
+    
+    def _write_snapshot(self, path: str, index_type: Optional[str] = None):
+        """
+        Publish the store as a new generation; call with the write locks held
+        
+        Args:
+            path: Store path
+            index_type: Rebuild as this type (default: only when needed, see target_index_type)
+        """
+        # The journal holding deletions is about to go, so drop the chunks for real;
+        # a corpus that outgrew its index type is rebuilt at the same time
+        vectors = None
+        if self.vectorstore:
+            rebuild = index_type is not None or bool(self._tombstones)
+            index_type = index_type or target_index_type(self.vectorstore.index, self.vectorstore.index.ntotal)
+            if rebuild or index_type != index_type_of(self.vectorstore.index):
+                vectors = self._rebuild(index_type)
+        self._publish(path, vectors)
+    
+    def _publish(self, path: str, vectors: Optional[np.ndarray] = None):
+        """
+        save_local into a new generation directory, point CURRENT at it, then drop the old one
+        
+        A PQ index is saved with its raw vectors (vectors, if the index was
+        just built from them), so later rebuilds need neither re-embedding
+        nor a full reconstruct.
+        """
+        generation = next_generation(path)
+        directory = os.path.join(path, generation)
+        shutil.rmtree(directory, ignore_errors=True)  # left over from a crash mid-write
+        os.makedirs(directory)
+        raw_rows = 0
+        if self.vectorstore:
+            self.vectorstore.save_local(directory)
+            if not is_lossless(self.vectorstore.index):
+                raw_rows = self.vectorstore.index.ntotal
+                with open(os.path.join(directory, RAW_VECTORS_FILE), "wb") as f:
+                    if vectors is not None:
+                        vectors.tofile(f)
+                    else:
+                        for start in range(0, raw_rows, ADD_BLOCK_SIZE):
+                            self.exact_vectors(range(start, min(start + ADD_BLOCK_SIZE, raw_rows))).tofile(f)
+        for name in os.listdir(directory):
+            with open(os.path.join(directory, name), "rb") as f:
+                os.fsync(f.fileno())
+        # Replacing the pointer is atomic: readers see the old generation or the new one
+        pointer = os.path.join(path, CURRENT_FILE + ".tmp")
+        with open(pointer, "w", encoding="utf-8") as f:
+            f.write(generation + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(pointer, os.path.join(path, CURRENT_FILE))
+        self._generation = generation
+        self._journal_offset = 0
+        self._pending = []
+        self._segment_rows = 0
+        self._segment_dim = 0
+        self._segment_ids = {}
+        self._raw_rows = raw_rows
+        # Nothing references older generations (or a store from before generations) any more
+        for name in os.listdir(path):
+            if name.startswith(GENERATION_PREFIX) and name != generation:
+                shutil.rmtree(os.path.join(path, name), ignore_errors=True)
+        for name in SNAPSHOT_FILES + [JOURNAL_FILE, SEGMENT_FILE]:
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+    
+    def _replay_journal(self, directory: str) -> int:
+        """Apply journal lines appended since the last replay; returns chunks added"""
+        journal_path = os.path.join(directory, JOURNAL_FILE)
+        segment_path = os.path.join(directory, SEGMENT_FILE)
+        if not os.path.exists(journal_path) or os.path.getsize(journal_path) <= self._journal_offset:
+            return 0
+        
+        segment_bytes = os.path.getsize(segment_path) if os.path.exists(segment_path) else 0
+        first_row = self._segment_rows
+        records = []
+        with open(journal_path, "rb") as f:
+            f.seek(self._journal_offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn by a crash, or still being written
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                if record["op"] == "add":
+                    if record["row"] != self._segment_rows or (record["row"] + 1) * record["dim"] * 4 > segment_bytes:
+                        break
+                    self._segment_rows += 1
+                    self._segment_dim = record["dim"]
+                records.append(record)
+                self._journal_offset += len(line)
+        
+        deleted = {doc_id for record in records if record["op"] == "delete" for doc_id in record["ids"]}
+        adds = [record for record in records if record["op"] == "add"]
+        # Chunks added and deleted within these lines are never added; earlier ones are tombstoned
+        tombstoned = deleted - {record["id"] for record in adds}
+        if tombstoned:
+            self._tombstones = self._tombstones | tombstoned
+            self._forget(tombstoned)
+        adds = [record for record in adds if record["id"] not in deleted]
+        if not adds:
+            return 0
+        dim = self._segment_dim
+        vectors = np.fromfile(
+            segment_path, dtype=np.float32, count=(self._segment_rows - first_row) * dim, offset=first_row * dim * 4
+        ).reshape(-1, dim)
+        for record in adds:
+            self._segment_ids[record["id"]] = record["row"]
+        self._add(
+            [record["id"] for record in adds],
+            [record["text"] for record in adds],
+            vectors[[record["row"] - first_row for record in adds]],
+            [record["metadata"] for record in adds],
+        )
+        return len(adds)
+    
+    def _forget(self, doc_ids: Set[str]):
+        """Drop deleted chunks from the source index"""
+        by_source: Dict[str, Set[str]] = {}
+        for doc_id in doc_ids:
+            doc = self.vectorstore.docstore.search(doc_id) if self.vectorstore else None
+            by_source.setdefault(source_of(getattr(doc, "metadata", None) or {}), set()).add(doc_id)
+        for source, gone in by_source.items():
+            live = [doc_id for doc_id in self._sources.get(source, []) if doc_id not in gone]
+            if live:
+                self._sources[source] = live
+            else:
+                self._sources.pop(source, None)
+    
+    def _truncate_torn_tail(self, directory: str):
+        """Cut journal and segment back to what replayed, so appends start on a clean line and row"""
+        journal_path = os.path.join(directory, JOURNAL_FILE)
+        segment_path = os.path.join(directory, SEGMENT_FILE)
+        if os.path.exists(journal_path) and os.path.getsize(journal_path) > self._journal_offset:
+            with open(journal_path, "r+b") as f:
+                f.truncate(self._journal_offset)
+        valid_bytes = self._segment_rows * self._segment_dim * 4
+        if os.path.exists(segment_path) and os.path.getsize(segment_path) > valid_bytes:
+            with open(segment_path, "r+b") as f:
+                f.truncate(valid_bytes)
+
+
+def source_of(metadata: dict) -> str:
+    """
+    Source key of a chunk
+    
+    Flask uploads (metadata 'filename') are keyed upload:<filename>, batch
+    ingestion by file path ('source', else 'file_name'), so deleting an
+    upload never touches a batch-ingested file with the same name.
+    """
+    if metadata.get("filename"):
+        return upload_source(metadata["filename"])
+    if metadata.get("source"):
+        return str(metadata["source"])
+    return metadata.get("file_name") or ""
+
+
+def upload_source(filename: str) -> str:
+    """Source key of a file uploaded through the knowledge-base service"""
+    return UPLOAD_SOURCE_PREFIX + filename
+
+
+def current_generation(path: str) -> str:
+    """Generation directory CURRENT points at ("" for a store without generations)"""
+    try:
+        with open(os.path.join(path, CURRENT_FILE), "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return ""
+
+
+def generation_dir(path: str, generation: str) -> str:
+    return os.path.join(path, generation) if generation else path
+
+
+def next_generation(path: str) -> str:
+    """Name for a generation newer than any in path"""
+    numbers = [0]
+    for name in os.listdir(path) if os.path.isdir(path) else []:
+        if name.startswith(GENERATION_PREFIX) and name[len(GENERATION_PREFIX):].isdigit():
+            numbers.append(int(name[len(GENERATION_PREFIX):]))
+    return f"{GENERATION_PREFIX}{max(numbers) + 1:08d}"
+
+
+# Process-wide manager for the knowledge-base service, see get_vectorstore_manager()
+_vectorstore_manager: Optional[VectorStoreManager] = None
+_vectorstore_manager_lock = threading.Lock()
+
+def get_vectorstore_manager() -> VectorStoreManager:
+    """Get the process-wide VectorStoreManager, loaded from VECTORSTORE_PATH once"""
+    global _vectorstore_manager
+    if _vectorstore_manager is None:
+        with _vectorstore_manager_lock:
+            if _vectorstore_manager is None:
+                manager = VectorStoreManager()
+                manager.load_vectorstore()
+                _vectorstore_manager = manager
+    return _vectorstore_manager
+
 
 
 
@@ -62,7 +731,8 @@ def store_documents_in_vectorstore(
     chunk_size: int = 1000,
     chunk_overlap: int = 200,
     save_path: Optional[str] = None,
-    include_metadata: bool = True
+    include_metadata: bool = True,
+    parallel: bool = False
 ) -> Dict[str, Any]:
     """
     Process documents and store them in vector store
@@ -74,6 +744,7 @@ def store_documents_in_vectorstore(
         chunk_overlap (int): Overlap between chunks
         save_path (str, optional): Path to save the vector store
         include_metadata (bool): Whether to include file metadata
+        parallel (bool): Parse files in a process pool and embed in cross-file batches
         
     Returns:
         Dict[str, Any]: Processing results with statistics
@@ -87,6 +758,11 @@ def store_documents_in_vectorstore(
     # Load existing vectorstore if available
     vectorstore_manager.load_vectorstore(save_path)
     
+    if parallel:
+        return _store_documents_parallel(
+            file_paths, vectorstore_manager, chunk_size, chunk_overlap, save_path, include_metadata
+        )
+    
     # Track processing statistics
     results = {
         "total_files": len(file_paths),
@@ -151,6 +827,30 @@ def store_documents_in_vectorstore(
         return results
 
 
+def _store_documents_parallel(
+    file_paths: List[str],
+    vectorstore_manager: VectorStoreManager,
+    chunk_size: int,
+    chunk_overlap: int,
+    save_path: Optional[str],
+    include_metadata: bool
+) -> Dict[str, Any]:
+    """store_documents_in_vectorstore through the multi-core IngestionEngine"""
+    from src.agenticRAG.components.ingestion import IngestionEngine, default_chunk_metadata
+    
+    engine = IngestionEngine(vectorstore_manager, chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    try:
+        results = engine.ingest(file_paths, default_chunk_metadata if include_metadata else None)
+        if results["total_chunks"] > 0:
+            vectorstore_manager.save_vectorstore(save_path)
+            print(f"Vector store saved with {results['total_chunks']} total chunks")
+        return results
+    except Exception as e:
+        print(f"Error in store_documents_in_vectorstore: {e}")
+        return {"total_files": len(file_paths), "processed_files": 0, "failed_files": list(file_paths),
+                "total_chunks": 0, "chunks_by_file": {}, "error": str(e)}
+
+
 def store_single_document_in_vectorstore(
     file_path: str,
     vectorstore_manager: Optional[VectorStoreManager] = None,
@@ -188,7 +888,8 @@ def batch_store_documents(
     vectorstore_manager: Optional[VectorStoreManager] = None,
     chunk_size: int = 1000,
     chunk_overlap: int = 200,
-    save_path: Optional[str] = None
+    save_path: Optional[str] = None,
+    parallel: bool = True
 ) -> Dict[str, Any]:
     """
     Process and store all documents from a directory
@@ -200,6 +901,7 @@ def batch_store_documents(
         chunk_size (int): Size of each chunk
         chunk_overlap (int): Overlap between chunks
         save_path (str, optional): Path to save the vector store
+        parallel (bool): Use the multi-core ingestion engine (see store_documents_in_vectorstore)
         
     Returns:
         Dict[str, Any]: Processing results
@@ -225,7 +927,8 @@ def batch_store_documents(
         vectorstore_manager=vectorstore_manager,
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
-        save_path=save_path
+        save_path=save_path,
+        parallel=parallel
     )
 
 
@@ -0,0 +1,205 @@
+import json
+import os
+import re
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from loguru import logger
+from src.config.settings import settings
+from src.utils.language import normalize_arabic
+
+class EmotionalState(Enum):
+    CALM = "calm"
+    ANXIOUS = "anxious"
+    DEPRESSED = "depressed"
+    ANGRY = "angry"
+    DISTRESSED = "distressed"
+
+
+# Built-in keyword lexicon, by EmotionalState value. Order is priority: on a
+# tied score the earlier state wins (the old first-match order).
+DEFAULT_LEXICON: Dict[str, List[str]] = {
+    "anxious": [
+        # Arabic
+        'قلق', 'خوف', 'توتر', 'قلقان', 'مضطرب', 'خايف', 'متوتر', 'مهموم',
+        'أشعر بالقلق', 'أخاف', 'عندي قلق', 'مش مرتاح', 'مو مرتاح',
+        # English
+        'anxiety', 'worried', 'nervous', 'anxious', 'panic', 'scared', 'fearful',
+        'feel anxious', 'feeling worried', 'i\'m scared', 'i\'m nervous'
+    ],
+    "depressed": [
+        # Arabic
+        'حزن', 'اكتئاب', 'مكتئب', 'حزين', 'يائس', 'زعلان', 'مش راضي',
+        'أشعر بالحزن', 'مو مبسوط', 'تعبان نفسياً', 'مش عارف شنو أسوي',
+        # English
+        'depressed', 'sad', 'hopeless', 'down', 'blue', 'miserable', 'unhappy',
+        'feeling down', 'feel sad', 'i\'m depressed', 'feeling hopeless'
+    ],
+    "angry": [
+        # Arabic
+        'غضب', 'غاضب', 'زعلان', 'مستاء', 'عصبي', 'متضايق', 'مش راضي',
+        'أشعر بالغضب', 'مزعوج', 'معصب', 'متنرفز',
+        # English
+        'angry', 'mad', 'frustrated', 'irritated', 'annoyed', 'upset', 'furious',
+        'feel angry', 'i\'m mad', 'feeling frustrated', 'really upset'
+    ],
+    "distressed": [
+        # Arabic
+        'ضغط', 'ضغوط', 'تعب', 'مرهق', 'تعبان', 'مش قادر', 'صعب عليّ',
+        'أشعر بالضغط', 'مرهق نفسياً', 'ما أقدر أكمل',
+        # English
+        'stress', 'stressed', 'pressure', 'overwhelmed', 'exhausted', 'burned out',
+        'feeling stressed', 'under pressure', 'can\'t cope', 'too much pressure'
+    ],
+}
+
+Lexicon = Dict[str, Union[List[str], Dict[str, float]]]
+
+
+# Latin-script keywords must match whole words (text is lowercased by normalize_arabic)
+_LATIN_LETTER = re.compile(r"[a-z]")
+
+
+class EmotionClassifier:
+    """
+    Keyword-based emotional state classifier
+
+    Keywords are compiled into one trie-shaped regex per script (ASCII and
+    the rest), so a message is scanned once per script it contains,
+    whatever the lexicon size. Every branch starts with a literal
+    character, which lets the regex engine skip positions that cannot start
+    a keyword without entering the pattern. Arabic keywords match anywhere
+    in a word (clitics like و/ب/ال attach to them); Latin keywords must be
+    whole words, so "mad" does not fire on "made".
+    Overlapping hits resolve to the leftmost, longest keyword. Every hit
+    adds its weight to each state that lists the keyword, and the scores
+    are normalized into confidences.
+    """
+
+    def __init__(self, lexicon: Optional[Lexicon] = None, default_state: str = "calm"):
+        """
+        Initialize the classifier
+
+        Args:
+            lexicon: state -> keywords, either a list (weight: one per word of
+                the keyword, so phrases count more) or a {keyword: weight} dict
+            default_state: State returned when nothing matches
+        """
+        self.default_state = default_state
+        self.states: List[str] = []
+        self._weights: Dict[str, List[Tuple[int, float]]] = {}
+        self.add_lexicon(lexicon or DEFAULT_LEXICON)
+
+    def add_lexicon(self, lexicon: Lexicon):
+        """Merge more keywords in and recompile the matcher"""
+        for state, keywords in lexicon.items():
+            if state not in self.states:
+                self.states.append(state)
+            index = self.states.index(state)
+            if not isinstance(keywords, dict):
+                keywords = {keyword: None for keyword in keywords}
+            for keyword, weight in keywords.items():
+                keyword = normalize_arabic(keyword).strip()
+                if not keyword:
+                    continue
+                if weight is None:
+                    weight = float(len(keyword.split()))
+                entries = [entry for entry in self._weights.get(keyword, []) if entry[0] != index]
+                self._weights[keyword] = entries + [(index, float(weight))]
+        self._ascii_pattern = self._compile_trie(keyword for keyword in self._weights if keyword.isascii())
+        self._other_pattern = self._compile_trie(keyword for keyword in self._weights if not keyword.isascii())
+
+    @staticmethod
+    def _compile_trie(keywords: Iterable[str]) -> re.Pattern:
+        """Compile keywords into a trie-shaped regex (shared prefixes are tried once, longest keyword wins)"""
+        trie: Dict = {}
+        for keyword in keywords:
+            fragments = [re.escape(char) for char in keyword]
+            end = ""
+            if keyword.isascii() and _LATIN_LETTER.search(keyword):
+                # The word-start check follows the first character so that
+                # every branch still begins with a literal
+                fragments.insert(1, r"(?<![a-z]" + re.escape(keyword[0]) + ")")
+                end = r"(?![a-z])"
+            node = trie
+            for fragment in fragments:
+                node = node.setdefault(fragment, {})
+            node[None] = end
+
+        def build(node: Dict) -> str:
+            branches = [fragment + build(child) for fragment, child in node.items() if fragment is not None]
+            # Ending here is tried last so the longest keyword wins
+            if None in node:
+                branches.append(node[None])
+            if len(branches) == 1:
+                return branches[0]
+            return "(?:" + "|".join(branches) + ")"
+
+        # An empty lexicon never matches
+        return re.compile(build(trie) if trie else r"(?!)")
+
+    def matches(self, text: str) -> List[str]:
+        """Keywords found in text, after normalization"""
+        text = normalize_arabic(text)
+        hits = self._ascii_pattern.findall(text)
+        if not text.isascii():
+            hits.extend(self._other_pattern.findall(text))
+        return hits
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """Raw weighted keyword score per state"""
+        totals = [0.0] * len(self.states)
+        for keyword in self.matches(text):
+            for index, weight in self._weights[keyword]:
+                totals[index] += weight
+        return dict(zip(self.states, totals))
+
+    def classify(self, text: str) -> Tuple[str, Dict[str, float]]:
+        """
+        Classify a message
+
+        Args:
+            text: User's message in Arabic or English
+
+        Returns:
+            Tuple of (state, confidences); confidences sum to 1 over the
+            states that matched and are empty when nothing matched
+        """
+        scores = self.scores(text)
+        total = sum(scores.values())
+        if total <= 0:
+            return self.default_state, {}
+        # max() keeps the first of equal scores, i.e. lexicon priority order
+        state = max(self.states, key=lambda name: scores[name])
+        confidences = {name: round(score / total, 3) for name, score in scores.items() if score > 0}
+        return state, confidences
+
+
+def load_lexicon(path: Optional[str] = None) -> Lexicon:
+    """Built-in lexicon merged with the JSON lexicon at path (EMOTION_LEXICON_PATH), if it exists"""
+    lexicon: Dict = {state: list(keywords) for state, keywords in DEFAULT_LEXICON.items()}
+    path = settings.EMOTION_LEXICON_PATH if path is None else path
+    if not path or not os.path.exists(path):
+        return lexicon
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            extra = json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not load emotion lexicon {path}: {e}")
+        return lexicon
+    known_states = {state.value for state in EmotionalState}
+    for state, keywords in extra.items():
+        if state not in known_states:
+            logger.warning(f"Ignoring emotion lexicon state '{state}' from {path}: not one of {sorted(known_states)}")
+            continue
+        current = lexicon.get(state, [])
+        if isinstance(keywords, dict) or isinstance(current, dict):
+            merged = {keyword: None for keyword in current} if isinstance(current, list) else dict(current)
+            merged.update(keywords if isinstance(keywords, dict) else {keyword: None for keyword in keywords})
+            lexicon[state] = merged
+        else:
+            lexicon[state] = current + list(keywords)
+    return lexicon
+
+
+# Built once at import; classifying a message is one regex scan per script
+emotion_classifier = EmotionClassifier(load_lexicon())
@@ -1,39 +1,79 @@
 from openai import OpenAI
+import asyncio
+import httpx
 import json
 import re
-from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Generator, Iterator, List, Optional, Tuple
 from datetime import datetime
 import os
-from enum import Enum
+from src.config.messages import ERROR_MESSAGES
+from src.config.settings import settings
+from src.agenticRAG.emotion import EmotionalState, emotion_classifier
+from src.utils.language import detect_language
 from loguru import logger
 from dotenv import load_dotenv
 load_dotenv()
 
-class EmotionalState(Enum):
-    CALM = "calm"
-    ANXIOUS = "anxious"
-    DEPRESSED = "depressed"
-    ANGRY = "angry"
-    DISTRESSED = "distressed"
+# Shared OpenAI client, see get_shared_client()
+_shared_client: Optional[OpenAI] = None
+_shared_client_lock = threading.Lock()
+
+def get_shared_client() -> OpenAI:
+    """
+    Get the process-wide OpenAI client
+    
+    All therapist sessions share its HTTP connection pool, so keep-alive
+    connections (and their TLS sessions) are reused across users.
+    """
+    global _shared_client
+    if _shared_client is None:
+        with _shared_client_lock:
+            if _shared_client is None:
+                api_key = os.getenv('OPENAI_API_KEY')
+                if not api_key:
+                    raise ValueError("OpenAI API key is required")
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                        max_keepalive_connections=settings.OPENAI_MAX_CONNECTIONS,
+                    ),
+                    timeout=httpx.Timeout(60.0, connect=10.0),
+                )
+                _shared_client = OpenAI(api_key=api_key, http_client=http_client)
+    return _shared_client
 
 class OmaniTherapistAI:
-    def __init__(self, api_key: str = None):
+    MODEL = "gpt-4.1-nano-2025-04-14"
+    TEMPERATURE = 0.7
+    
+    def __init__(self, api_key: str = None, client: Optional[OpenAI] = None):
         """
         Initialize the OMANI Therapist AI system
         
         Args:
             api_key: OpenAI API key (if not provided, will use environment variable)
+            client: Existing OpenAI client to reuse instead of creating one
         """
-        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
-        if not self.api_key:
-            raise ValueError("OpenAI API key is required")
-        
-        self.client = OpenAI(api_key=self.api_key)
+        if client is not None:
+            self.api_key = client.api_key
+            self.client = client
+        else:
+            self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+            if not self.api_key:
+                raise ValueError("OpenAI API key is required")
+            
+            self.client = OpenAI(api_key=self.api_key)
         
         # Session management
         self.conversation_history = []
         self.user_profile = {}
         self.emotional_state = EmotionalState.CALM
+        self.emotion_scores: Dict[str, float] = {}
+        self.last_response: Optional[Dict] = None
         
         # System prompt for therapeutic conversations
         self.system_prompt = self._create_system_prompt()
@@ -94,16 +134,7 @@ class OmaniTherapistAI:
         Returns:
             'arabic', 'english', or 'mixed'
         """
-        # Count Arabic vs English characters
-        arabic_chars = sum(1 for char in text if '\u0600' <= char <= '\u06FF')
-        english_chars = sum(1 for char in text if char.isalpha() and char.isascii())
-        
-        if arabic_chars > english_chars:
-            return 'arabic'
-        elif english_chars > arabic_chars:
-            return 'english'
-        else:
-            return 'mixed'
+        return detect_language(text)
     
     def analyze_emotional_state(self, user_input: str) -> Tuple[EmotionalState, str]:
         """
@@ -115,56 +146,62 @@ class OmaniTherapistAI:
         Returns:
             Tuple of (emotional_state, detected_language)
         """
-        user_input_lower = user_input.lower()
         detected_language = self.detect_language(user_input)
         
-        # Emotional state analysis using keywords (expanded for both languages)
-        anxiety_keywords = [
-            # Arabic
-            'قلق', 'خوف', 'توتر', 'قلقان', 'مضطرب', 'خايف', 'متوتر', 'مهموم',
-            'أشعر بالقلق', 'أخاف', 'عندي قلق', 'مش مرتاح', 'مو مرتاح',
-            # English
-            'anxiety', 'worried', 'nervous', 'anxious', 'panic', 'scared', 'fearful',
-            'feel anxious', 'feeling worried', 'i\'m scared', 'i\'m nervous'
-        ]
+        # One scan over all keyword lexicons; per-state confidences are kept for the response
+        state, self.emotion_scores = emotion_classifier.classify(user_input)
+        return EmotionalState(state), detected_language
+    
+    def _prepare_turn(self, user_input: str, include_history: bool) -> Tuple[EmotionalState, str, List[Dict]]:
+        """Analyze the user's message and build the API input for this turn"""
+        # Analyze emotional state and detect language
+        emotional_state, detected_language = self.analyze_emotional_state(user_input)
+        self.emotional_state = emotional_state
         
-        depression_keywords = [
-            # Arabic
-            'حزن', 'اكتئاب', 'مكتئب', 'حزين', 'يائس', 'زعلان', 'مش راضي',
-            'أشعر بالحزن', 'مو مبسوط', 'تعبان نفسياً', 'مش عارف شنو أسوي',
-            # English
-            'depressed', 'sad', 'hopeless', 'down', 'blue', 'miserable', 'unhappy',
-            'feeling down', 'feel sad', 'i\'m depressed', 'feeling hopeless'
-        ]
+        # Prepare messages for API
+        messages = [{"role": "system", "content": self.system_prompt}]
         
-        anger_keywords = [
-            # Arabic
-            'غضب', 'غاضب', 'زعلان', 'مستاء', 'عصبي', 'متضايق', 'مش راضي',
-            'أشعر بالغضب', 'مزعوج', 'معصب', 'متنرفز',
-            # English
-            'angry', 'mad', 'frustrated', 'irritated', 'annoyed', 'upset', 'furious',
-            'feel angry', 'i\'m mad', 'feeling frustrated', 'really upset'
-        ]
+        # Add language context to system prompt
+        language_instruction = f"\n\nIMPORTANT: The user is communicating in {detected_language}. Please respond in the same language they used."
+        messages[0]["content"] += language_instruction
         
-        stress_keywords = [
-            # Arabic
-            'ضغط', 'ضغوط', 'تعب', 'مرهق', 'تعبان', 'مش قادر', 'صعب عليّ',
-            'أشعر بالضغط', 'مرهق نفسياً', 'ما أقدر أكمل',
-            # English
-            'stress', 'stressed', 'pressure', 'overwhelmed', 'exhausted', 'burned out',
-            'feeling stressed', 'under pressure', 'can\'t cope', 'too much pressure'
-        ]
+        # Add conversation history if requested
+        if include_history and self.conversation_history:
+            messages.extend(self.conversation_history[-6:])  # Last 6 messages for context
+        
+        # Add current user message
+        messages.append({"role": "user", "content": user_input})
         
-        if any(keyword in user_input_lower for keyword in anxiety_keywords):
-            return EmotionalState.ANXIOUS, detected_language
-        elif any(keyword in user_input_lower for keyword in depression_keywords):
-            return EmotionalState.DEPRESSED, detected_language
-        elif any(keyword in user_input_lower for keyword in anger_keywords):
-            return EmotionalState.ANGRY, detected_language
-        elif any(keyword in user_input_lower for keyword in stress_keywords):
-            return EmotionalState.DISTRESSED, detected_language
+        return emotional_state, detected_language, messages
+    
+    def _record_turn(self, user_input: str, ai_response: str):
+        """Append a completed turn to the conversation history"""
+        self.conversation_history.append({"role": "user", "content": user_input})
+        self.conversation_history.append({"role": "assistant", "content": ai_response})
         
-        return EmotionalState.CALM, detected_language
+        # Keep only last 10 messages to manage context length
+        if len(self.conversation_history) > 10:
+            self.conversation_history = self.conversation_history[-10:]
+    
+    def _error_response(self, user_input: str, error: Exception) -> Dict:
+        """Build the bilingual error result for a failed turn"""
+        logger.error(f"Error generating response: {str(error)}")
+        
+        # Error response in detected language
+        detected_language = self.detect_language(user_input)
+        
+        if detected_language == 'english':
+            error_message = ERROR_MESSAGES["english"]
+        else:
+            error_message = ERROR_MESSAGES["arabic"]
+        
+        return {
+            "response": error_message,
+            "emotional_state": "unknown",
+            "detected_language": detected_language,
+            "timestamp": datetime.now().isoformat(),
+            "error": str(error)
+        }
     
     def generate_therapeutic_response(self, user_input: str, include_history: bool = True) -> Dict:
         """
@@ -178,67 +215,97 @@ class OmaniTherapistAI:
             Dictionary containing response and metadata
         """
         try:
-            # Analyze emotional state and detect language
-            emotional_state, detected_language = self.analyze_emotional_state(user_input)
-            self.emotional_state = emotional_state
-            
-            # Prepare messages for API
-            messages = [{"role": "system", "content": self.system_prompt}]
-            
-            # Add language context to system prompt
-            language_instruction = f"\n\nIMPORTANT: The user is communicating in {detected_language}. Please respond in the same language they used."
-            messages[0]["content"] += language_instruction
-            
-            # Add conversation history if requested
-            if include_history and self.conversation_history:
-                messages.extend(self.conversation_history[-6:])  # Last 6 messages for context
-            
-            # Add current user message
-            messages.append({"role": "user", "content": user_input})
+            emotional_state, detected_language, messages = self._prepare_turn(user_input, include_history)
             
             # Generate response using OpenAI
             response = self.client.responses.create(
-                model="gpt-4.1-nano-2025-04-14",
+                model=self.MODEL,
                 input=messages,
-                temperature=0.7,
+                temperature=self.TEMPERATURE,
             )
             logger.info(f"Generated response: {response.output_text}")
 
             ai_response = (response.output_text)
             
             # Update conversation history
-            self.conversation_history.append({"role": "user", "content": user_input})
-            self.conversation_history.append({"role": "assistant", "content": ai_response})
+            self._record_turn(user_input, ai_response)
             
-            # Keep only last 10 messages to manage context length
-            if len(self.conversation_history) > 10:
-                self.conversation_history = self.conversation_history[-10:]
-            
-            return {
+            self.last_response = {
                 "response": ai_response,
                 "emotional_state": emotional_state.value,
+                "emotion_scores": self.emotion_scores,
                 "detected_language": detected_language,
                 "timestamp": datetime.now().isoformat(),
             }
             
         except Exception as e:
-            logger.error(f"Error generating response: {str(e)}")
+            self.last_response = self._error_response(user_input, e)
+        
+        return self.last_response
+    
+    def stream_therapeutic_response(self, user_input: str, include_history: bool = True,
+                                    lock: Optional[threading.Lock] = None) -> Generator[str, None, Dict]:
+        """
+        Stream a therapeutic response as text deltas
+        
+        Once the iterator is exhausted, self.last_response holds the same
+        dictionary generate_therapeutic_response would have returned (it is
+        also the generator's return value). Closing the generator early
+        closes the model stream and leaves the history untouched.
+        
+        Args:
+            user_input: User's message
+            include_history: Whether to include conversation history
+            lock: Held while the history is read and recorded, but not
+                while the model streams
+            
+        Yields:
+            Response text deltas as the model generates them
+        """
+        lock = lock or nullcontext()
+        parts = []
+        try:
+            with lock:
+                emotional_state, detected_language, messages = self._prepare_turn(user_input, include_history)
+                emotion_scores = self.emotion_scores
             
-            # Error response in detected language
-            detected_language = self.detect_language(user_input)
+            stream = self.client.responses.create(
+                model=self.MODEL,
+                input=messages,
+                temperature=self.TEMPERATURE,
+                stream=True,
+            )
+            try:
+                for event in stream:
+                    if event.type == "response.output_text.delta" and event.delta:
+                        parts.append(event.delta)
+                        yield event.delta
+            finally:
+                stream.close()
             
-            if detected_language == 'english':
-                error_message = "Sorry, a technical error occurred. Please try again or contact a specialist."
-            else:
-                error_message = "آسف، حدث خطأ تقني. يرجى المحاولة مرة أخرى أو التواصل مع المختص."
+            ai_response = "".join(parts)
+            logger.info(f"Generated response: {ai_response}")
             
-            return {
-                "response": error_message,
-                "emotional_state": "unknown",
-                "detected_language": detected_language,
-                "timestamp": datetime.now().isoformat(),
-                "error": str(e)
-            }
+            with lock:
+                self._record_turn(user_input, ai_response)
+                
+                self.last_response = response = {
+                    "response": ai_response,
+                    "emotional_state": emotional_state.value,
+                    "emotion_scores": emotion_scores,
+                    "detected_language": detected_language,
+                    "timestamp": datetime.now().isoformat(),
+                }
+            
+        except Exception as e:
+            self.last_response = response = self._error_response(user_input, e)
+            if parts:
+                # Keep what the user already heard
+                response["response"] = "".join(parts)
+            else:
+                yield response["response"]
+        
+        return response
     
     def get_conversation_summary(self) -> Dict:
         """Get summary of current conversation session"""
@@ -253,6 +320,7 @@ class OmaniTherapistAI:
         """Clear conversation history and reset state"""
         self.conversation_history = []
         self.emotional_state = EmotionalState.CALM
+        self.emotion_scores = {}
         logger.info("Conversation cleared")
     
     def export_conversation(self, filename: str = None) -> str:
@@ -271,6 +339,164 @@ class OmaniTherapistAI:
         
         return filename
 
+    def memory_footprint(self) -> int:
+        """Approximate bytes held by this session's conversation state"""
+        return sum(
+            len(message.get("content", "").encode("utf-8")) + 64
+            for message in self.conversation_history
+        )
+
+
+class _TherapistSession:
+    """Pool entry: one therapist plus its bookkeeping"""
+    
+    def __init__(self, therapist: OmaniTherapistAI):
+        self.therapist = therapist
+        self.last_used = time.monotonic()
+        self.size = 0
+        self.lock = threading.Lock()
+
+
+class TherapistSessionManager:
+    """
+    Pool of OmaniTherapistAI instances keyed by (Gradio) session id
+    
+    Sessions are evicted least-recently-used first when the pool exceeds
+    max_sessions or max_total_bytes, and when idle for longer than idle_ttl.
+    All therapists share one OpenAI client and connection pool.
+    """
+    
+    def __init__(self, max_sessions: int = None, idle_ttl: float = None,
+                 max_total_bytes: int = None, client: Optional[OpenAI] = None):
+        """
+        Initialize the session manager
+        
+        Args:
+            max_sessions: Maximum number of live sessions
+            idle_ttl: Seconds of inactivity after which a session is dropped
+            max_total_bytes: Cap on the combined conversation history size
+            client: OpenAI client to share (defaults to get_shared_client())
+        """
+        self.max_sessions = max_sessions or settings.THERAPIST_MAX_SESSIONS
+        self.idle_ttl = idle_ttl or settings.THERAPIST_SESSION_TTL_SECONDS
+        self.max_total_bytes = max_total_bytes or settings.THERAPIST_MAX_MEMORY_MB * 1024 * 1024
+        self._client = client
+        self._sessions: "OrderedDict[str, _TherapistSession]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+    
+    @contextmanager
+    def session(self, session_id: str) -> Iterator[OmaniTherapistAI]:
+        """
+        Check out the therapist for a session
+        
+        Turns within one session are serialized so its history stays ordered;
+        different sessions run concurrently.
+        """
+        with self.checkout(session_id) as entry, entry.lock:
+            yield entry.therapist
+    
+    @contextmanager
+    def checkout(self, session_id: str) -> Iterator[_TherapistSession]:
+        """
+        Check out a session's pool entry without taking its lock
+        
+        For callers that only need entry.lock around parts of a turn, such
+        as streaming, which must not hold it while the model generates.
+        """
+        entry = self._acquire(session_id)
+        try:
+            yield entry
+        finally:
+            self._release(session_id, entry)
+    
+    def remove(self, session_id: str) -> bool:
+        """Drop a session (e.g. on clear or disconnect)"""
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            if entry is None:
+                return False
+            self._total_bytes -= entry.size
+        logger.info(f"Therapist session removed: {session_id}")
+        return True
+    
+    def evict_expired(self) -> int:
+        """Drop sessions idle for longer than idle_ttl"""
+        with self._lock:
+            return self._evict_expired_locked(time.monotonic())
+    
+    def stats(self) -> Dict:
+        """Pool size and memory usage"""
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "total_bytes": self._total_bytes,
+                "max_sessions": self.max_sessions,
+                "max_total_bytes": self.max_total_bytes,
+                "evictions": self.evictions,
+            }
+    
+    def _acquire(self, session_id: str) -> _TherapistSession:
+        with self._lock:
+            now = time.monotonic()
+            self._evict_expired_locked(now)
+            
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                client = self._client or get_shared_client()
+                entry = _TherapistSession(OmaniTherapistAI(client=client))
+                self._sessions[session_id] = entry
+                self._evict_lru_locked(keep=session_id)
+            else:
+                self._sessions.move_to_end(session_id)
+            entry.last_used = now
+            return entry
+    
+    def _release(self, session_id: str, entry: _TherapistSession):
+        with self._lock:
+            entry.last_used = time.monotonic()
+            if self._sessions.get(session_id) is not entry:
+                # Evicted or removed while in use
+                return
+            size = entry.therapist.memory_footprint()
+            self._total_bytes += size - entry.size
+            entry.size = size
+            self._evict_lru_locked(keep=session_id)
+    
+    def _evict_expired_locked(self, now: float) -> int:
+        expired = [
+            session_id for session_id, entry in self._sessions.items()
+            if now - entry.last_used > self.idle_ttl
+        ]
+        for session_id in expired:
+            self._total_bytes -= self._sessions.pop(session_id).size
+        self.evictions += len(expired)
+        return len(expired)
+    
+    def _evict_lru_locked(self, keep: str):
+        while (len(self._sessions) > self.max_sessions or self._total_bytes > self.max_total_bytes):
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._total_bytes -= self._sessions.pop(oldest).size
+            self.evictions += 1
+            logger.info(f"Therapist session evicted: {oldest}")
+
+
+# Process-wide session pool, see get_session_manager()
+_session_manager: Optional[TherapistSessionManager] = None
+_session_manager_lock = threading.Lock()
+
+def get_session_manager() -> TherapistSessionManager:
+    """Get the process-wide therapist session pool"""
+    global _session_manager
+    if _session_manager is None:
+        with _session_manager_lock:
+            if _session_manager is None:
+                _session_manager = TherapistSessionManager()
+    return _session_manager
+
 # Helper function for easy integration
 def get_therapy_response(user_input: str, api_key: str = None) -> Dict:
     """
@@ -287,15 +513,65 @@ def get_therapy_response(user_input: str, api_key: str = None) -> Dict:
     return therapist.generate_therapeutic_response(user_input)
 
 
-def gpt_response(query):
-    therapist = OmaniTherapistAI()
-    response = therapist.generate_therapeutic_response(query)
+def gpt_response(query, session_id: Optional[str] = None):
+    """
+    Get a therapeutic response, keeping conversation memory per session
+    
+    Args:
+        query: User's message
+        session_id: Session key (e.g. Gradio session hash); without one the
+            turn is answered statelessly
+    """
+    if session_id is None:
+        therapist = OmaniTherapistAI(client=get_shared_client())
+        response = therapist.generate_therapeutic_response(query)
+    else:
+        with get_session_manager().session(session_id) as therapist:
+            response = therapist.generate_therapeutic_response(query)
     print(f"AI Response: {response['response']}")
     print(f"Emotional State: {response['emotional_state']}")
     print(f"Detected Language: {response['detected_language']}")
     return response
 
 
+async def gpt_response_async(query, session_id: Optional[str] = None):
+    """Async variant of gpt_response; the blocking call runs in a worker thread"""
+    return await asyncio.to_thread(gpt_response, query, session_id)
+
+
+def _response_events(stream: Generator[str, None, Dict]) -> Iterator[Dict]:
+    """Wrap stream_therapeutic_response() into delta events plus one final event"""
+    try:
+        while True:
+            try:
+                delta = next(stream)
+            except StopIteration as done:
+                yield {"type": "final", "response": done.value}
+                return
+            yield {"type": "delta", "text": delta}
+    finally:
+        stream.close()
+
+
+def gpt_response_stream(query, session_id: Optional[str] = None) -> Iterator[Dict]:
+    """
+    Stream a therapeutic response, keeping conversation memory per session
+    
+    Yields {"type": "delta", "text": ...} events while the model generates,
+    then one {"type": "final", "response": {...}} event with the metadata
+    gpt_response() returns. Closing the iterator stops generation.
+    """
+    if session_id is None:
+        therapist = OmaniTherapistAI(client=get_shared_client())
+        yield from _response_events(therapist.stream_therapeutic_response(query))
+        return
+    
+    # The session lock only covers reading and recording history, so a
+    # superseded turn that is still streaming never blocks the next one
+    with get_session_manager().checkout(session_id) as entry:
+        yield from _response_events(entry.therapist.stream_therapeutic_response(query, lock=entry.lock))
+
+
 # Example usage and testing
 if __name__ == "__main__":
     # Test the system
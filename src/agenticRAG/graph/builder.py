@@ -1,28 +1,34 @@
+from typing import Optional
 from langgraph.graph import StateGraph, END
 from src.agenticRAG.models.state import AgentState
-from src.agenticRAG.nodes.query_upgrader import query_upgrader_node
-from src.agenticRAG.nodes.query_router import query_router_node
-from src.agenticRAG.nodes.rag_node import rag_node
-from src.agenticRAG.nodes.web_search_node import web_search_node
-from src.agenticRAG.nodes.direct_llm_node import direct_llm_node
+from src.agenticRAG.graph.registry import NodeRegistry
 from src.agenticRAG.graph.router import route_query
 
 class GraphBuilder:
     """Builder for the AgenticRAG graph"""
     
     @staticmethod
-    def create_graph():
-        """Create the LangGraph workflow"""
+    def create_graph(registry: Optional[NodeRegistry] = None):
+        """
+        Create the LangGraph workflow
+        
+        Args:
+            registry: Node registry providing long-lived node processors.
+                A new one is created if not provided; pass your own to keep
+                access to its warmup/reload hooks.
+        """
+        
+        registry = registry or NodeRegistry()
         
         # Initialize graph
         workflow = StateGraph(AgentState)
         
         # Add nodes
-        workflow.add_node("query_upgrader", query_upgrader_node)
-        workflow.add_node("query_router", query_router_node)
-        workflow.add_node("rag_path", rag_node)
-        workflow.add_node("web_search", web_search_node)
-        workflow.add_node("direct_llm", direct_llm_node)
+        workflow.add_node("query_upgrader", registry.node("query_upgrader"))
+        workflow.add_node("query_router", registry.node("query_router"))
+        workflow.add_node("rag_path", registry.node("rag_path"))
+        workflow.add_node("web_search", registry.node("web_search"))
+        workflow.add_node("direct_llm", registry.node("direct_llm"))
         
         # Set entry point
         workflow.set_entry_point("query_upgrader")
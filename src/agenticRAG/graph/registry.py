@@ -0,0 +1,106 @@
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional
+from loguru import logger
+from src.agenticRAG.models.state import AgentState
+from src.agenticRAG.nodes.query_upgrader import QueryUpgrader
+from src.agenticRAG.nodes.query_router import QueryRouter
+from src.agenticRAG.nodes.rag_node import RAGNode
+from src.agenticRAG.nodes.web_search_node import WebSearchNode
+from src.agenticRAG.nodes.direct_llm_node import DirectLLMNode
+
+class NodeRegistry:
+    """Dependency container holding one long-lived processor per graph node"""
+
+    # Graph node name -> (processor class, processing method)
+    NODE_SPECS = {
+        "query_upgrader": (QueryUpgrader, "upgrade_query"),
+        "query_router": (QueryRouter, "route_query"),
+        "rag_path": (RAGNode, "process_rag"),
+        "web_search": (WebSearchNode, "process_web_search"),
+        "direct_llm": (DirectLLMNode, "process_direct_llm"),
+    }
+
+    def __init__(self, factories: Optional[Dict[str, Callable[[], Any]]] = None):
+        """
+        Initialize the registry
+
+        Args:
+            factories: Optional overrides mapping node name to a zero-argument
+                factory, e.g. to inject fakes in tests
+        """
+        self._factories = {name: spec[0] for name, spec in self.NODE_SPECS.items()}
+        if factories:
+            unknown = set(factories) - set(self.NODE_SPECS)
+            if unknown:
+                raise ValueError(f"Unknown graph nodes: {sorted(unknown)}")
+            self._factories.update(factories)
+
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def get(self, name: str) -> Any:
+        """Get the processor for a node, building it on first use"""
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                instance = self._build(name)
+                self._instances[name] = instance
+            return instance
+
+    def node(self, name: str) -> Callable[[AgentState], AgentState]:
+        """
+        Get a bound node callable for LangGraph
+
+        The callable resolves the processor on every call, so a reload
+        takes effect without recompiling the graph.
+        """
+        if name not in self.NODE_SPECS:
+            raise ValueError(f"Unknown graph node: {name}")
+        method_name = self.NODE_SPECS[name][1]
+
+        def run_node(state: AgentState) -> AgentState:
+            return getattr(self.get(name), method_name)(state)
+
+        run_node.__name__ = f"{name}_node"
+        return run_node
+
+    def warmup(self, names: Optional[Iterable[str]] = None):
+        """Build processors ahead of the first query"""
+        for name in names or self.NODE_SPECS:
+            self.get(name)
+        logger.info("Graph node processors warmed up")
+
+    def reload(self, name: Optional[str] = None):
+        """
+        Rebuild one node processor (or all of them)
+
+        The replacement is built outside the lock and swapped in atomically;
+        calls already in flight finish on the old instance.
+        """
+        names = [name] if name else list(self.NODE_SPECS)
+        for node_name in names:
+            instance = self._build(node_name)
+            with self._lock:
+                self._instances[node_name] = instance
+            logger.info(f"Reloaded graph node processor: {node_name}")
+
+    def reload_vectorstore(self, path: Optional[str] = None) -> bool:
+        """Reload the FAISS index used by the RAG node, if it has been built"""
+        rag_processor = self._instances.get("rag_path")
+        if rag_processor is None:
+            return False
+        return rag_processor.reload_vectorstore(path)
+
+    def is_loaded(self, name: str) -> bool:
+        """Check whether a node processor has been built"""
+        return name in self._instances
+
+    def _build(self, name: str) -> Any:
+        if name not in self._factories:
+            raise ValueError(f"Unknown graph node: {name}")
+        logger.info(f"Building graph node processor: {name}")
+        return self._factories[name]()
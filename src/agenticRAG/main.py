@@ -1,11 +1,20 @@
 import time
-from typing import List
+import threading
+from typing import List, Optional
 from src.config.settings import settings
 from src.agenticRAG.models.state import AgentState
 from src.agenticRAG.models.schemas import QueryRequest, QueryResponse
 from src.agenticRAG.graph.builder import GraphBuilder
+from src.agenticRAG.graph.registry import NodeRegistry
+from src.agenticRAG.components.embeddings import EmbeddingFactory
+from src.agenticRAG.components.llm_factory import LLMFactory
 from loguru import logger
 
+# Process-wide system instance, see get_system()
+_system: Optional["AgenticRAGSystem"] = None
+_system_lock = threading.Lock()
+_ready = threading.Event()
+
 class AgenticRAGSystem:
     """Main AgenticRAG system"""
     
@@ -13,11 +22,25 @@ class AgenticRAGSystem:
         # Validate settings
         settings.validate()
         
-        # Create graph
-        self.app = GraphBuilder.create_graph()
+        # Create graph with long-lived node processors
+        self.registry = NodeRegistry()
+        self.app = GraphBuilder.create_graph(self.registry)
         
         logger.info("AgenticRAG system initialized successfully")
     
+    def warmup(self):
+        """Pre-load the embedding model, FAISS index and LLM clients"""
+        
+        start_time = time.time()
+        EmbeddingFactory.get_embeddings()
+        LLMFactory.get_llm()
+        self.registry.warmup()
+        logger.info(f"AgenticRAG system warmed up in {time.time() - start_time:.2f}s")
+    
+    def reload_knowledge_base(self, path: Optional[str] = None) -> bool:
+        """Reload the FAISS index after the knowledge base changed on disk"""
+        return self.registry.reload_vectorstore(path)
+    
     def process_query(self, query: str) -> QueryResponse:
         """Process a single query"""
         
@@ -63,17 +86,54 @@ class AgenticRAGSystem:
         
         return responses
 
+def get_system() -> AgenticRAGSystem:
+    """Get the process-wide AgenticRAG system, creating it on first use"""
+    
+    global _system
+    if _system is None:
+        with _system_lock:
+            if _system is None:
+                _system = AgenticRAGSystem()
+    return _system
+
+def warmup() -> AgenticRAGSystem:
+    """Create the shared system and pre-load its models; marks it ready"""
+    
+    system = get_system()
+    if not _ready.is_set():
+        with _system_lock:
+            if not _ready.is_set():
+                system.warmup()
+                _ready.set()
+    return system
+
+def warmup_in_background() -> threading.Thread:
+    """Run warmup() on a daemon thread so app startup is not blocked"""
+    
+    def _run():
+        try:
+            warmup()
+        except Exception as e:
+            logger.error(f"AgenticRAG warmup failed: {e}")
+    
+    thread = threading.Thread(target=_run, name="agenticrag-warmup", daemon=True)
+    thread.start()
+    return thread
+
+def is_ready() -> bool:
+    """Whether the shared system has finished warming up"""
+    return _ready.is_set()
+
 def agenticRAGResponse(query: str) -> QueryResponse:
     """Function to get response for a single query"""
     
-    system = AgenticRAGSystem()
-    return system.process_query(query)
+    return get_system().process_query(query)
 
 def main():
     """Main function"""
     
     # Initialize system
-    system = AgenticRAGSystem()
+    system = warmup()
     
     # Test queries
     test_queries = [
@@ -1,6 +1,7 @@
+from typing import Optional
 from src.agenticRAG.models.state import AgentState
 from src.agenticRAG.components.llm_factory import LLMFactory
-from src.agenticRAG.components.vectorstore import VectorStoreManager
+from src.agenticRAG.components.vectorstore import get_vectorstore_manager
 from src.agenticRAG.prompt.prompts import Prompts
 
 class RAGNode:
@@ -8,11 +9,13 @@ class RAGNode:
     
     def __init__(self):
         self.llm = LLMFactory.get_llm()
-        self.vectorstore_manager = VectorStoreManager()
+        # Shared with the knowledge-base endpoints, so their uploads and deletes apply here at once
+        self.vectorstore_manager = get_vectorstore_manager()
         self.prompt = Prompts.RAG_RESPONSE
-        
-        # Load vectorstore
-        self.vectorstore_manager.load_vectorstore()
+    
+    def reload_vectorstore(self, path: Optional[str] = None) -> bool:
+        """Reload the vectorstore from disk"""
+        return self.vectorstore_manager.load_vectorstore(path)
     
     def process_rag(self, state: AgentState) -> AgentState:
         """Process RAG path - retrieve from knowledge base"""
@@ -0,0 +1,5 @@
+# Replies used when a turn fails, by detected language
+ERROR_MESSAGES = {
+    "english": "Sorry, a technical error occurred. Please try again or contact a specialist.",
+    "arabic": "آسف، حدث خطأ تقني. يرجى المحاولة مرة أخرى أو التواصل مع المختص.",
+}
@@ -1,4 +1,5 @@
 import os
+import tempfile
 from typing import Dict, Any
 from dotenv import load_dotenv
 load_dotenv()
@@ -22,8 +23,32 @@ class Settings:
     # Embedding Model
     EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
     OPENAI_EMBEDDING_MODEL = "text-embedding-3-large"
+    # Embedding cache: in-memory LRU with an optional persistent (memory-mapped) tier
+    EMBEDDING_CACHE_ENABLED: bool = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+    EMBEDDING_CACHE_SIZE: int = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+    EMBEDDING_CACHE_DOCUMENTS: bool = os.getenv("EMBEDDING_CACHE_DOCUMENTS", "false").lower() == "true"
+    EMBEDDING_CACHE_DISK_ENABLED: bool = os.getenv("EMBEDDING_CACHE_DISK_ENABLED", "false").lower() == "true"
+    EMBEDDING_CACHE_DIR: str = os.getenv("EMBEDDING_CACHE_DIR", "data/embedding_cache")
+    EMBEDDING_CACHE_DISK_MAX_MB: int = int(os.getenv("EMBEDDING_CACHE_DISK_MAX_MB", "256"))
     # Vector Store
     VECTORSTORE_PATH: str = "data/vectorstore"
+    # Journal size that triggers compaction into a new snapshot: rows, or fraction of the snapshot
+    VECTORSTORE_COMPACT_ROWS: int = int(os.getenv("VECTORSTORE_COMPACT_ROWS", "20000"))
+    VECTORSTORE_COMPACT_RATIO: float = float(os.getenv("VECTORSTORE_COMPACT_RATIO", "0.25"))
+    # Share of deleted (tombstoned) vectors that triggers a rebuild of the index
+    VECTORSTORE_TOMBSTONE_RATIO: float = float(os.getenv("VECTORSTORE_TOMBSTONE_RATIO", "0.2"))
+    # ANN index: "auto" (by corpus size), "flat", "hnsw", "ivf", "pq" or "ivfpq"; applied on rebuild/compaction
+    VECTORSTORE_INDEX_TYPE: str = os.getenv("VECTORSTORE_INDEX_TYPE", "auto")
+    VECTORSTORE_NPROBE: int = int(os.getenv("VECTORSTORE_NPROBE", "16"))  # IVF lists scanned per query
+    VECTORSTORE_EF_SEARCH: int = int(os.getenv("VECTORSTORE_EF_SEARCH", "64"))  # HNSW candidates per query
+    VECTORSTORE_HNSW_M: int = int(os.getenv("VECTORSTORE_HNSW_M", "32"))
+    
+    # Knowledge-base ingestion: parse workers (0 = all cores), cross-file embedding batch,
+    # sentence-transformers encode batch and devices ("" = every GPU, else one process per CPU core)
+    INGEST_PARSE_WORKERS: int = int(os.getenv("INGEST_PARSE_WORKERS", "0"))
+    INGEST_BATCH_SIZE: int = int(os.getenv("INGEST_BATCH_SIZE", "1024"))
+    INGEST_ENCODE_BATCH_SIZE: int = int(os.getenv("INGEST_ENCODE_BATCH_SIZE", "64"))
+    INGEST_ENCODE_DEVICES: str = os.getenv("INGEST_ENCODE_DEVICES", "")
     
     # Search Configuration
     SEARCH_RESULTS_COUNT: int = 5
@@ -37,6 +62,122 @@ class Settings:
     # Routing Configuration
     DEFAULT_ROUTE: str = "DIRECT"
     
+    # Therapist Sessions
+    THERAPIST_MAX_SESSIONS: int = int(os.getenv("THERAPIST_MAX_SESSIONS", "500"))
+    THERAPIST_SESSION_TTL_SECONDS: float = float(os.getenv("THERAPIST_SESSION_TTL_SECONDS", "1800"))
+    THERAPIST_MAX_MEMORY_MB: int = int(os.getenv("THERAPIST_MAX_MEMORY_MB", "64"))
+    OPENAI_MAX_CONNECTIONS: int = int(os.getenv("OPENAI_MAX_CONNECTIONS", "100"))
+    
+    # Emotion keyword lexicon: JSON {state: [keywords] or {keyword: weight}} merged into the built-in one
+    EMOTION_LEXICON_PATH: str = os.getenv("EMOTION_LEXICON_PATH", "data/emotion_lexicon.json")
+    
+    # Voice Pipeline
+    VOICE_STREAMING: bool = os.getenv("VOICE_STREAMING", "true").lower() == "true"
+    
+    # TTS audio cache (content-addressed, sentence granularity)
+    TTS_CACHE_ENABLED: bool = os.getenv("TTS_CACHE_ENABLED", "true").lower() == "true"
+    TTS_CACHE_DIR: str = os.getenv("TTS_CACHE_DIR", "data/tts_cache")
+    TTS_CACHE_MAX_MB: int = int(os.getenv("TTS_CACHE_MAX_MB", "256"))
+    TTS_CACHE_MEMORY_MB: int = int(os.getenv("TTS_CACHE_MEMORY_MB", "16"))
+    TTS_PREFETCH_ON_START: bool = os.getenv("TTS_PREFETCH_ON_START", "true").lower() == "true"
+    TTS_PREFETCH_PHRASES_PATH: str = os.getenv("TTS_PREFETCH_PHRASES_PATH", "data/tts_prefetch_phrases.json")
+    
+    # TTS routing: backends per script in order of preference, e.g. "elevenlabs,gtts,local"
+    TTS_ARABIC_BACKEND: str = os.getenv("TTS_ARABIC_BACKEND", "gtts")
+    TTS_ENGLISH_BACKEND: str = os.getenv("TTS_ENGLISH_BACKEND", "gtts")
+    TTS_PREFER_FASTEST: bool = os.getenv("TTS_PREFER_FASTEST", "false").lower() == "true"
+    TTS_BACKEND_TIMEOUT_SECONDS: float = float(os.getenv("TTS_BACKEND_TIMEOUT_SECONDS", "8"))
+    TTS_MAX_WORKERS: int = int(os.getenv("TTS_MAX_WORKERS", "4"))
+    TTS_MAX_CONNECTIONS: int = int(os.getenv("TTS_MAX_CONNECTIONS", "10"))
+    TTS_RETRIES: int = int(os.getenv("TTS_RETRIES", "1"))
+    
+    # TTS output: "memory" hands MP3 bytes to Gradio, "spool" writes to a bounded spool directory
+    TTS_OUTPUT: str = os.getenv("TTS_OUTPUT", "memory")
+    TTS_SPOOL_DIR: str = os.getenv("TTS_SPOOL_DIR", os.path.join(tempfile.gettempdir(), "tts_spool"))
+    TTS_SPOOL_MAX_MB: int = int(os.getenv("TTS_SPOOL_MAX_MB", "64"))
+    TTS_SPOOL_MAX_FILES: int = int(os.getenv("TTS_SPOOL_MAX_FILES", "500"))
+    TTS_SPOOL_MAX_AGE_SECONDS: float = float(os.getenv("TTS_SPOOL_MAX_AGE_SECONDS", "900"))
+    GRADIO_CACHE_CLEAN_SECONDS: int = int(os.getenv("GRADIO_CACHE_CLEAN_SECONDS", "600"))
+    GRADIO_CACHE_MAX_AGE_SECONDS: int = int(os.getenv("GRADIO_CACHE_MAX_AGE_SECONDS", "1800"))
+    
+    # ElevenLabs TTS
+    ELEVENLABS_VOICE_ID: str = os.getenv("ELEVENLABS_VOICE_ID", "9BWtsMINqrJLrRacOk9x")  # "Aria"
+    ELEVENLABS_VOICE_ID_AR: str = os.getenv("ELEVENLABS_VOICE_ID_AR", "")  # Falls back to ELEVENLABS_VOICE_ID
+    ELEVENLABS_MODEL: str = os.getenv("ELEVENLABS_MODEL", "eleven_turbo_v2_5")  # Multilingual, includes Arabic
+    ELEVENLABS_OUTPUT_FORMAT: str = os.getenv("ELEVENLABS_OUTPUT_FORMAT", "mp3_22050_32")
+    
+    # Local offline TTS (pyttsx3); voices are matched against installed voice ids/names
+    LOCAL_TTS_VOICE_AR: str = os.getenv("LOCAL_TTS_VOICE_AR", "arabic")
+    LOCAL_TTS_VOICE_EN: str = os.getenv("LOCAL_TTS_VOICE_EN", "english")
+    LOCAL_TTS_RATE: int = int(os.getenv("LOCAL_TTS_RATE", "170"))
+    
+    # Turn executor: per-stage concurrency limits and timeouts
+    STT_CONCURRENCY: int = int(os.getenv("STT_CONCURRENCY", "8"))
+    LLM_CONCURRENCY: int = int(os.getenv("LLM_CONCURRENCY", "16"))
+    TTS_CONCURRENCY: int = int(os.getenv("TTS_CONCURRENCY", "8"))
+    STT_TIMEOUT_SECONDS: float = float(os.getenv("STT_TIMEOUT_SECONDS", "20"))
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "45"))
+    TTS_TIMEOUT_SECONDS: float = float(os.getenv("TTS_TIMEOUT_SECONDS", "20"))
+    GRADIO_CONCURRENCY_LIMIT: int = int(os.getenv("GRADIO_CONCURRENCY_LIMIT", "64"))
+    
+    # Spoken language identification (STT auto-detect)
+    STT_LID_BACKEND: str = os.getenv("STT_LID_BACKEND", "spectral")
+    STT_LID_PROFILE_PATH: str = os.getenv("STT_LID_PROFILE_PATH", "data/lid_profiles.json")
+    STT_LID_THRESHOLD: float = float(os.getenv("STT_LID_THRESHOLD", "0.75"))
+    STT_DEFAULT_LANGUAGE: str = os.getenv("STT_DEFAULT_LANGUAGE", "ar-SA")
+    
+    # Speech-to-text backend: "hedged", "google", "hamsa" or "local"
+    STT_BACKEND: str = os.getenv("STT_BACKEND", "hedged")
+    
+    # Local (in-process) speech recognition
+    LOCAL_STT_MODEL: str = os.getenv("LOCAL_STT_MODEL", "openai/whisper-small")
+    LOCAL_STT_MAX_BATCH_SIZE: int = int(os.getenv("LOCAL_STT_MAX_BATCH_SIZE", "8"))
+    LOCAL_STT_MAX_WAIT_MS: float = float(os.getenv("LOCAL_STT_MAX_WAIT_MS", "50"))
+    
+    # Hedged STT
+    STT_HEDGE_PROVIDERS: str = os.getenv("STT_HEDGE_PROVIDERS", "google,hamsa")
+    STT_HEDGE_DEADLINE_SECONDS: float = float(os.getenv("STT_HEDGE_DEADLINE_SECONDS", "4"))
+    STT_HEDGE_ACCEPT_CONFIDENCE: float = float(os.getenv("STT_HEDGE_ACCEPT_CONFIDENCE", "0.8"))
+    STT_HEDGE_DEFAULT_CONFIDENCE: float = float(os.getenv("STT_HEDGE_DEFAULT_CONFIDENCE", "0.6"))
+    
+    # Voice activity detection (silence trimming before STT)
+    VAD_FRAME_MS: float = float(os.getenv("VAD_FRAME_MS", "20"))
+    VAD_CALIBRATION_MS: float = float(os.getenv("VAD_CALIBRATION_MS", "250"))
+    VAD_NOISE_EMA_ALPHA: float = float(os.getenv("VAD_NOISE_EMA_ALPHA", "0.1"))
+    VAD_THRESHOLD_RATIO: float = float(os.getenv("VAD_THRESHOLD_RATIO", "3.0"))
+    VAD_MIN_THRESHOLD: float = float(os.getenv("VAD_MIN_THRESHOLD", "0.002"))
+    VAD_HANGOVER_MS: float = float(os.getenv("VAD_HANGOVER_MS", "300"))
+    VAD_PADDING_MS: float = float(os.getenv("VAD_PADDING_MS", "200"))
+    
+    # Live microphone endpointing
+    VOICE_LIVE_MIC: bool = os.getenv("VOICE_LIVE_MIC", "false").lower() == "true"
+    VOICE_LIVE_CHUNK_SECONDS: float = float(os.getenv("VOICE_LIVE_CHUNK_SECONDS", "0.1"))
+    VAD_ENDPOINT_HANGOVER_MS: float = float(os.getenv("VAD_ENDPOINT_HANGOVER_MS", "600"))
+    VAD_MIN_SPEECH_MS: float = float(os.getenv("VAD_MIN_SPEECH_MS", "250"))
+    VAD_MAX_UTTERANCE_MS: float = float(os.getenv("VAD_MAX_UTTERANCE_MS", "30000"))
+    VAD_PARTIAL_INTERVAL_MS: float = float(os.getenv("VAD_PARTIAL_INTERVAL_MS", "0"))  # 0 disables partials
+    VAD_PARTIAL_BACKEND: str = os.getenv("VAD_PARTIAL_BACKEND", "local")
+    
+    # Hamsa upload transport
+    # "wav" (16 kHz mono PCM) or "opus" (Ogg/Opus, needs ffmpeg; only once Hamsa is confirmed to accept it)
+    HAMSA_AUDIO_CODEC: str = os.getenv("HAMSA_AUDIO_CODEC", "wav")
+    HAMSA_AUDIO_BITRATE: str = os.getenv("HAMSA_AUDIO_BITRATE", "24k")
+    HAMSA_MAX_CONNECTIONS: int = int(os.getenv("HAMSA_MAX_CONNECTIONS", "10"))
+    HAMSA_RETRIES: int = int(os.getenv("HAMSA_RETRIES", "2"))
+    
+    # Hamsa server-side end-of-speech detection
+    HAMSA_EOS_ENABLED: bool = os.getenv("HAMSA_EOS_ENABLED", "false").lower() == "true"
+    HAMSA_EOS_THRESHOLD: float = float(os.getenv("HAMSA_EOS_THRESHOLD", "0.3"))
+    
+    # Session transcription history
+    HISTORY_MAX_ENTRIES: int = int(os.getenv("HISTORY_MAX_ENTRIES", "200"))
+    HISTORY_PAGE_SIZE: int = int(os.getenv("HISTORY_PAGE_SIZE", "20"))
+    HISTORY_LOG_ENABLED: bool = os.getenv("HISTORY_LOG_ENABLED", "false").lower() == "true"
+    HISTORY_LOG_DIR: str = os.getenv("HISTORY_LOG_DIR", "data/session_logs")
+    
+    # Startup
+    RAG_WARMUP_ON_START: bool = os.getenv("RAG_WARMUP_ON_START", "false").lower() == "true"
+    
     @classmethod
     def validate(cls) -> bool:
         """Validate required settings"""
@@ -0,0 +1,198 @@
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Set
+from loguru import logger
+from src.config.settings import settings
+
+_END = object()
+
+
+class TurnCancelled(Exception):
+    """Raised inside a turn that was superseded by a newer turn from the same session"""
+
+
+class StageTimeout(TimeoutError):
+    """Raised when a pipeline stage exceeds its timeout"""
+
+    def __init__(self, stage: str, timeout: float):
+        super().__init__(f"Stage '{stage}' timed out after {timeout:.1f}s")
+        self.stage = stage
+        self.timeout = timeout
+
+
+class Turn:
+    """One STT → LLM → TTS turn for a session"""
+
+    def __init__(self, executor: "TurnExecutor", session_id: str):
+        self.executor = executor
+        self.session_id = session_id
+        self.cancelled = False
+        self._tasks: Set[asyncio.Task] = set()
+        self._on_cancel: List[Callable[[], Any]] = []
+
+    async def run(self, stage: str, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """
+        Run one stage coroutine under the stage's concurrency limit and timeout
+
+        Args:
+            stage: Stage name ("stt", "llm" or "tts")
+            fn: Async function implementing the stage
+            *args, **kwargs: Arguments for fn
+
+        Returns:
+            Whatever fn returns
+        """
+        self.check()
+        timeout = self.executor.timeouts[stage]
+        async with self.executor.semaphore(stage):
+            self.check()
+            task = asyncio.ensure_future(asyncio.wait_for(fn(*args, **kwargs), timeout))
+            self._tasks.add(task)
+            try:
+                return await task
+            except asyncio.CancelledError:
+                if self.cancelled:
+                    raise TurnCancelled(self.session_id)
+                raise
+            except asyncio.TimeoutError:
+                raise StageTimeout(stage, timeout)
+            finally:
+                self._tasks.discard(task)
+
+    async def iterate(self, stage: str, iterator: Iterator[Any]) -> AsyncIterator[Any]:
+        """
+        Consume a blocking iterator (e.g. streamed TTS chunks) without blocking the event loop
+
+        The stage slot is held for the whole stream and the stage timeout
+        applies to each item.
+        """
+        async with self.executor.semaphore(stage):
+            while True:
+                self.check()
+                item = await self._next_item(stage, iterator)
+                if item is _END:
+                    return
+                yield item
+
+    async def _next_item(self, stage: str, iterator: Iterator[Any]) -> Any:
+        timeout = self.executor.timeouts[stage]
+        task = asyncio.ensure_future(asyncio.wait_for(asyncio.to_thread(next, iterator, _END), timeout))
+        self._tasks.add(task)
+        try:
+            return await task
+        except asyncio.CancelledError:
+            if self.cancelled:
+                raise TurnCancelled(self.session_id)
+            raise
+        except asyncio.TimeoutError:
+            raise StageTimeout(stage, timeout)
+        finally:
+            self._tasks.discard(task)
+
+    def check(self):
+        """Raise TurnCancelled if this turn has been superseded"""
+        if self.cancelled:
+            raise TurnCancelled(self.session_id)
+
+    def on_cancel(self, callback: Callable[[], Any]):
+        """
+        Register a callback run when the turn is cancelled
+
+        For work living outside the event loop, such as a streaming reply
+        generating in worker threads, which cancelling a task cannot stop.
+        """
+        self._on_cancel.append(callback)
+        if self.cancelled:
+            callback()
+
+    def cancel(self):
+        """Cancel the turn and any stage currently running for it"""
+        self.cancelled = True
+        for task in list(self._tasks):
+            task.cancel()
+        for callback in self._on_cancel:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Turn cancel callback failed: {e}")
+
+    def finish(self):
+        """Release the turn's slot in the executor"""
+        self.executor._finish(self)
+
+
+class TurnExecutor:
+    """
+    Asyncio executor for voice turns
+
+    Each stage has its own concurrency limit and timeout, so a slow provider
+    in one stage cannot occupy every worker. Starting a new turn for a
+    session cancels the turn that session still has in flight.
+
+    Blocking stage implementations run in worker threads (asyncio.to_thread);
+    cancelling abandons their result but cannot interrupt the thread itself.
+    """
+
+    STAGES = ("stt", "llm", "tts")
+
+    def __init__(self, concurrency: Optional[Dict[str, int]] = None,
+                 timeouts: Optional[Dict[str, float]] = None):
+        """
+        Initialize the executor
+
+        Args:
+            concurrency: Maximum in-flight calls per stage
+            timeouts: Timeout in seconds per stage call
+        """
+        self.concurrency = {
+            "stt": settings.STT_CONCURRENCY,
+            "llm": settings.LLM_CONCURRENCY,
+            "tts": settings.TTS_CONCURRENCY,
+        }
+        self.concurrency.update(concurrency or {})
+        self.timeouts = {
+            "stt": settings.STT_TIMEOUT_SECONDS,
+            "llm": settings.LLM_TIMEOUT_SECONDS,
+            "tts": settings.TTS_TIMEOUT_SECONDS,
+        }
+        self.timeouts.update(timeouts or {})
+
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._turns: Dict[str, Turn] = {}
+        self._lock = threading.Lock()
+
+    def semaphore(self, stage: str) -> asyncio.Semaphore:
+        """Get the concurrency limiter for a stage"""
+        if stage not in self.concurrency:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        semaphore = self._semaphores.get(stage)
+        if semaphore is None:
+            semaphore = self._semaphores.setdefault(stage, asyncio.Semaphore(self.concurrency[stage]))
+        return semaphore
+
+    def begin_turn(self, session_id: str) -> Turn:
+        """Start a turn for a session, cancelling the one still in flight"""
+        turn = Turn(self, session_id)
+        with self._lock:
+            previous = self._turns.get(session_id)
+            self._turns[session_id] = turn
+        if previous is not None:
+            logger.info(f"Cancelling superseded turn for session {session_id}")
+            previous.cancel()
+        return turn
+
+    def cancel_session(self, session_id: str):
+        """Cancel whatever turn a session has in flight"""
+        with self._lock:
+            turn = self._turns.pop(session_id, None)
+        if turn is not None:
+            turn.cancel()
+
+    def _finish(self, turn: Turn):
+        with self._lock:
+            if self._turns.get(turn.session_id) is turn:
+                del self._turns[turn.session_id]
+
+
+# Process-wide executor shared by the Gradio handlers
+turn_executor = TurnExecutor()
@@ -0,0 +1,155 @@
+import json
+import os
+from collections import deque
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Deque, List, Optional, Union
+from loguru import logger
+from src.config.settings import settings
+
+SEPARATOR = "-----------------------"
+
+
+@dataclass
+class HistoryEntry:
+    """One line of a session's transcription history"""
+    seq: int
+    timestamp: str
+    kind: str  # "transcript", "error" or "turn"
+    language: str
+    text: str
+    note: str = ""
+    detected_language: Optional[str] = None
+    response: Optional[str] = None
+
+    def format(self) -> str:
+        """Human-readable form, as shown in the history textbox"""
+        if self.kind == "turn":
+            return (
+                f"[{self.timestamp}] [{self.language}] [{self.detected_language}]\n"
+                f"Query: {self.text}\n"
+                f"Answer: {self.response}\n"
+                f"{SEPARATOR}"
+            )
+        if self.kind == "error":
+            return f"[{self.timestamp}] [{self.language}] ERROR: {self.text}"
+        return f"[{self.timestamp}] [{self.language}]{self.note} {self.text}"
+
+
+class TranscriptHistory:
+    """
+    Capped, structured history for one session
+
+    Entries live in a ring buffer, so memory and the rendered page stay
+    bounded however long the session runs; page() returns a fixed-size
+    window for the UI. When a log path is set, each entry (with its
+    sequence number) is also appended to a JSONL session log, which keeps
+    the full record without holding it in memory.
+
+    Kept free of locks and open files so Gradio can deep-copy it as state.
+    """
+
+    def __init__(self, max_entries: int = None, log_path: Optional[str] = None):
+        """
+        Initialize the history
+
+        Args:
+            max_entries: Entries kept in memory (older ones are dropped)
+            log_path: Optional JSONL file every entry is appended to
+        """
+        self.max_entries = max_entries or settings.HISTORY_MAX_ENTRIES
+        self.log_path = log_path
+        self._entries: Deque[HistoryEntry] = deque(maxlen=self.max_entries)
+        self._next_seq = 1
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return self.render()
+
+    def append(self, kind: str, language: str, text: str, timestamp: str = None, **fields) -> HistoryEntry:
+        """Add an entry and return it"""
+        entry = HistoryEntry(
+            seq=self._next_seq,
+            timestamp=timestamp or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            kind=kind,
+            language=language,
+            text=text,
+            **fields
+        )
+        self._next_seq += 1
+        self._entries.append(entry)
+        if self.log_path:
+            self._log(entry)
+        return entry
+
+    def add_turn(self, language: str, query: str, response: dict) -> HistoryEntry:
+        """Record a completed query/answer turn"""
+        return self.append(
+            "turn", language, query,
+            detected_language=response.get("detected_language", "Unknown"),
+            response=response["response"]
+        )
+
+    def page(self, page: int = 0, page_size: int = None) -> List[HistoryEntry]:
+        """
+        One page of entries, newest first
+
+        Args:
+            page: Page number, 0 being the newest
+            page_size: Entries per page
+        """
+        page_size = page_size or settings.HISTORY_PAGE_SIZE
+        end = len(self._entries) - page * page_size
+        if end <= 0:
+            return []
+        start = max(0, end - page_size)
+        return list(reversed(list(self._entries)[start:end]))
+
+    def render(self, page: int = 0, page_size: int = None) -> str:
+        """Text for the history textbox: one page, newest first"""
+        return "\n\n".join(entry.format() for entry in self.page(page, page_size))
+
+    def _log(self, entry: HistoryEntry):
+        try:
+            os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(asdict(entry), ensure_ascii=False) + "\n")
+        except OSError as e:
+            logger.warning(f"Could not write session log {self.log_path}: {e}")
+
+
+def new_history(session_id: Optional[str] = None) -> TranscriptHistory:
+    """Create a session history, logging to HISTORY_LOG_DIR when enabled"""
+    log_path = None
+    if settings.HISTORY_LOG_ENABLED and session_id:
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        log_path = os.path.join(settings.HISTORY_LOG_DIR, f"{stamp}-{session_id}.jsonl")
+    return TranscriptHistory(log_path=log_path)
+
+
+def record_transcription(history: Union[TranscriptHistory, str, None], language: str, text: str,
+                         error: bool = False, note: str = "") -> Union[TranscriptHistory, str]:
+    """
+    Add a transcription result to a history
+
+    Accepts a TranscriptHistory (updated in place and returned) or a legacy
+    newline-joined string (a new string is returned).
+
+    Args:
+        history: Existing history
+        language: Selected language from dropdown
+        text: Transcribed text, or the error message
+        error: Whether text is an error message
+        note: Extra annotation shown after the language (e.g. language ID)
+    """
+    kind = "error" if error else "transcript"
+    if isinstance(history, TranscriptHistory):
+        history.append(kind, language, text, note=note)
+        return history
+
+    entry = HistoryEntry(0, datetime.now().strftime("%Y-%m-%d %H:%M:%S"), kind, language, text, note=note)
+    if history:
+        return history + "\n" + entry.format()
+    return entry.format()
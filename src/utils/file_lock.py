@@ -0,0 +1,29 @@
+import fcntl
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+
+@contextmanager
+def file_lock(path: str, shared: bool = False) -> Iterator[None]:
+    """
+    Hold an advisory lock on path (created if missing) for the with-block
+
+    Serializes processes sharing files on one host, e.g. the Flask and
+    Gradio services under supervisord. Each call opens the file anew, so
+    threads of one process exclude each other too; the lock is not
+    reentrant and is released when the block exits or the process dies.
+
+    Args:
+        path: Lock file path
+        shared: Take a shared (reader) lock instead of an exclusive one
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
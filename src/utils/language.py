@@ -0,0 +1,174 @@
+import re
+import unicodedata
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+# Every Unicode block holding Arabic script
+ARABIC_RANGES = [
+    (0x0600, 0x06FF),    # Arabic
+    (0x0750, 0x077F),    # Arabic Supplement
+    (0x0870, 0x089F),    # Arabic Extended-B
+    (0x08A0, 0x08FF),    # Arabic Extended-A
+    (0xFB50, 0xFDFF),    # Arabic Presentation Forms-A
+    (0xFE70, 0xFEFF),    # Arabic Presentation Forms-B
+    (0x10E60, 0x10E7F),  # Rumi Numeral Symbols
+    (0x10EC0, 0x10EFF),  # Arabic Extended-C
+    (0x1EE00, 0x1EEFF),  # Arabic Mathematical Alphabetic Symbols
+]
+
+# Memoized strings; turns repeat the same short texts (greetings, cached sentences)
+CACHE_SIZE = 4096
+
+
+def _char_class(chars: List[str]) -> str:
+    """Regex character class body for a sorted list of characters, as ranges"""
+    parts = []
+    start = prev = None
+    for char in chars + [None]:
+        if char is not None and prev is not None and ord(char) == ord(prev) + 1:
+            prev = char
+            continue
+        if start is not None:
+            parts.append(re.escape(start) if start == prev else f"{re.escape(start)}-{re.escape(prev)}")
+        start = prev = char
+    return "".join(parts)
+
+
+# Arabic letters plus the marks written on them (harakat, shadda, superscript alef)
+_ARABIC_LETTERS = _char_class([
+    chr(code)
+    for low, high in ARABIC_RANGES
+    for code in range(low, high + 1)
+    if chr(code).isalpha() or unicodedata.category(chr(code)) == "Mn"
+])
+_LATIN_LETTERS = "A-Za-zÀ-ÖØ-öø-ÿ"
+
+# One scan finds every run of Arabic or Latin letters
+_LETTER_RUNS = re.compile(f"([{_ARABIC_LETTERS}]+)|([{_LATIN_LETTERS}]+)")
+
+# Fold alef/ya/ta marbuta variants and curly apostrophes; drop harakat, superscript alef and tatweel.
+# Applied as str.replace calls: each is a C-speed scan, where str.translate looks
+# every character of non-ASCII text up in a dict (over 10x slower on Arabic)
+_NORMALIZE_FOLDS = [
+    ("أ", "ا"), ("إ", "ا"), ("آ", "ا"), ("ٱ", "ا"),
+    ("ى", "ي"), ("ة", "ه"),
+    ("’", "'"), ("‘", "'"),
+    ("ـ", ""), ("ٰ", ""),
+    *((chr(code), "") for code in range(0x064B, 0x0653)),
+]
+
+
+@dataclass(frozen=True)
+class ScriptSpan:
+    """A run of letters in one script; text[start:end]"""
+    start: int
+    end: int
+    language: str  # 'arabic' or 'english'
+    letters: int
+
+
+def normalize_arabic(text: str) -> str:
+    """Lowercase and fold Arabic spelling variants so the same word compares equal however it is written"""
+    text = text.lower()
+    if text.isascii():
+        return text
+    for variant, canonical in _NORMALIZE_FOLDS:
+        if variant in text:
+            text = text.replace(variant, canonical)
+    return text
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def script_spans(text: str) -> Tuple[ScriptSpan, ...]:
+    """
+    Runs of Arabic and Latin letters in text, in order
+
+    Spaces, digits and punctuation are not part of any span. Adjacent words
+    in the same script are separate spans; see split_by_script for
+    speakable segments.
+    """
+    spans = []
+    for match in _LETTER_RUNS.finditer(text):
+        language = 'arabic' if match.group(1) else 'english'
+        spans.append(ScriptSpan(match.start(), match.end(), language, match.end() - match.start()))
+    return tuple(spans)
+
+
+def script_counts(text: str) -> Dict[str, int]:
+    """Letters per script: {'arabic': n, 'english': m}"""
+    counts = {'arabic': 0, 'english': 0}
+    for span in script_spans(text):
+        counts[span.language] += span.letters
+    return counts
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def detect_language(text: str) -> str:
+    """
+    Detect if text is primarily Arabic or English
+
+    Args:
+        text: Input text to analyze
+
+    Returns:
+        'arabic', 'english', or 'mixed'
+    """
+    counts = script_counts(text)
+    if counts['arabic'] > counts['english']:
+        return 'arabic'
+    elif counts['english'] > counts['arabic']:
+        return 'english'
+    else:
+        return 'mixed'
+
+
+def split_by_script(text: str, min_letters: int = 3) -> List[Tuple[str, str]]:
+    """
+    Split text into runs of Arabic and English script
+
+    Digits, punctuation and spaces stay with the run they follow. Runs with
+    fewer than min_letters letters (a stray Latin initial inside an Arabic
+    sentence, say) are folded into the preceding run so they don't force a
+    voice switch.
+
+    Args:
+        text: Text to split
+        min_letters: Minimum letters for a run to keep its own language
+
+    Returns:
+        List of (segment, 'arabic' | 'english') in order; concatenating the
+        segments gives back the input
+    """
+    return list(_split_by_script(text, min_letters))
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _split_by_script(text: str, min_letters: int) -> Tuple[Tuple[str, str], ...]:
+    runs: List[List] = []  # [language, start, letter count]
+    for span in script_spans(text):
+        if runs and runs[-1][0] == span.language:
+            runs[-1][2] += span.letters
+        else:
+            runs.append([span.language, span.start, span.letters])
+
+    if not runs:
+        return ((text, detect_language(text)),) if text else ()
+
+    merged: List[List] = []
+    for language, start, letters in runs:
+        if merged and (letters < min_letters or merged[-1][0] == language):
+            merged[-1][2] += letters
+        else:
+            merged.append([language, start, letters])
+
+    # A short first run is absorbed by the next one instead
+    if len(merged) > 1 and merged[0][2] < min_letters:
+        first = merged.pop(0)
+        merged[0][1] = first[1]
+        merged[0][2] += first[2]
+
+    # Each segment runs up to the next one; the first also takes any leading text
+    merged[0][1] = 0
+    ends = [start for _, start, _ in merged[1:]] + [len(text)]
+    return tuple((text[start:end], language) for (language, start, _), end in zip(merged, ends))
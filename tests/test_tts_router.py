@@ -0,0 +1,101 @@
+import io
+import time
+import wave
+import pytest
+from src.config.settings import settings
+from src.TextToSpeech import router as router_module
+from src.TextToSpeech.backends import TTSBackend, TTSBackendFactory
+from src.TextToSpeech.router import TTSRouter
+
+REPLY = "Hello there. مرحبا بك"
+
+
+def wav_clip(text: str) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(text.encode("utf-8").ljust(64, b"\0"))
+    return buffer.getvalue()
+
+
+def fake_backend(backend_name: str, backend_format: str, delay: float = 0.0):
+    class FakeBackend(TTSBackend):
+        name = backend_name
+        audio_format = backend_format
+
+        def voice_for(self, language: str) -> str:
+            return language
+
+        def synthesize(self, text: str, voice: str) -> bytes:
+            time.sleep(delay)
+            if backend_format == "wav":
+                return wav_clip(f"{backend_name}:{text}")
+            return f"{backend_name}:{text}|".encode("utf-8")
+
+    return FakeBackend
+
+
+@pytest.fixture
+def backends(monkeypatch):
+    monkeypatch.setattr(settings, "TTS_CACHE_ENABLED", False)
+    for backend in (
+        fake_backend("slow_mp3", "mp3", delay=1.0),
+        fake_backend("mp3", "mp3"),
+        fake_backend("backup_mp3", "mp3"),
+        fake_backend("wav", "wav"),
+    ):
+        monkeypatch.setitem(TTSBackendFactory.BACKENDS, backend.name, backend)
+    TTSBackendFactory.reset_instances()
+    yield
+    TTSBackendFactory.reset_instances()
+
+
+def make_router(english, arabic) -> TTSRouter:
+    return TTSRouter(routes={"english": english, "arabic": arabic},
+                     retries=0, timeout=0.1, prefer_fastest=False)
+
+
+def test_timed_out_run_is_rerendered_in_reply_format(backends):
+    router = make_router(["slow_mp3", "wav", "backup_mp3"], ["mp3"])
+    audio, audio_format = router.synthesize(REPLY)
+    assert audio_format == "mp3"
+    assert audio.startswith(b"backup_mp3:Hello")
+    assert b"mp3:\xd9\x85" in audio
+
+
+def test_whole_reply_moves_to_fallback_format(backends):
+    router = make_router(["slow_mp3", "wav"], ["mp3", "wav"])
+    audio, audio_format = router.synthesize(REPLY)
+    assert audio_format == "wav"
+    with wave.open(io.BytesIO(audio), "rb") as wav_file:
+        frames = wav_file.readframes(wav_file.getnframes())
+    assert frames.startswith(b"wav:Hello")
+    assert "wav:مرحبا".encode("utf-8") in frames
+
+
+def test_transcodes_when_no_backend_can_match(backends, monkeypatch):
+    transcoded = []
+
+    def transcode(audio, source_format, target_format, like=None):
+        if source_format == target_format:
+            return audio
+        transcoded.append((source_format, target_format))
+        return b"transcoded|"
+
+    monkeypatch.setattr(router_module, "transcode_audio", transcode)
+    router = make_router(["slow_mp3", "wav"], ["mp3"])
+    audio, audio_format = router.synthesize(REPLY)
+    assert audio_format == "mp3"
+    assert transcoded == [("wav", "mp3")]
+    assert audio.startswith(b"transcoded|mp3:")
+
+
+def test_streamed_units_keep_reply_format(backends, monkeypatch):
+    monkeypatch.setattr(router_module, "transcode_audio", lambda audio, *args, **kwargs: b"transcoded|")
+    router = make_router(["slow_mp3", "wav"], ["mp3", "wav"])
+    assert router.audio_format == "mp3"
+    # A full reply could switch to WAV here, but a streamed chunk must stay MP3
+    assert router.synthesize_unit("Hello there.") == b"transcoded|"
+    assert router.synthesize_unit("مرحبا بك").startswith("mp3:".encode("utf-8"))